@@ -0,0 +1,106 @@
+"""
+Compares concurrent read throughput of sync and async API views.
+
+Starts gunicorn twice with the same number of workers: sync workers
+serving the WSGI app and uvicorn workers serving the ASGI app. Each is
+loaded with the same number of concurrent clients, sync endpoints
+against the first and their /api/async/ variants against the second.
+
+Run from the app directory against a migrated database:
+    python -m benchmarks.async_views --workers 2 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.utils import start_server, summarize
+
+SERVERS = {
+    'sync': ('event_calendar.wsgi:application', 'sync', '/api/events/'),
+    'async': ('event_calendar.asgi:application',
+              'uvicorn.workers.UvicornWorker', '/api/async/events/'),
+}
+
+
+async def run_load(url, requests, concurrency):
+    latencies = []
+    errors = 0
+    pending = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            for _ in pending:
+                started = time.perf_counter()
+                response = await client.get(url)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - started
+
+    if not latencies:
+        raise SystemExit(f'{url} returned no successful responses')
+    stats = summarize(latencies)
+    stats['errors'] = errors
+    stats['rps'] = round(requests / duration, 1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--query', default='',
+                        help='query string added to both paths, '
+                             'e.g. "search=music"')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--json', action='store_true',
+                        help='print machine-readable results')
+    args = parser.parse_args()
+
+    results = {}
+    for offset, (name, (application, worker_class, path)) in enumerate(
+            SERVERS.items()):
+        port = args.port + offset
+        process = start_server(application, worker_class, port, args.workers)
+        try:
+            url = f'http://127.0.0.1:{port}{path}'
+            if args.query:
+                url = f'{url}?{args.query}'
+            # Warm up connections and caches of every worker
+            asyncio.run(run_load(url, args.workers * 10, args.workers))
+            results[name] = asyncio.run(
+                run_load(url, args.requests, args.concurrency)
+            )
+        finally:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps({'workers': args.workers,
+                          'concurrency': args.concurrency,
+                          'results': results}, indent=2))
+        return
+
+    print(f'{args.workers} workers, {args.concurrency} concurrent clients, '
+          f'{args.requests} requests')
+    print(f'{"views":<8}{"rps":>10}{"mean":>10}{"p50":>10}{"p95":>10}'
+          f'{"p99":>10}{"errors":>8}')
+    for name, stats in results.items():
+        print(f'{name:<8}{stats["rps"]:>10}{stats["mean_ms"]:>10}'
+              f'{stats["p50_ms"]:>10}{stats["p95_ms"]:>10}'
+              f'{stats["p99_ms"]:>10}{stats["errors"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
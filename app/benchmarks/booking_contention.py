@@ -0,0 +1,288 @@
+"""
+Load test of booking contention on a single event.
+
+Many clients, each a separate user, book and cancel seats of one event
+at the same time through gunicorn. Notifications are sent to a local
+counting gRPC sink instead of the notification service, and Celery
+tasks run eagerly in the web workers, so no broker or worker is needed.
+The notification round trip then happens inside the booking request.
+
+While the load runs Postgres is polled for backends waiting on locks
+and for the event's confirmed reservations. Overbooking is reported if
+confirmed reservations ever exceeded the event's seats.
+
+Run from the app directory against a migrated database:
+    python -m benchmarks.booking_contention --clients 100 --seats 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent import futures
+from datetime import timedelta
+
+import grpc
+import httpx
+
+from benchmarks.utils import setup_django, start_server, summarize
+from grpc_server import notifications_pb2
+from grpc_server.notifications_pb2_grpc import \
+    NotificationServiceServicer, add_NotificationServiceServicer_to_server
+
+PREFIX = 'contention_'
+SAMPLE_INTERVAL = 0.01
+
+
+class CountingSink(NotificationServiceServicer):
+    """Notification service stand-in that only counts requests"""
+    def __init__(self):
+        self.received = Counter()
+        self.lock = threading.Lock()
+
+    def SendNotification(self, request, context=None):
+        with self.lock:
+            self.received[request.notification_type] += 1
+        return notifications_pb2.NotificationResponse(
+            success=True, message='Notification counted'
+        )
+
+
+def start_sink(port):
+    sink = CountingSink()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=16))
+    add_NotificationServiceServicer_to_server(sink, server)
+    server.add_insecure_port(f'127.0.0.1:{port}')
+    server.start()
+    return server, sink
+
+
+class DatabaseSampler(threading.Thread):
+    """Polls lock waits and the event's confirmed reservations"""
+    def __init__(self, event_id):
+        super().__init__(daemon=True)
+        self.event_id = event_id
+        self.stopped = threading.Event()
+        self.lock_wait = 0
+        self.max_waiting = 0
+        self.max_confirmed = 0
+
+    def run(self):
+        from django.db import connection
+
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.is_set():
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE wait_event_type = 'Lock' "
+                        "AND datname = current_database()"
+                    )
+                    waiting = cursor.fetchone()[0]
+                    cursor.execute(
+                        "SELECT count(*) FROM events_reservation "
+                        "WHERE event_id = %s AND status = 'confirmed'",
+                        [self.event_id]
+                    )
+                    confirmed = cursor.fetchone()[0]
+                    # Waiting backends times the interval approximates
+                    # the time spent waiting for locks
+                    self.lock_wait += waiting * SAMPLE_INTERVAL
+                    self.max_waiting = max(self.max_waiting, waiting)
+                    self.max_confirmed = max(self.max_confirmed, confirmed)
+                    time.sleep(SAMPLE_INTERVAL)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def create_event(clients, seats):
+    """Creates the event and its clients, returns (event, access tokens)"""
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from events.models import Event
+
+    password = make_password(None)
+    users = User.objects.bulk_create(
+        User(username=f'{PREFIX}{i}', password=password)
+        for i in range(clients + 1)
+    )
+    # Saved without signals, so no status update is scheduled for it
+    event, = Event.objects.bulk_create([Event(
+        name='Contention test', description='Contention test',
+        start_time=timezone.now() + timedelta(days=30), location='Berlin',
+        available_seats=seats, organizer=users[0]
+    )])
+    return event, [str(AccessToken.for_user(user)) for user in users[1:]]
+
+
+def delete_test_data():
+    """Deletes clients, the event goes with its organizer"""
+    from django.contrib.auth.models import User
+
+    User.objects.filter(username__startswith=PREFIX).delete()
+
+
+class Operation:
+    def __init__(self):
+        self.latencies = []
+        self.ok = 0
+        self.rejected = Counter()
+        self.errors = Counter()
+
+    def stats(self):
+        stats = summarize(self.latencies) if self.latencies else {}
+        stats.update(ok=self.ok, rejected=sum(self.rejected.values()),
+                     errors=sum(self.errors.values()),
+                     reasons=dict(self.rejected + self.errors))
+        return stats
+
+
+async def request(client, operation, url, token):
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            url, headers={'Authorization': f'Bearer {token}'}
+        )
+    except httpx.TransportError as e:
+        operation.errors[type(e).__name__] += 1
+        return False
+    operation.latencies.append(time.perf_counter() - started)
+    if response.status_code == 200:
+        operation.ok += 1
+        return True
+    detail = f'{response.status_code} {response.json().get("detail", "")}' \
+        if response.headers.get('content-type', '').startswith(
+            'application/json'
+        ) else str(response.status_code)
+    if response.status_code == 400:
+        operation.rejected[detail] += 1
+    else:
+        operation.errors[detail] += 1
+    return False
+
+
+async def run_load(base_url, tokens, rounds, cancel_share, seed):
+    book, cancel = Operation(), Operation()
+    limits = httpx.Limits(max_connections=len(tokens))
+    rng = random.Random(seed)
+
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        async def user(token):
+            for _ in range(rounds):
+                booked = await request(client, book, f'{base_url}book/',
+                                       token)
+                if booked and rng.random() < cancel_share:
+                    await request(client, cancel,
+                                  f'{base_url}cancel_reservation/', token)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(token) for token in tokens))
+        duration = time.perf_counter() - started
+
+    return book, cancel, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--seats', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='booking attempts per client')
+    parser.add_argument('--cancel-share', type=float, default=0.5,
+                        help='share of successful bookings cancelled again')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8120)
+    parser.add_argument('--sink-port', type=int, default=50151)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true',
+                        help='print machine-readable results')
+    args = parser.parse_args()
+
+    setup_django()
+    from events.models import Reservation
+
+    # Left over if a previous run was interrupted
+    delete_test_data()
+    sink_server, sink = start_sink(args.sink_port)
+    event, tokens = create_event(args.clients, args.seats)
+    process = start_server(
+        'event_calendar.wsgi:application', 'sync', args.port, args.workers,
+        env={**os.environ,
+             'GRPC_NOTIFICATION_TARGET': f'127.0.0.1:{args.sink_port}',
+             'CELERY_TASK_ALWAYS_EAGER': 'true'}
+    )
+    sampler = DatabaseSampler(event.pk)
+    sampler.start()
+    try:
+        book, cancel, duration = asyncio.run(run_load(
+            f'http://127.0.0.1:{args.port}/api/events/{event.pk}/',
+            tokens, args.rounds, args.cancel_share, args.seed
+        ))
+    finally:
+        sampler.stop()
+        process.terminate()
+        process.wait()
+        sink_server.stop(None)
+
+    confirmed = Reservation.objects.filter(
+        event=event, status='confirmed'
+    ).count()
+    max_confirmed = max(sampler.max_confirmed, confirmed)
+    delete_test_data()
+
+    attempts = len(book.latencies) + len(cancel.latencies)
+    results = {
+        'clients': args.clients,
+        'seats': args.seats,
+        'workers': args.workers,
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(attempts / duration, 1),
+        'book': book.stats(),
+        'cancel': cancel.stats(),
+        'lock_wait_s': round(sampler.lock_wait, 3),
+        'max_waiting_backends': sampler.max_waiting,
+        'confirmed': confirmed,
+        'max_confirmed': max_confirmed,
+        'overbooked': max(0, max_confirmed - args.seats),
+        'notifications': {'expected': book.ok,
+                          'received': sink.received.total()},
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f'{args.clients} clients, {args.rounds} booking attempts each, '
+          f'{args.seats} seats, {args.workers} workers')
+    print(f'{attempts} requests in {results["duration_s"]}s, '
+          f'{results["throughput_rps"]} rps')
+    for name, operation in (('book', book), ('cancel', cancel)):
+        stats = operation.stats()
+        print(f'{name:<8}ok {stats["ok"]}, rejected {stats["rejected"]}, '
+              f'errors {stats["errors"]}, p50 {stats.get("p50_ms")} ms, '
+              f'p99 {stats.get("p99_ms")} ms')
+        for reason, count in stats['reasons'].items():
+            print(f'{"":<8}{count} x {reason}')
+    print(f'lock wait {results["lock_wait_s"]}s, at most '
+          f'{results["max_waiting_backends"]} backends waiting')
+    print(f'notifications {results["notifications"]["received"]} '
+          f'of {results["notifications"]["expected"]} received')
+    print(f'confirmed {confirmed}, at most {max_confirmed} of '
+          f'{args.seats} seats: ' + (
+              f'OVERBOOKED by {results["overbooked"]}'
+              if results['overbooked'] else 'no overbooking'))
+
+
+if __name__ == '__main__':
+    main()
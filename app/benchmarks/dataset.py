@@ -0,0 +1,75 @@
+"""
+Seeds a synthetic dataset for endpoint benchmarks.
+
+Row counts scale with --events, so the same distributions can be
+generated at 10^5 to 10^7 events. Rows are copied in by
+fixtures.generate_load_data. Seeded users and tags are prefixed with
+PREFIX and can be removed with --flush without touching other data.
+
+Run from the app directory against a migrated database:
+    python -m benchmarks.dataset --events 100000
+"""
+
+import argparse
+import time
+
+from benchmarks.utils import setup_django
+from fixtures.generate_load_data import default_sizes, generate
+
+PREFIX = 'bench_'
+
+
+def seed(events, seed_value=0):
+    return generate(**default_sizes(events), prefix=PREFIX, seed=seed_value)
+
+
+def flush():
+    """Deletes seeded rows and everything that references them"""
+    from django.db import connection
+
+    users = ("SELECT id FROM auth_user "
+             "WHERE username LIKE %(prefix)s")
+    events = f"SELECT id FROM events_event WHERE organizer_id IN ({users})"
+    statements = (
+        f"DELETE FROM notifications_notification "
+        f"WHERE recipient_id IN ({users})",
+        f"DELETE FROM notifications_notificationpreference "
+        f"WHERE user_id IN ({users})",
+        f"DELETE FROM events_rating "
+        f"WHERE user_id IN ({users}) OR event_id IN ({events})",
+        f"DELETE FROM events_reservation "
+        f"WHERE user_id IN ({users}) OR event_id IN ({events})",
+        f"DELETE FROM events_event_tags WHERE event_id IN ({events})",
+        "DELETE FROM events_event_tags WHERE tag_id IN "
+        "(SELECT id FROM events_tag WHERE name LIKE %(prefix)s)",
+        f"DELETE FROM events_event WHERE organizer_id IN ({users})",
+        "DELETE FROM events_tag WHERE name LIKE %(prefix)s",
+        f"DELETE FROM auth_user WHERE id IN ({users})",
+    )
+    with connection.cursor() as cursor:
+        for statement in statements:
+            # Underscores in the prefix are LIKE wildcards
+            cursor.execute(statement,
+                           {'prefix': PREFIX.replace('_', r'\_') + '%'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed, same seed gives same dataset')
+    parser.add_argument('--flush', action='store_true',
+                        help='delete previously seeded rows first')
+    args = parser.parse_args()
+
+    setup_django()
+    if args.flush:
+        flush()
+    started = time.perf_counter()
+    counts = seed(args.events, args.seed)
+    print(', '.join(f'{count} {name}' for name, count in counts.items()),
+          f'seeded in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
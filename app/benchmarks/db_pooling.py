@@ -0,0 +1,77 @@
+"""
+Compares API request latency across DB_CONN_MODE settings.
+
+Each mode runs in its own process since connection settings are read at
+startup. Requests go through the WSGI handler, so connections are opened
+and released exactly as under gunicorn.
+
+Run from the app directory against a migrated database:
+    python -m benchmarks.db_pooling --requests 500 --path /api/events/
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.utils import setup_django, summarize, wsgi_request
+
+MODES = ('none', 'persistent', 'pool')
+
+
+def run_mode(path, requests, warmup):
+    setup_django()
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    latencies = []
+    for i in range(warmup + requests):
+        status, _, elapsed = wsgi_request(application, 'GET', path)
+        if status != 200:
+            raise SystemExit(f'{path} returned {status}')
+        if i >= warmup:
+            latencies.append(elapsed)
+    return summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--path', default='/api/tags/')
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--json', action='store_true',
+                        help='print machine-readable results')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.path, args.requests, args.warmup)))
+        return
+
+    results = {}
+    for mode in args.modes.split(','):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.db_pooling',
+             '--child', mode, '--path', args.path,
+             '--requests', str(args.requests),
+             '--warmup', str(args.warmup)],
+            env={**os.environ, 'DB_CONN_MODE': mode},
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    if args.json:
+        print(json.dumps({'path': args.path, 'results': results}, indent=2))
+        return
+
+    print(f'GET {args.path}, {args.requests} requests per mode')
+    print(f'{"mode":<12}{"mean":>10}{"p50":>10}{"p95":>10}{"p99":>10}')
+    for mode, stats in results.items():
+        print(f'{mode:<12}{stats["mean_ms"]:>10}{stats["p50_ms"]:>10}'
+              f'{stats["p95_ms"]:>10}{stats["p99_ms"]:>10}')
+
+
+if __name__ == '__main__':
+    main()
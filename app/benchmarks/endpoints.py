@@ -0,0 +1,242 @@
+"""
+Measures latency and query counts of the read API endpoints.
+
+Every EventViewSet, ReservationViewSet and NotificationViewSet read
+endpoint is requested through the WSGI handler, the event list once per
+filter. Detail endpoints cycle through objects of the benchmark user so
+a single cached object does not stand in for all. Requests are
+authenticated with a JWT of a seeded user, see benchmarks.dataset.
+
+Results can be saved with --json and compared with a later run:
+    python -m benchmarks.endpoints --json > before.json
+    python -m benchmarks.endpoints --compare before.json
+
+With --cold the cache is cleared before every request, which measures
+the database work the cache otherwise hides. It clears the whole
+configured cache, so do not use it against a shared Redis.
+"""
+
+import argparse
+import json
+import random
+import subprocess
+from contextlib import ExitStack
+from datetime import timedelta
+
+from benchmarks.dataset import PREFIX
+from benchmarks.utils import setup_django, summarize, wsgi_request
+
+SAMPLE_SIZE = 50
+
+
+def scenarios(ids):
+    """(name, path) pairs, {placeholders} are filled from ids per request"""
+    from django.utils import timezone
+
+    today = timezone.now().date()
+    month = (today + timedelta(days=30)).isoformat()
+    return [
+        ('events.list', '/api/events/'),
+        ('events.list.page_10', '/api/events/?page=10'),
+        ('events.list.tags', '/api/events/?tags={tag_id}'),
+        ('events.list.location', '/api/events/?location=ber'),
+        ('events.list.status', '/api/events/?status=upcoming'),
+        ('events.list.organizer', '/api/events/?organizer={user_id}'),
+        ('events.list.date_range',
+         f'/api/events/?start_date={today}&end_date={month}'),
+        ('events.list.available_seats',
+         '/api/events/?min_available_seats=100&max_available_seats=300'),
+        ('events.list.search', '/api/events/?search=jazz'),
+        ('events.list.ordering', '/api/events/?ordering=created_at'),
+        ('events.list.min_organizer_rating',
+         '/api/events/?min_organizer_rating=4'),
+        ('events.list.facets',
+         '/api/events/?facets=tags,location,status'),
+        ('events.list.combined',
+         f'/api/events/?status=upcoming&tags={{tag_id}}&location=par'
+         f'&start_date={today}&facets=tags,location'),
+        ('events.detail', '/api/events/{event_id}/'),
+        ('events.availability', '/api/events/availability/?ids={event_ids}'),
+        ('events.my_events', '/api/events/my_events/'),
+        ('events.my_events.upcoming', '/api/events/my_events/?upcoming=true'),
+        ('events.organized', '/api/events/organized/'),
+        ('reservations.list', '/api/reservations/'),
+        ('reservations.detail', '/api/reservations/{reservation_id}/'),
+        ('notifications.list', '/api/notifications/'),
+        ('notifications.detail', '/api/notifications/{notification_id}/'),
+        ('notifications.unread_count', '/api/notifications/unread_count/'),
+        ('notifications.preferences', '/api/notifications/preferences/'),
+    ]
+
+
+def benchmark_user():
+    """Seeded user with the most reservations"""
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+
+    user = User.objects.filter(username__startswith=PREFIX).annotate(
+        reservation_count=Count('reservations')
+    ).order_by('-reservation_count').first()
+    if user is None:
+        raise SystemExit('No seeded data, run benchmarks.dataset first')
+    return user
+
+
+def sample_ids(user, rng):
+    """Ids of objects the user may request, SAMPLE_SIZE of each"""
+    from events.models import Event, Reservation, Tag
+    from notifications.models import Notification
+
+    def sample(queryset):
+        ids = list(queryset.values_list('pk', flat=True)[:SAMPLE_SIZE * 20])
+        return rng.sample(ids, min(SAMPLE_SIZE, len(ids)))
+
+    event_ids = sample(Event.objects.order_by())
+    return {
+        'event_id': event_ids,
+        'event_ids': [','.join(map(str, rng.sample(event_ids,
+                                                   min(20, len(event_ids)))))
+                      for _ in range(SAMPLE_SIZE)],
+        'tag_id': sample(Tag.objects.filter(name__startswith=PREFIX)),
+        'user_id': [user.pk],
+        'reservation_id': sample(Reservation.objects.filter(user=user)),
+        'notification_id': sample(
+            Notification.objects.filter(recipient=user)
+        ),
+    }
+
+
+def fill(path, ids, i):
+    return path.format(**{name: values[i % len(values)]
+                          for name, values in ids.items() if values})
+
+
+def run(requests, warmup, cold, only=None, seed_value=0):
+    setup_django()
+    from django.core.cache import cache
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from event_calendar.cache import clear_local_caches
+
+    application = get_wsgi_application()
+    user = benchmark_user()
+    headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+    ids = sample_ids(user, random.Random(seed_value))
+
+    results = {}
+    for name, path in scenarios(ids):
+        if only and not name.startswith(only):
+            continue
+        latencies = []
+        query_counts = []
+        for i in range(warmup + requests):
+            if cold:
+                cache.clear()
+                clear_local_caches()
+            # Reads may be routed to the replica alias
+            with ExitStack() as stack:
+                captures = [
+                    stack.enter_context(CaptureQueriesContext(connection))
+                    for connection in connections.all()
+                ]
+                status, _, elapsed = wsgi_request(
+                    application, 'GET', fill(path, ids, i), headers
+                )
+            if status != 200:
+                raise SystemExit(f'{fill(path, ids, i)} returned {status}')
+            if i >= warmup:
+                latencies.append(elapsed)
+                query_counts.append(sum(len(capture)
+                                        for capture in captures))
+        stats = summarize(latencies)
+        stats['queries'] = sorted(query_counts)[len(query_counts) // 2]
+        stats['max_queries'] = max(query_counts)
+        results[name] = stats
+    return results
+
+
+def dataset_counts():
+    from django.contrib.auth.models import User
+
+    from events.models import Event, Rating, Reservation
+    from notifications.models import Notification
+
+    return {
+        'users': User.objects.count(),
+        'events': Event.objects.count(),
+        'reservations': Reservation.objects.count(),
+        'ratings': Rating.objects.count(),
+        'notifications': Notification.objects.count(),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    print(f'{"endpoint":<38}{"p50":>9}{"p95":>9}{"p99":>9}{"queries":>9}'
+          + (f'{"p50 diff":>10}{"q diff":>8}' if baseline else ''))
+    for name, stats in results.items():
+        line = (f'{name:<38}{stats["p50_ms"]:>9}{stats["p95_ms"]:>9}'
+                f'{stats["p99_ms"]:>9}{stats["queries"]:>9}')
+        before = (baseline or {}).get(name)
+        if before:
+            change = (stats['p50_ms'] - before['p50_ms']) / \
+                before['p50_ms'] * 100
+            line += (f'{change:>+9.1f}%'
+                     f'{stats["queries"] - before["queries"]:>+8}')
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', help='run endpoints with this prefix, '
+                                       'e.g. events.list')
+    parser.add_argument('--cold', action='store_true',
+                        help='clear the cache before every request')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true',
+                        help='print machine-readable results')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='show changes against results saved '
+                             'with --json')
+    args = parser.parse_args()
+
+    results = run(args.requests, args.warmup, args.cold, args.only,
+                  args.seed)
+
+    if args.json:
+        print(json.dumps({
+            'revision': git_revision(),
+            'dataset': dataset_counts(),
+            'requests': args.requests,
+            'cold': args.cold,
+            'results': results,
+        }, indent=2))
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print(f'{args.requests} requests per endpoint'
+          + (', cold cache' if args.cold else ''))
+    print_table(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
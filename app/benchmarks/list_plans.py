@@ -0,0 +1,160 @@
+"""
+Compares plans of the hot event queries with and without the indexes
+of events 0005: start time, status rank and the partial indexes.
+
+Queries of the event list are captured from the view as in the
+explain_event_filters command, the others are built like the code
+running them. Each is explained with EXPLAIN (ANALYZE, BUFFERS) as is
+and once more after dropping INDEXES in a transaction that is rolled
+back. The drop locks the tables until then, so do not run it against a
+database in use.
+
+Tables are analyzed first, the planner has no statistics of a freshly
+added status rank column otherwise.
+
+Run from the app directory against a seeded database, see
+benchmarks.dataset:
+    python -m benchmarks.list_plans
+"""
+
+import argparse
+import json
+
+from benchmarks.utils import setup_django
+
+INDEXES = ('event_start_time_idx', 'event_status_rank_idx',
+           'event_upcoming_idx', 'reservation_confirmed_idx')
+PAGE_SIZE = 20
+
+
+def scenarios():
+    """(name, function returning (label, connection, sql, params)s)"""
+    from django.conf import settings
+    from django.db import connection
+    from django.utils import timezone
+
+    from events.management.commands.explain_event_filters import \
+        list_queries
+    from events.models import COMPLETION_DELAY, Event
+
+    def labeled(queries):
+        return [('count' if sql.startswith('SELECT COUNT') else 'page',
+                 connection, sql, params)
+                for connection, sql, params in queries]
+
+    def queryset(label, queryset):
+        return [(label, connection, *queryset.query.sql_with_params())]
+
+    def page_events():
+        # Serializing a page counts confirmed seats of its events
+        ids = list(Event.objects.order_by().values_list(
+            'pk', flat=True
+        )[:PAGE_SIZE])
+        return queryset(
+            'annotated', Event.objects.with_annotations().filter(pk__in=ids)
+        )
+
+    return [
+        ('events.list', lambda: labeled(list_queries({}))),
+        ('events.list.status',
+         lambda: labeled(list_queries({'status': 'upcoming'}))),
+        ('events.list.page_events', page_events),
+        ('events.due_for_completion', lambda: queryset(
+            'ids', Event.objects.filter(
+                status='upcoming',
+                start_time__lte=timezone.now() - COMPLETION_DELAY
+            ).order_by('start_time').values_list('id', flat=True)[
+                :settings.EVENT_STATUS_BATCH_SIZE
+            ]
+        )),
+        ('events.next_upcoming', lambda: queryset(
+            'first', Event.objects.filter(status='upcoming').order_by(
+                'start_time'
+            ).values_list('start_time', flat=True)[:1]
+        )),
+    ]
+
+
+def scans(node):
+    """Scan nodes of a plan, outermost first"""
+    result = []
+    if 'Relation Name' in node:
+        scan = f"{node['Node Type']} on {node['Relation Name']}"
+        if 'Index Name' in node:
+            scan += f" using {node['Index Name']}"
+        result.append(scan)
+    for child in node.get('Plans', ()):
+        result += scans(child)
+    return result
+
+
+def explain(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}',
+                       params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]['Plan']
+    return {
+        'ms': round(plan[0]['Execution Time'], 3),
+        'buffers': root.get('Shared Hit Blocks', 0)
+        + root.get('Shared Read Blocks', 0),
+        'scans': scans(root),
+    }
+
+
+def run(only):
+    from django.db import connection, transaction
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE events_event, events_reservation')
+
+    results = {}
+    for name, queries in scenarios():
+        if only and not name.startswith(only):
+            continue
+        for label, query_connection, sql, params in queries():
+            # The first run warms the cache for both
+            explain(query_connection, sql, params)
+            with_indexes = explain(query_connection, sql, params)
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for index in INDEXES:
+                        cursor.execute(f'DROP INDEX {index}')
+                without_indexes = explain(query_connection, sql, params)
+                transaction.set_rollback(True)
+            results[f'{name} {label}'] = {
+                'with': with_indexes, 'without': without_indexes,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--only', help='run queries with this prefix, '
+                                       'e.g. events.list')
+    parser.add_argument('--json', action='store_true',
+                        help='print machine-readable results')
+    args = parser.parse_args()
+
+    setup_django()
+    results = run(args.only)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for query, variants in results.items():
+        print(query)
+        for variant in ('with', 'without'):
+            plan = variants[variant]
+            print(f'  {variant + " indexes":<16}{plan["ms"]:>10}ms'
+                  f'{plan["buffers"]:>8} buffers  '
+                  + ', '.join(plan['scans']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Helpers shared by benchmark scripts"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+import httpx
+
+STARTUP_TIMEOUT = 30
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_calendar.settings')
+    import django
+    django.setup()
+
+
+def percentile(values, q):
+    """Returns q-th percentile (0-100) of values, nearest rank"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies):
+    """Latency stats in milliseconds"""
+    return {
+        'requests': len(latencies),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def wsgi_request(application, method, path, headers=None, body=b''):
+    """
+    Runs a request through the WSGI application the way a WSGI server
+    does, including request_started/request_finished signals.
+    Returns (status code, response body, elapsed seconds).
+    """
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_LENGTH': str(len(body)),
+        'CONTENT_TYPE': 'application/json',
+        'wsgi.input': BytesIO(body),
+    }
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    setup_testing_defaults(environ)
+
+    response_status = []
+
+    def start_response(status, response_headers, exc_info=None):
+        response_status.append(int(status.split()[0]))
+
+    started = time.perf_counter()
+    result = application(environ, start_response)
+    try:
+        content = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    elapsed = time.perf_counter() - started
+    return response_status[0], content, elapsed
+
+
+def start_server(application, worker_class, port, workers, env=None):
+    """Starts gunicorn and waits until it answers requests"""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', application,
+         '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+         '--worker-class', worker_class, '--log-level', 'warning'],
+        env=env
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/api/tags/')
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f'{application} did not start on port {port}')
@@ -11,6 +11,9 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from event_calendar.tracing import setup_tracing
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_calendar.settings')
 
 application = get_asgi_application()
+setup_tracing('asgi')
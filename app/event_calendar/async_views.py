@@ -0,0 +1,101 @@
+"""
+Helpers for read-only async API views served under ASGI.
+
+Filtering is delegated to the DRF viewset of the sync endpoint, so both
+return the same results. Querysets are evaluated with the async ORM and
+rendered with DRF serializers and pagination format, serializers run in
+a thread since they may use the cache and the database synchronously.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, \
+    replace_query_param
+
+
+def render(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status,
+                        content_type='application/json')
+
+
+def async_api_view(view):
+    """Allows GET only and renders DRF API exceptions as JSON"""
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except APIException as e:
+            return render({'detail': e.detail}
+                          if isinstance(e.detail, str) else e.detail,
+                          status=e.status_code)
+    return wrapper
+
+
+@sync_to_async
+def filter_queryset(viewset_class, request, action='list'):
+    """
+    Returns unevaluated queryset of the viewset filtered by request params.
+    Runs in a thread since filter validation may query the database.
+    """
+    view = viewset_class(request=Request(request), action=action,
+                         format_kwarg=None, args=(), kwargs={})
+    return view.filter_queryset(view.get_queryset())
+
+
+@sync_to_async
+def serialize(serializer_class, instance, **kwargs):
+    """
+    Returns serializer_class(instance, **kwargs).data, in a thread since
+    serializers may use the cache and the database synchronously
+    """
+    return serializer_class(instance, **kwargs).data
+
+
+async def get_object(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise NotFound(f'No {queryset.model._meta.object_name} '
+                       f'matches the given query.')
+
+
+async def paginate(request, queryset, serializer_class):
+    """Returns a page of serialized objects in PageNumberPagination format"""
+    page_size = api_settings.DEFAULT_PAGINATION_CLASS().get_page_size(
+        Request(request)
+    )
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        raise NotFound('Invalid page.')
+
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    if page < 1 or (offset and offset >= count):
+        raise NotFound('Invalid page.')
+
+    objects = [obj async for obj in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    next_url = previous_url = None
+    if offset + page_size < count:
+        next_url = replace_query_param(url, 'page', page + 1)
+    if page == 2:
+        previous_url = remove_query_param(url, 'page')
+    elif page > 2:
+        previous_url = replace_query_param(url, 'page', page - 1)
+
+    return {
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': await serialize(serializer_class, objects, many=True,
+                                   context={'request': request}),
+    }
@@ -0,0 +1,180 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, \
+    InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from event_calendar.cache import TieredCache
+
+# Fields of users kept in the cache, other fields load when accessed
+CACHED_USER_FIELDS = ('is_active', 'is_staff')
+
+auth_user_cache = TieredCache(
+    'auth-user-fields',
+    timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+    local_timeout=settings.AUTH_USER_LOCAL_CACHE_TIMEOUT
+)
+
+
+def get_raw_token(request, allow_query=False):
+    """
+    Returns JWT from the Authorization header, or from the `token` query
+    param if allow_query is set. Query param is only for the views of
+    clients like EventSource that can't set headers, tokens in URLs end
+    up in access logs.
+    """
+    header = request.headers.get('Authorization', '')
+    prefix, _, raw_token = header.partition(' ')
+    if prefix in api_settings.AUTH_HEADER_TYPES and raw_token:
+        return raw_token
+    return request.GET.get('token') if allow_query else None
+
+
+def get_token_user_id(request):
+    """
+    Returns user id from the request's JWT without loading the user,
+    or None if there is no valid token.
+    """
+    raw_token = get_raw_token(request)
+    if not raw_token:
+        return None
+    try:
+        return AccessToken(raw_token)[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+
+def get_token_user(raw_token):
+    """
+    Returns the user of a JWT after the checks of CachedJWTAuthentication,
+    or None if the token or its user isn't valid.
+    """
+    authentication = CachedJWTAuthentication()
+    try:
+        return authentication.get_user(
+            authentication.get_validated_token(raw_token)
+        )
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def aget_user_id(request, allow_query_token=False):
+    """
+    Resolves authenticated user id for async views from a JWT
+    or the session. Returns None for anonymous requests and for
+    tokens of missing, inactive or revoked users.
+    """
+    raw_token = get_raw_token(request, allow_query_token)
+    if raw_token:
+        user = await sync_to_async(get_token_user)(raw_token)
+        return user.pk if user is not None else None
+
+    user = await request.auser()
+    return user.pk if user.is_authenticated else None
+
+
+def load_user_fields(user_id):
+    """
+    CACHED_USER_FIELDS and the primary key of a user and a digest of the
+    password for the revoked token check, or None if there is no user.
+    Password hashes don't go to the cache.
+    """
+    user_model = get_user_model()
+    fields = user_model.objects.filter(
+        **{api_settings.USER_ID_FIELD: user_id}
+    ).values(user_model._meta.pk.attname, 'password',
+             *CACHED_USER_FIELDS).first()
+    if fields is not None:
+        fields['password'] = get_md5_hash_password(fields['password'])
+    return fields
+
+
+def get_cached_user_fields(user_id):
+    return auth_user_cache.get_or_set(
+        user_id, lambda: load_user_fields(user_id)
+    )
+
+
+def build_user(fields):
+    """
+    User with the cached fields set and the others deferred, they are
+    loaded from the database on first access.
+    """
+    user_model = get_user_model()
+    names = [field.attname for field in user_model._meta.concrete_fields
+             if field.attname in fields and field.attname != 'password']
+    return user_model.from_db(None, names, [fields[name] for name in names])
+
+
+def get_cached_user(user_id):
+    """
+    Returns user by id built from the two-tier cache or loaded from the
+    database, or None if the user doesn't exist. Each caller gets its
+    own instance.
+    """
+    fields = get_cached_user_fields(user_id)
+    return build_user(fields) if fields is not None else None
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drops the cached fields of a user. Saving and deleting users does it,
+    call it after changing users with QuerySet.update() or raw SQL.
+    """
+    auth_user_cache.delete(user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_saved_user(sender, instance, **kwargs):
+    """Password and activity changes apply to the next request"""
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return
+    invalidate_cached_user(instance.pk)
+    # Again after commit, a concurrent request may have cached the old row
+    transaction.on_commit(lambda: invalidate_cached_user(instance.pk))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves users from cache instead of loading
+    the row on every request. Cached users are invalidated when saved or
+    deleted, and go through the same active and revoked token checks.
+    Only the fields these checks need are cached, see load_user_fields.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+
+        fields = get_cached_user_fields(user_id)
+        if fields is None:
+            raise AuthenticationFailed(_('User not found'),
+                                       code='user_not_found')
+
+        user = build_user(fields)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != fields['password']:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."),
+                    code='password_changed'
+                )
+
+        return user
@@ -0,0 +1,254 @@
+"""
+Two-tier cache: a bounded in-process LRU with TTL in front of the shared
+Redis cache.
+
+Reads are served from process memory when possible. Invalidations delete
+the shared entry and are broadcast over Redis pub/sub, so every process
+drops its local copy. If the broadcast is missed, local entries still
+expire after their timeout.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+from event_calendar.instrumentation import record_cache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+RECONNECT_DELAY = 1
+GENERATION_KEY = '__generation__'
+MISSING = object()
+
+# Caches of this process by namespace
+_caches = {}
+_publisher = None
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+class TieredCache:
+    """
+    Namespaced cache with process-local and shared tiers. Values must be
+    picklable. Local values are shared by all threads of the process and
+    must not be modified.
+    """
+    def __init__(self, namespace, timeout=None, local_timeout=None,
+                 local_size=None):
+        self.namespace = namespace
+        self.timeout = timeout or settings.TIERED_CACHE_TIMEOUT
+        self.local_timeout = (local_timeout
+                              or settings.TIERED_CACHE_LOCAL_TIMEOUT)
+        self.local_size = local_size or settings.TIERED_CACHE_LOCAL_SIZE
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+        _caches[namespace] = self
+
+    def get(self, key, default=None):
+        _ensure_listener()
+        value = self._get_local(key)
+        if value is not MISSING:
+            self._count('local_hits')
+            return value
+
+        value = cache.get(self._shared_key(key), MISSING)
+        if value is MISSING:
+            self._count('misses')
+            return default
+        self._count('shared_hits')
+        self._set_local(key, value)
+        return value
+
+    def get_many(self, keys):
+        """Returns dict of the keys that are cached"""
+        _ensure_listener()
+        found = {}
+        for key in keys:
+            value = self._get_local(key)
+            if value is not MISSING:
+                found[key] = value
+        self._count('local_hits', len(found))
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared_keys = {self._shared_key(key): key for key in missing}
+            shared = cache.get_many(shared_keys)
+            for shared_key, value in shared.items():
+                found[shared_keys[shared_key]] = value
+                self._set_local(shared_keys[shared_key], value)
+            self._count('shared_hits', len(shared))
+            self._count('misses', len(missing) - len(shared))
+        return found
+
+    def get_or_set(self, key, default):
+        """
+        Returns cached value or caches and returns default(). None from
+        default() is returned but not cached.
+        """
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = default()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        cache.set(self._shared_key(key), value, self.timeout)
+        self._set_local(key, value)
+
+    def set_many(self, mapping):
+        cache.set_many({self._shared_key(key): value
+                        for key, value in mapping.items()}, self.timeout)
+        for key, value in mapping.items():
+            self._set_local(key, value)
+
+    def delete(self, *keys):
+        """Drops keys here, in Redis and in the other processes"""
+        cache.delete_many([self._shared_key(key) for key in keys])
+        self.delete_local(keys)
+        _broadcast(self.namespace, list(keys))
+
+    def clear(self):
+        """Drops all keys of the namespace everywhere"""
+        # Shared entries of the old generation are left to expire
+        cache.set(self._generation_key(), time.time_ns(), None)
+        self.clear_local()
+        _broadcast(self.namespace, None)
+
+    def delete_local(self, keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, local_size=len(self._local))
+        requests = stats['local_hits'] + stats['shared_hits'] + \
+            stats['misses']
+        stats['hit_ratio'] = round(
+            (stats['local_hits'] + stats['shared_hits']) / requests, 3
+        ) if requests else None
+        return stats
+
+    def _generation_key(self):
+        return f'tiered:{self.namespace}:generation'
+
+    def _shared_key(self, key):
+        generation = self._get_local(GENERATION_KEY)
+        if generation is MISSING:
+            generation = cache.get(self._generation_key(), 0)
+            self._set_local(GENERATION_KEY, generation)
+        return f'tiered:{self.namespace}:{generation}:{key}'
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return MISSING
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_timeout,
+                                value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+        if name == 'misses':
+            record_cache(misses=value)
+        else:
+            record_cache(hits=value)
+
+
+def cache_stats():
+    """Hit/miss stats of this process's caches by namespace"""
+    return {namespace: tiered_cache.stats()
+            for namespace, tiered_cache in _caches.items()}
+
+
+def clear_local_caches():
+    for tiered_cache in _caches.values():
+        tiered_cache.clear_local()
+
+
+def _get_publisher():
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.REDIS_URL)
+    return _publisher
+
+
+def _broadcast(namespace, keys):
+    if not settings.TIERED_CACHE_BROADCAST:
+        return
+    try:
+        _get_publisher().publish(
+            INVALIDATION_CHANNEL,
+            json.dumps({'namespace': namespace, 'keys': keys})
+        )
+    except redis.RedisError as e:
+        logger.warning('Failed to broadcast cache invalidation: %s', e)
+
+
+def apply_invalidation(message):
+    tiered_cache = _caches.get(message['namespace'])
+    if tiered_cache is None:
+        return
+    if message['keys'] is None:
+        tiered_cache.clear_local()
+    else:
+        tiered_cache.delete_local(message['keys'])
+
+
+def _listen():
+    while True:
+        try:
+            client = redis.Redis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            for message in pubsub.listen():
+                apply_invalidation(json.loads(message['data']))
+        except (redis.RedisError, OSError) as e:
+            logger.warning('Cache invalidation subscription lost: %s', e)
+            # Invalidations may have been missed while disconnected
+            clear_local_caches()
+            time.sleep(RECONNECT_DELAY)
+
+
+def _ensure_listener():
+    """Starts invalidation listener thread once per process"""
+    global _listener, _listener_pid
+    if not settings.TIERED_CACHE_BROADCAST:
+        return
+    pid = os.getpid()
+    if _listener_pid == pid and _listener.is_alive():
+        return
+    with _listener_lock:
+        if _listener_pid == pid and _listener.is_alive():
+            return
+        _listener = threading.Thread(target=_listen, daemon=True,
+                                     name='cache-invalidation')
+        _listener.start()
+        _listener_pid = pid
@@ -0,0 +1,78 @@
+"""
+Conditional GET helpers. Validators come from version stamps rather than
+the response body, so unchanged resources are answered with 304 before
+the main query runs.
+"""
+import hashlib
+import time
+
+from django.utils.http import http_date, parse_etags, \
+    parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+NS_PER_SECOND = 10 ** 9
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(
+        repr(parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def last_modified(version):
+    """
+    Whole-second Last-Modified for a nanosecond version stamp. It is
+    never later than now, so changes made after the version was read
+    compare as modified.
+    """
+    return min(version // NS_PER_SECOND + 1, int(time.time()))
+
+
+def is_not_modified(request, etag, version=None):
+    """
+    Checks If-None-Match, or If-Modified-Since when there is no
+    If-None-Match and the version stamp is given.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+
+    if_modified_since = parse_http_date_safe(
+        request.headers.get('If-Modified-Since', '')
+    )
+    return (version is not None and if_modified_since is not None
+            and version < if_modified_since * NS_PER_SECOND)
+
+
+def set_validators(response, etag, version=None):
+    response['ETag'] = etag
+    if version is not None:
+        response['Last-Modified'] = http_date(last_modified(version))
+    return response
+
+
+def not_modified(etag, version=None):
+    return set_validators(
+        Response(status=status.HTTP_304_NOT_MODIFIED), etag, version
+    )
+
+
+def conditional_get(request, version, respond, *etag_parts):
+    """
+    Returns 304 if the client has the current version, otherwise the
+    response of respond() with validators set. ETag covers the request
+    path and etag_parts besides the version. Without a version the
+    response is returned as is.
+    """
+    if version is None:
+        return respond()
+    etag = make_etag(version, request.get_full_path(), *etag_parts)
+    if is_not_modified(request, etag, version):
+        return not_modified(etag, version)
+    response = respond()
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    return set_validators(response, etag, version)
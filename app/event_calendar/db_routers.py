@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def set_replica_reads(enabled):
+    """Routes reads of the current context to the replica while enabled"""
+    return _replica_reads.set(enabled)
+
+
+def reset_replica_reads(token):
+    """Restores the routing set_replica_reads returned token for"""
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    token = set_replica_reads(enabled)
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica when the current request or task allows it
+    and the replica is configured. Writes, reads inside transactions and
+    everything else go to the primary.
+    """
+    replica = 'replica'
+    primary = 'default'
+
+    def db_for_read(self, model, **hints):
+        if (settings.DB_REPLICA_ENABLED and _replica_reads.get()
+                and not connections[self.primary].in_atomic_block):
+            return self.replica
+        return self.primary
+
+    def db_for_write(self, model, **hints):
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replica holds the same data as primary
+        return True
@@ -0,0 +1,102 @@
+"""
+Per-request metrics: query count and time, tiered cache hits and misses,
+serializer time. Only sampled requests collect them, see
+ServerTimingMiddleware. Outside of a sampled request every hook is a
+single context variable lookup.
+"""
+import time
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_time = 0
+        self.serializing = False
+
+    def as_dict(self):
+        return {
+            'duration_ms': round(
+                (time.perf_counter() - self.started) * 1000, 3
+            ),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'serializer_ms': round(self.serializer_time * 1000, 3),
+        }
+
+
+def current_metrics():
+    """Metrics of the sampled request being handled, otherwise None"""
+    return _metrics.get()
+
+
+def start_metrics():
+    metrics = RequestMetrics()
+    return metrics, _metrics.set(metrics)
+
+
+def stop_metrics(token):
+    _metrics.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorders():
+    """
+    Records queries of connections of all threads. Connections opened
+    later get the recorder from the connection_created signal.
+    """
+    connection_created.connect(install_query_recorder)
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection)
+
+
+def record_cache(hits=0, misses=0):
+    metrics = _metrics.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+class TimedSerializerMixin:
+    """
+    Adds time spent in to_representation to the request metrics. Nested
+    serializers are counted as part of the outermost one.
+    """
+    def to_representation(self, instance):
+        metrics = _metrics.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializing = False
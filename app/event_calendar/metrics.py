@@ -0,0 +1,116 @@
+"""
+Prometheus metrics of the web processes and Celery workers.
+
+Gunicorn workers and prefork children are separate processes. With
+PROMETHEUS_MULTIPROC_DIR set each of them writes its values to files in
+that directory, and a scrape of any process aggregates all of them.
+The directory has to be emptied when the server starts, see
+gunicorn.conf.py and notifications.celery_main.
+"""
+import logging
+import os
+import shutil
+
+from django.db import connections
+from kombu.exceptions import ChannelError
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, \
+    Histogram, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latency of HTTP requests',
+    ['view', 'method', 'status']
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections', 'Connections of the DB pools by state',
+    ['database', 'state'], multiprocess_mode='livesum'
+)
+DB_POOL_WAITING = Gauge(
+    'db_pool_requests_waiting', 'Requests waiting for a pooled connection',
+    ['database'], multiprocess_mode='livesum'
+)
+TASK_DURATION = Histogram(
+    'celery_task_duration_seconds', 'Run time of Celery tasks',
+    ['task', 'state']
+)
+TASK_RETRIES = Counter(
+    'celery_task_retries', 'Retries of Celery tasks', ['task']
+)
+TASK_FAILURES = Counter(
+    'celery_task_failures', 'Failed runs of Celery tasks', ['task']
+)
+
+
+def is_multiprocess():
+    return 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+
+def scrape_registry():
+    """Registry with the values of all processes of the server"""
+    if not is_multiprocess():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def reset_multiprocess_dir():
+    """Removes the values left by processes of an earlier run"""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def mark_process_dead(pid):
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid)
+
+
+def record_pool_usage():
+    """Sets the pool gauges from the pools this process has opened"""
+    for connection in connections.all(initialized_only=True):
+        pool = getattr(connection, 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        size = stats.get('pool_size', 0)
+        available = stats.get('pool_available', 0)
+        DB_POOL_CONNECTIONS.labels(connection.alias, 'idle').set(available)
+        DB_POOL_CONNECTIONS.labels(connection.alias, 'busy').set(
+            size - available
+        )
+        DB_POOL_WAITING.labels(connection.alias).set(
+            stats.get('requests_waiting', 0)
+        )
+
+
+class QueueLengthCollector:
+    """Messages waiting in the broker queues, read on every scrape"""
+    def __init__(self, app, queues):
+        self.app = app
+        self.queues = queues
+
+    def collect(self):
+        metric = GaugeMetricFamily(
+            'celery_queue_length', 'Messages waiting in a Celery queue',
+            labels=['queue']
+        )
+        try:
+            with self.app.connection_for_read() as connection:
+                connection.ensure_connection(max_retries=1)
+                channel = connection.default_channel
+                for queue in self.queues:
+                    metric.add_metric([queue], self.length(channel, queue))
+        except Exception as e:
+            logger.warning('Failed to read Celery queue lengths: %s', e)
+        yield metric
+
+    def length(self, channel, queue):
+        try:
+            return channel.queue_declare(queue, passive=True).message_count
+        except ChannelError:
+            # Redis drops the list of a queue once it is empty
+            return 0
@@ -0,0 +1,287 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind
+
+from event_calendar.authentication import aget_user_id, get_raw_token, \
+    get_token_user_id
+from event_calendar.db_routers import replica_reads
+from event_calendar.instrumentation import install_query_recorders, \
+    start_metrics, stop_metrics
+from event_calendar.metrics import REQUEST_LATENCY, record_pool_usage
+from event_calendar.tracing import tracer
+
+timing_logger = logging.getLogger('event_calendar.server_timing')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_PIN_COOKIE = 'primary_pin'
+API_PREFIX = '/api/'
+
+
+def primary_pin_key(user_id):
+    return f'db:primary-pin:{user_id}'
+
+
+def view_name(request):
+    """URL name, for viewsets it includes the action, e.g. event-book"""
+    match = request.resolver_match
+    return match.view_name if match else 'unmatched'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes reads of safe-method requests to the replica. A client that
+    made a write is pinned to the primary for DB_REPLICA_PIN_SECONDS,
+    by cookie and by user id, so it reads its own writes.
+    Supports async views so ASGI requests don't hop to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DB_REPLICA_ENABLED:
+            return self.get_response(request)
+
+        use_replica = (request.method in SAFE_METHODS
+                       and not self.is_pinned(request))
+        with replica_reads(use_replica):
+            response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DB_REPLICA_ENABLED:
+            return await self.get_response(request)
+
+        use_replica = (request.method in SAFE_METHODS
+                       and not await self.ais_pinned(request))
+        with replica_reads(use_replica):
+            response = await self.get_response(request)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            await self.apin(request, response)
+        return response
+
+    def is_pinned(self, request):
+        if PRIMARY_PIN_COOKIE in request.COOKIES:
+            return True
+        user_id = get_token_user_id(request)
+        return user_id is not None and cache.get(primary_pin_key(user_id))
+
+    async def ais_pinned(self, request):
+        if PRIMARY_PIN_COOKIE in request.COOKIES:
+            return True
+        user_id = get_token_user_id(request)
+        return (user_id is not None
+                and await cache.aget(primary_pin_key(user_id)))
+
+    def set_pin_cookie(self, response):
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE, '1',
+            max_age=settings.DB_REPLICA_PIN_SECONDS,
+            httponly=True, samesite='Lax'
+        )
+
+    def pin(self, request, response):
+        self.set_pin_cookie(response)
+        # DRF sets the authenticated user on the underlying request
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(primary_pin_key(user.pk), True,
+                      settings.DB_REPLICA_PIN_SECONDS)
+
+    async def apin(self, request, response):
+        self.set_pin_cookie(response)
+        user_id = await aget_user_id(request)
+        if user_id is not None:
+            await cache.aset(primary_pin_key(user_id), True,
+                             settings.DB_REPLICA_PIN_SECONDS)
+
+
+class ApiSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware that leaves sessions alone for API requests
+    authenticated with a JWT. They get an empty session that is neither
+    loaded nor saved, so they don't touch the session store.
+    """
+    def uses_session(self, request):
+        return not (settings.API_JWT_SKIP_SESSION
+                    and request.path.startswith(API_PREFIX)
+                    and get_raw_token(request))
+
+    def process_request(self, request):
+        if self.uses_session(request):
+            return super().process_request(request)
+        request.session = self.SessionStore()
+
+    def process_response(self, request, response):
+        if self.uses_session(request):
+            return super().process_response(request, response)
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Collects query count and time, tiered cache hits and misses and
+    serializer time of a sample of SERVER_TIMING_SAMPLE_RATE requests.
+    They are returned in the Server-Timing header and logged as JSON,
+    as a warning when the request ran more than SERVER_TIMING_QUERY_BUDGET
+    queries. Unsampled requests only cost a random() call.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_query_recorders()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+
+        metrics, token = start_metrics()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_metrics(token)
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+
+        metrics, token = start_metrics()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_metrics(token)
+        self.report(request, response, metrics)
+        return response
+
+    def is_sampled(self):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def report(self, request, response, metrics):
+        data = metrics.as_dict()
+        over_budget = data['queries'] > settings.SERVER_TIMING_QUERY_BUDGET
+        timings = [
+            f'db;dur={data["db_ms"]};desc="{data["queries"]} queries"',
+            f'cache;desc="{data["cache_hits"]} hits, '
+            f'{data["cache_misses"]} misses"',
+            f'serializer;dur={data["serializer_ms"]}',
+            f'total;dur={data["duration_ms"]}',
+        ]
+        if over_budget:
+            timings.append(
+                f'budget;desc="over query budget of '
+                f'{settings.SERVER_TIMING_QUERY_BUDGET}"'
+            )
+        response['Server-Timing'] = ', '.join(timings)
+
+        data.update(method=request.method, path=request.path,
+                    status=response.status_code, over_budget=over_budget)
+        timing_logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            json.dumps(data), extra={'server_timing': data}
+        )
+
+
+class PrometheusMiddleware:
+    """
+    Observes the latency of every request by URL name. The DB pool
+    gauges are updated after each request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, duration):
+        REQUEST_LATENCY.labels(
+            view_name(request), request.method, response.status_code
+        ).observe(duration)
+        record_pool_usage()
+
+
+class TracingMiddleware:
+    """
+    Runs each request in a server span named after its URL name. The
+    span continues the caller's trace if it sent a traceparent header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with self.start_span(request) as span:
+            response = self.get_response(request)
+            self.finish_span(span, request, response)
+        return response
+
+    async def __acall__(self, request):
+        with self.start_span(request) as span:
+            response = await self.get_response(request)
+            self.finish_span(span, request, response)
+        return response
+
+    def start_span(self, request):
+        return tracer.start_as_current_span(
+            request.method, context=propagate.extract(request.headers),
+            kind=SpanKind.SERVER,
+            attributes={'http.request.method': request.method,
+                        'url.path': request.path}
+        )
+
+    def finish_span(self, span, request, response):
+        span.update_name(f'{request.method} {view_name(request)}')
+        span.set_attribute('http.response.status_code',
+                           response.status_code)
@@ -0,0 +1,7 @@
+from rest_framework import pagination
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """Page number pagination that lets clients pick a page size"""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
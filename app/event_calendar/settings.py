@@ -34,14 +34,21 @@ DEBUG = os.getenv('DEBUG', 'False').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = ['web', 'localhost', '127.0.0.1', 'localhost:8000']
 
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Sessions are read from Redis and written through to the database
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
 SESSION_COOKIE_NAME = "sessionid"
 SESSION_COOKIE_AGE = 1209600
 SESSION_COOKIE_SECURE = False
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Lax'
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False
+# API requests with a JWT skip loading and saving the session
+API_JWT_SKIP_SESSION = os.getenv(
+    'API_JWT_SKIP_SESSION', 'True'
+).lower() in ('1', 'true', 'yes')
 SESSION_COOKIE_DOMAIN = 'localhost'
 CSRF_COOKIE_DOMAIN = 'localhost'
 
@@ -68,14 +75,20 @@ INSTALLED_APPS = [
     'django_filters',
     'events.apps.EventsConfig',
     'notifications.apps.NotificationsConfig',
+    'profiling.apps.ProfilingConfig',
 ]
 
 MIDDLEWARE = [
+    'event_calendar.middleware.TracingMiddleware',
+    'event_calendar.middleware.PrometheusMiddleware',
+    'event_calendar.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'event_calendar.middleware.ApiSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'profiling.middleware.ProfilingMiddleware',
+    'event_calendar.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -104,15 +117,66 @@ ASGI_APPLICATION = 'event_calendar.asgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DB_CONN_MODE sets how connections are reused across requests and tasks:
+# 'pool' - per-process psycopg pool, sized separately for web and Celery
+# 'persistent' - one connection per thread kept for DB_CONN_MAX_AGE seconds
+# 'none' - new connection for every request and task
+DB_CONN_MODE = os.getenv('DB_CONN_MODE', 'pool')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'django.db.backends.postgresql',
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
-        'CONN_MAX_AGE': 0
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+}
+
+if DB_CONN_MODE == 'pool':
+    # CONN_HEALTH_CHECKS makes the pool check connections before handing
+    # them out
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 600)),
+    }
+elif DB_CONN_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.getenv('DB_CONN_MAX_AGE', 60)
+    )
+
+# Read replica for safe-method API reads and read-only Celery tasks.
+# Without DB_REPLICA_HOST the alias points at the primary and is unused.
+DB_REPLICA_ENABLED = bool(os.getenv('DB_REPLICA_HOST'))
+# Clients stay on the primary for this long after a write
+DB_REPLICA_PIN_SECONDS = 5
+
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+    'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+    'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+    'TEST': {'NAME': f'test_{DATABASES["default"]["NAME"]}_replica'},
+}
+
+DATABASE_ROUTERS = ['event_calendar.db_routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/1',
     }
 }
 
@@ -163,11 +227,12 @@ MEDIA_ROOT = '/app/media'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS':
+        'event_calendar.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'event_calendar.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -180,6 +245,64 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Two-tier cache (event_calendar.cache): entries are kept in each process
+# for up to TIERED_CACHE_LOCAL_TIMEOUT and in Redis for TIERED_CACHE_TIMEOUT,
+# invalidations are broadcast to all processes over Redis pub/sub
+TIERED_CACHE_BROADCAST = os.getenv(
+    'TIERED_CACHE_BROADCAST', 'True'
+).lower() in ('1', 'true', 'yes')
+TIERED_CACHE_TIMEOUT = 300
+TIERED_CACHE_LOCAL_TIMEOUT = 30
+TIERED_CACHE_LOCAL_SIZE = 1000
+# Version stamps of cached objects (event_calendar.versions) expire when
+# not bumped for this long, ids of missing objects don't pile up
+VERSION_STAMP_TIMEOUT = 7 * 24 * 3600
+# Activity, staff flag and password digest of users of authenticated
+# requests, kept locally for less time in case an invalidation broadcast
+# is missed. Changes with QuerySet.update() need invalidate_cached_user
+AUTH_USER_CACHE_TIMEOUT = 300
+AUTH_USER_LOCAL_CACHE_TIMEOUT = 5
+
+# Share of requests whose query count and time, cache hits and misses and
+# serializer time are returned in the Server-Timing header and logged,
+# 0 turns instrumentation off
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', 0))
+# Sampled requests running more queries are logged as warnings
+SERVER_TIMING_QUERY_BUDGET = int(os.getenv('SERVER_TIMING_QUERY_BUDGET', 30))
+
+# Staff users can profile a request with the X-Profile header or the
+# profile query param, see profiling.middleware
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True').lower() in \
+    ('1', 'true', 'yes')
+# Seconds between the stacks recorded by the sampling profiler
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))
+# Share of runs profiled by task name, e.g.
+# PROFILE_TASKS=events.tasks.update_event_statuses=0.1,...
+PROFILE_TASKS = {
+    name: float(rate)
+    for name, rate in (
+        item.split('=') for item in
+        os.getenv('PROFILE_TASKS', '').split(',') if item
+    )
+}
+# 'sample' or 'cprofile'
+PROFILE_TASK_MODE = os.getenv('PROFILE_TASK_MODE', 'sample')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'event_calendar.server_timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 JWT_AUTH = {
     'JWT_EXPIRATION_DELTA': timedelta(minutes=60),
     'JWT_ALLOW_REFRESH': True,
@@ -211,22 +334,83 @@ SPECTACULAR_SETTINGS = {
     'TAGS_SORTER': custom_operations_sorter,
 }
 
+# Events completed per transaction by update_event_statuses
+EVENT_STATUS_BATCH_SIZE = 500
+# Saving an upcoming event schedules a status update for when it is due
+EVENT_STATUS_SCHEDULE_ON_SAVE = True
+# Farthest ahead a status update is scheduled, each run schedules the
+# next. The Redis broker redelivers unacked ETA tasks after its
+# visibility timeout (1 hour), which would run them more than once
+EVENT_STATUS_MAX_ETA = timedelta(minutes=30)
+# Most events whose seats can be polled in one availability request
+EVENT_AVAILABILITY_MAX_IDS = 500
+# Most values returned per facet of the event list
+EVENT_FACET_LIMIT = 20
+
+# Notifications of these types are merged per recipient into one digest
+# when created within NOTIFICATION_DIGEST_WINDOW of each other
+NOTIFICATION_DIGEST_TYPES = ['reminder']
+NOTIFICATION_DIGEST_WINDOW = timedelta(minutes=15)
+# How long an unread notifications count cached for one list version lives
+NOTIFICATION_UNREAD_COUNT_TIMEOUT = 3600
+# Server-Sent Events push channel, served by the ASGI app
+NOTIFICATION_STREAM_ENABLED = os.getenv(
+    'NOTIFICATION_STREAM_ENABLED', 'True'
+).lower() in ('1', 'true', 'yes')
+NOTIFICATION_STREAM_HEARTBEAT = 15
+NOTIFICATION_STREAM_RETRY = 3
+# Notifications older than their type's retention period are purged daily
+NOTIFICATION_RETENTION = {
+    'booking': timedelta(days=365),
+    'cancellation': timedelta(days=365),
+    'reminder': timedelta(days=30),
+    'event_update': timedelta(days=90),
+    'rating_prompt': timedelta(days=30),
+}
+NOTIFICATION_RETENTION_DEFAULT = timedelta(days=180)
+NOTIFICATION_PURGE_BATCH_SIZE = 1000
+
+# Address of the gRPC notification service
+GRPC_NOTIFICATION_TARGET = os.getenv('GRPC_NOTIFICATION_TARGET', 'grpc:50051')
+
 CELERY_BROKER_URL = 'redis://redis:6379/0'
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Runs tasks in the calling process, for local load tests without workers
+if os.getenv('CELERY_TASK_ALWAYS_EAGER', '').lower() in ('1', 'true', 'yes'):
+    CELERY_TASK_ALWAYS_EAGER = True
+
+# Where spans of requests, tasks and gRPC calls are exported: 'console'
+# or a file path for JSON lines, empty disables tracing
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', '')
+
+# Scrapers send it as a bearer token to /metrics, which is denied to
+# everyone while it is empty
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Celery workers serve their metrics on this port, 0 disables it
+METRICS_WORKER_PORT = int(os.getenv('METRICS_WORKER_PORT', 0))
+# Broker queues whose length the workers report
+METRICS_CELERY_QUEUES = ['high_priority', 'default']
 
 CELERY_BEAT_SCHEDULE = {
+    # Runs are scheduled for when events become due,
+    # this periodic run only restores the schedule if it was lost
     'update-event-statuses': {
         'task': 'events.tasks.update_event_statuses',
-        'schedule': crontab(hour='*/3'),
+        'schedule': crontab(minute=0),
         'options': {'queue': 'default'},
     },
     'send-event-reminders': {
         'task': 'events.tasks.send_event_reminders',
         'schedule': crontab(minute='*/15'),
         'options': {'queue': 'high_priority'},
-    }
+    },
+    'purge-expired-notifications': {
+        'task': 'notifications.tasks.purge_expired_notifications',
+        'schedule': crontab(minute=0, hour=3),
+        'options': {'queue': 'default'},
+    },
 }
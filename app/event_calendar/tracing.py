@@ -0,0 +1,96 @@
+"""
+Traces a request through Celery to the notification service. Spans of
+one booking share a trace id:
+
+    POST event-book                       TracingMiddleware
+      celery.publish <task>               the enqueue
+        celery.queue <task>               time spent in the broker
+        celery.run <task>                 the task itself
+          grpc /.../SendNotification      client call, and the server
+                                          span in the gRPC service
+
+Eager tasks are not published and run directly under the request span.
+Exporting is configured by TRACING_EXPORTER, see grpc_server.tracing.
+"""
+import time
+
+from django.conf import settings
+from opentelemetry import context, propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from grpc_server.tracing import configure_tracing
+
+tracer = trace.get_tracer(__name__)
+
+PUBLISHED_HEADER = 'trace_published_ns'
+
+# Open spans by task id, the context token is set for running tasks
+_publish_spans = {}
+_task_spans = {}
+
+
+def setup_tracing(service_name):
+    return configure_tracing(service_name, settings.TRACING_EXPORTER)
+
+
+def start_publish_span(task_name, headers):
+    """Starts the enqueue span and adds its context to the task headers"""
+    span = tracer.start_span(f'celery.publish {task_name}',
+                             kind=SpanKind.PRODUCER)
+    propagate.inject(headers, context=trace.set_span_in_context(span))
+    headers[PUBLISHED_HEADER] = time.time_ns()
+    _publish_spans[headers.get('id')] = span
+
+
+def end_publish_span(headers):
+    span = _publish_spans.pop(headers.get('id'), None)
+    if span is not None:
+        span.end()
+
+
+class RequestGetter:
+    """Reads the trace headers from a task request"""
+    def get(self, carrier, key):
+        value = carrier.get(key)
+        return None if value is None else [value]
+
+    def keys(self, carrier):
+        return []
+
+
+def start_task_span(task, task_id):
+    """
+    Starts the span of a task run as a child of its publish span. The
+    time between publishing and the start is recorded as its own span.
+    """
+    parent = propagate.extract(task.request, getter=RequestGetter()) \
+        if task.request.get('traceparent') else None
+    published = task.request.get(PUBLISHED_HEADER)
+    if published:
+        tracer.start_span(
+            f'celery.queue {task.name}', context=parent,
+            start_time=published
+        ).end()
+
+    span = tracer.start_span(
+        f'celery.run {task.name}', context=parent, kind=SpanKind.CONSUMER,
+        attributes={'celery.task_id': task_id}
+    )
+    token = context.attach(trace.set_span_in_context(span))
+    _task_spans[task_id] = (span, token)
+
+
+def end_task_span(task_id, state):
+    span, token = _task_spans.pop(task_id, (None, None))
+    if span is None:
+        return
+    context.detach(token)
+    span.set_attribute('celery.state', state or '')
+    span.end()
+
+
+def record_task_exception(task_id, exception):
+    span, _ = _task_spans.get(task_id, (None, None))
+    if span is not None:
+        span.record_exception(exception)
+        span.set_status(Status(StatusCode.ERROR))
@@ -5,6 +5,7 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework_simplejwt.views import TokenObtainPairView, \
     TokenRefreshView, TokenVerifyView
 
+from event_calendar.views import CacheStatsView, metrics
 from events.views import UserLoginView, UserRegisterView
 
 urlpatterns = [
@@ -19,6 +20,9 @@ urlpatterns = [
     path('api/user/register', UserRegisterView.as_view(),
          name='user_register'),
 
+    path('api/cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
+    path('metrics', metrics, name='metrics'),
+
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'),
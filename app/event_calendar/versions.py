@@ -0,0 +1,72 @@
+"""
+Version stamps of cached objects, kept in Redis.
+
+A version changes whenever the object, or anything serialized with it,
+changes. Caches key entries by version, so a bump makes old entries
+unreachable without deleting them. Versions are nanosecond timestamps,
+so a version that expired or was evicted from Redis is recreated newer
+than any entry cached before.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def version_key(name, object_id):
+    return f'version:{name}:{object_id}'
+
+
+def get_versions(name, object_ids):
+    """Returns {object id: version}, creating missing versions"""
+    keys = {version_key(name, object_id): object_id
+            for object_id in object_ids}
+    versions = {keys[key]: version
+                for key, version in cache.get_many(keys).items()}
+
+    missing = {key: time.time_ns() for key, object_id in keys.items()
+               if object_id not in versions}
+    if missing:
+        cache.set_many(missing, settings.VERSION_STAMP_TIMEOUT)
+        versions.update({keys[key]: version
+                         for key, version in missing.items()})
+    return versions
+
+
+def get_version(name, object_id):
+    return get_versions(name, [object_id])[object_id]
+
+
+def get_existing_version(name, object_id, exists):
+    """
+    Returns the version of an object, or None if there is none and
+    exists() is false. Versions of ids that don't exist aren't created.
+    """
+    version = cache.get(version_key(name, object_id))
+    if version is not None:
+        return version
+    return get_version(name, object_id) if exists() else None
+
+
+def get_existing_versions(name, object_ids, existing):
+    """
+    Returns {object id: version} of the objects that have a version or
+    are among existing(ids without a version). Versions of ids that
+    don't exist aren't created.
+    """
+    keys = {version_key(name, object_id): object_id
+            for object_id in object_ids}
+    versions = {keys[key]: version
+                for key, version in cache.get_many(keys).items()}
+    missing = [object_id for object_id in object_ids
+               if object_id not in versions]
+    if missing:
+        versions.update(get_versions(name, existing(missing)))
+    return versions
+
+
+def bump_versions(name, object_ids):
+    version = time.time_ns()
+    cache.set_many({version_key(name, object_id): version
+                    for object_id in object_ids},
+                   settings.VERSION_STAMP_TIMEOUT)
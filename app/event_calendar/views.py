@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from event_calendar.cache import cache_stats
+from event_calendar.metrics import scrape_registry
+
+
+class CacheStatsView(APIView):
+    """
+    Hit/miss stats of the two-tier caches in the process that serves
+    the request.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+
+def metrics(request):
+    """
+    Prometheus metrics of all processes of this server. The port of the
+    server may be published, so scrapers authenticate with METRICS_TOKEN.
+    """
+    authorization = request.headers.get('Authorization', '')
+    if not settings.METRICS_TOKEN or not constant_time_compare(
+            authorization, f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(scrape_registry()),
+                        content_type=CONTENT_TYPE_LATEST)
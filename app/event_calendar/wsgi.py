@@ -11,6 +11,9 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from event_calendar.tracing import setup_tracing
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_calendar.settings')
 
 application = get_wsgi_application()
+setup_tracing('web')
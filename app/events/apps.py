@@ -7,3 +7,5 @@ class EventsConfig(AppConfig):
 
     def ready(self):
         import events.signals  # noqa
+        # Connects the invalidation of cached users of any process
+        import event_calendar.authentication  # noqa
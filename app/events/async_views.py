@@ -0,0 +1,26 @@
+from event_calendar.async_views import async_api_view, filter_queryset, \
+    get_object, paginate, render, serialize
+from events.serializers import EventSerializer, TagSerializer
+from events.views import EventViewSet, TagViewSet
+
+
+@async_api_view
+async def event_list(request):
+    """Async variant of GET /api/events/ with the same filters"""
+    queryset = await filter_queryset(EventViewSet, request)
+    return render(await paginate(request, queryset, EventSerializer))
+
+
+@async_api_view
+async def event_detail(request, pk):
+    """Async variant of GET /api/events/<pk>/"""
+    queryset = await filter_queryset(EventViewSet, request, 'retrieve')
+    event = await get_object(queryset, pk=pk)
+    return render(await serialize(EventSerializer, event))
+
+
+@async_api_view
+async def tag_list(request):
+    """Async variant of GET /api/tags/"""
+    queryset = await filter_queryset(TagViewSet, request)
+    return render(await paginate(request, queryset, TagSerializer))
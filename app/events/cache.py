@@ -0,0 +1,83 @@
+from django.db import transaction
+
+from event_calendar.cache import TieredCache
+from event_calendar.db_routers import replica_reads
+from event_calendar.versions import bump_versions, get_versions
+from events.models import Tag
+
+# Version of everything serialized with an event: the event, its
+# organizer, tags, bookings and ratings
+EVENT_VERSION = 'event'
+# Versions of whole collections, bumped on any change of their items
+EVENT_LIST_VERSION = 'event-list'
+TAG_LIST_VERSION = 'tag-list'
+ALL = 'all'
+
+# Tags by id and tag list responses
+tag_cache = TieredCache('tags')
+# Serialized users, e.g. event organizers
+user_profile_cache = TieredCache('user-profiles')
+
+
+def get_tags(tag_ids):
+    """
+    Returns tags by id, loading the ones that are not cached from the
+    primary, a lagging replica would cache old tags on every node
+    """
+    tags = tag_cache.get_many(tag_ids)
+    missing = [tag_id for tag_id in tag_ids if tag_id not in tags]
+    if missing:
+        with replica_reads(False):
+            loaded = Tag.objects.in_bulk(missing)
+        tag_cache.set_many(loaded)
+        tags.update(loaded)
+    return tags
+
+
+# Serialized events by 'id:version'
+event_fragment_cache = TieredCache('event-fragments')
+
+
+def get_event_fragments(event_ids, serialize):
+    """
+    Returns serialized events in the order of event_ids. Fragments are
+    looked up by event version and only the misses are passed to
+    serialize(ids), which returns {id: data}. Misses are read from the
+    primary, a lagging replica would cache old rows under new versions.
+    """
+    versions = get_versions(EVENT_VERSION, event_ids)
+    keys = {event_id: f'{event_id}:{versions[event_id]}'
+            for event_id in event_ids}
+    cached = event_fragment_cache.get_many(list(keys.values()))
+
+    fragments = {event_id: cached[key] for event_id, key in keys.items()
+                 if key in cached}
+    missing = [event_id for event_id in event_ids
+               if event_id not in fragments]
+    if missing:
+        with replica_reads(False):
+            serialized = serialize(missing)
+        # Events changed during the read may be serialized either way
+        current = get_versions(EVENT_VERSION, list(serialized))
+        event_fragment_cache.set_many({
+            keys[event_id]: data for event_id, data in serialized.items()
+            if current[event_id] == versions[event_id]
+        })
+        fragments.update(serialized)
+    return [fragments[event_id] for event_id in event_ids
+            if event_id in fragments]
+
+
+def invalidate_events(event_ids):
+    """Bumps versions of events after the current transaction commits"""
+    event_ids = list(event_ids)
+    if event_ids:
+        def bump():
+            bump_versions(EVENT_VERSION, event_ids)
+            bump_versions(EVENT_LIST_VERSION, [ALL])
+        transaction.on_commit(bump)
+
+
+def invalidate_tags():
+    tag_cache.clear()
+    bump_versions(TAG_LIST_VERSION, [ALL])
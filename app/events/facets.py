@@ -0,0 +1,83 @@
+"""
+Facet counts for the event list.
+
+Each facet is counted over the events matching the current query
+without the facet's own filter, so the counts show what selecting
+another value would return. All facets are fetched in one UNION ALL
+query. Facet values are what the facet's filter parameter accepts.
+"""
+import copy
+
+from django.conf import settings
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast
+from rest_framework.request import Request
+
+from events.models import Event
+
+# Facet name -> (grouped field, filter parameters the facet ignores)
+FACETS = {
+    'tags': ('tags__id', ('tags',)),
+    'location': ('location', ('location',)),
+    'status': ('status', ('status',)),
+}
+
+
+def parse_facets(value):
+    """Returns requested facet names, raises ValueError on unknown ones"""
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(names) - set(FACETS)
+    if unknown:
+        raise ValueError(', '.join(sorted(unknown)))
+    return list(dict.fromkeys(names))
+
+
+def _filtered_events(view, params):
+    """Events matching the view's filters for the given query params"""
+    django_request = copy.copy(view.request._request)
+    django_request.GET = params
+    facet_view = type(view)(request=Request(django_request), action='list',
+                            format_kwarg=None, args=(), kwargs={})
+    return facet_view.filter_queryset(facet_view.get_queryset())
+
+
+def facet_counts(view, names):
+    """
+    Returns {facet: [{'value': ..., 'count': ...}]}, at most
+    EVENT_FACET_LIMIT values per facet with the largest counts first.
+    """
+    querysets = []
+    for name in names:
+        field, own_params = FACETS[name]
+        params = view.request.query_params.copy()
+        for param in own_params:
+            params.pop(param, None)
+        events = _filtered_events(view, params)
+
+        querysets.append(
+            # Subquery keeps joins and annotations of the filters from
+            # multiplying the counts
+            Event.objects.prefetch_related(None).filter(
+                pk__in=events.order_by().values('pk'),
+                **{f'{field}__isnull': False}
+            ).values(
+                value=Cast(F(field), output_field=CharField())
+            ).annotate(
+                facet=Value(name),
+                count=Count('pk', distinct=True)
+            ).order_by('-count', 'value').values_list(
+                'facet', 'value', 'count'
+            )[:settings.EVENT_FACET_LIMIT]
+        )
+
+    counts = {name: [] for name in names}
+    if not querysets:
+        return counts
+    rows = querysets[0].union(*querysets[1:], all=True)
+    for name, value, count in rows:
+        if name == 'tags':
+            value = int(value)
+        counts[name].append({'value': value, 'count': count})
+    for values in counts.values():
+        values.sort(key=lambda item: (-item['count'], str(item['value'])))
+    return counts
@@ -0,0 +1,317 @@
+"""
+Explains the queries of the event list for representative combinations
+of EventFilter and the params EventViewSet.get_queryset handles itself.
+
+Every combination is run through the view's own filtering and
+pagination, the count and page queries it makes are captured and run
+again with EXPLAIN (ANALYZE, BUFFERS). Plans are checked for
+- sequential scans reading at least --min-rows rows,
+- sorts and hashes spilling to disk,
+- nodes whose row estimate is off by --estimate-factor or more.
+The summary groups the findings by table and condition, which are the
+candidates for new indexes.
+
+EXPLAIN ANALYZE runs the queries, each of them twice with the capture.
+Queries running longer than --statement-timeout are canceled and the
+combination reported as such. Run it against a copy of production
+data, e.g. seeded with python -m benchmarks.dataset:
+    python manage.py explain_event_filters
+    python manage.py explain_event_filters --only search --json
+"""
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from events.models import Event, Tag
+from events.views import EventViewSet
+
+# Filters of EventFilter, each explained on its own
+FILTERS = (
+    ('status', {'status': 'upcoming'}),
+    ('location', {'location': 'ber'}),
+    ('organizer', {'organizer': '{organizer}'}),
+    ('date_range', {'start_date': '{today}', 'end_date': '{month}'}),
+    ('available_seats', {'min_available_seats': '100',
+                         'max_available_seats': '300'}),
+)
+# Params of get_queryset, explained in every combination and ordering
+AD_HOC = (
+    ('search', {'search': '{search}'}),
+    ('min_organizer_rating', {'min_organizer_rating': '{min_rating}'}),
+    ('tags', {'tags': '{tag}'}),
+)
+ORDERINGS = (None, 'created_at', 'available_seats')
+COMBINED = ('combined', {'status': 'upcoming', 'tags': '{tag}',
+                         'location': 'par', 'start_date': '{today}'})
+
+
+def representative_combinations():
+    """(name, params) pairs, {placeholders} are filled from the data"""
+    result = [('unfiltered', {})]
+    result += FILTERS
+    for size in range(1, len(AD_HOC) + 1):
+        for chosen in combinations(AD_HOC, size):
+            result.append(('+'.join(name for name, _ in chosen),
+                           {k: v for _, params in chosen
+                            for k, v in params.items()}))
+    result += [
+        (f'{name}+ordering={ordering}' if name != 'unfiltered'
+         else f'ordering={ordering}', dict(params, ordering=ordering))
+        for name, params in result
+        if params.keys() <= {'search', 'min_organizer_rating', 'tags'}
+        for ordering in ORDERINGS if ordering
+    ]
+    result.append(COMBINED)
+    return result
+
+
+@contextmanager
+def statement_timeout(connection, seconds):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SET statement_timeout = {int(seconds * 1000)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('RESET statement_timeout')
+
+
+def list_queries(params, timeout=0):
+    """
+    Runs the list's filtering and pagination the way EventViewSet.list
+    does, returns (connection, sql, params) of the queries it made.
+    Queries are canceled after timeout seconds, 0 is no limit.
+    """
+    view = EventViewSet(action_map={'get': 'list'}, format_kwarg=None,
+                        args=(), kwargs={})
+    view.request = view.initialize_request(
+        APIRequestFactory().get('/api/events/', params)
+    )
+    # Validating the filters loads tags, which isn't captured
+    queryset = view.filter_queryset(view.get_queryset())
+    connection = connections[queryset.db]
+    queries = []
+
+    def record(execute, sql, sql_params, many, context):
+        queries.append((connection, sql, sql_params))
+        return execute(sql, sql_params, many, context)
+
+    with statement_timeout(connection, timeout), \
+            connection.execute_wrapper(record):
+        view.paginate_queryset(queryset.values_list('pk', flat=True))
+    return queries
+
+
+def node_label(node):
+    relation = node.get('Relation Name')
+    if relation:
+        return f"{node['Node Type']} on {relation}"
+    return node['Node Type']
+
+
+def find_problems(plan, min_rows, estimate_factor):
+    """Problems found in a plan of EXPLAIN (ANALYZE, FORMAT JSON)"""
+    problems = []
+    check_node(plan['Plan'], problems, min_rows, estimate_factor)
+    return problems
+
+
+def check_node(node, problems, min_rows, estimate_factor, parent=None):
+    """
+    Adds the problems of node and its children, returns whether a row
+    estimate in the subtree is off. A wrong estimate carries over to
+    the nodes above, only the lowest one is reported.
+    """
+    loops = node.get('Actual Loops', 0)
+    actual = node.get('Actual Rows', 0)
+    estimated = node.get('Plan Rows', 0)
+
+    if node['Node Type'] == 'Seq Scan':
+        scanned = (actual + node.get('Rows Removed by Filter', 0)) * loops
+        if scanned >= min_rows:
+            problems.append({
+                'kind': 'seq scan', 'node': node_label(node),
+                'condition': node.get('Filter', ''),
+                'detail': f'{scanned} rows read',
+            })
+    if node.get('Sort Space Type') == 'Disk':
+        problems.append({
+            'kind': 'sort spill', 'node': node_label(node),
+            'condition': ', '.join(node.get('Sort Key', ())),
+            'detail': f"{node.get('Sort Space Used')}kB on disk",
+        })
+    if node.get('Hash Batches', 1) > 1:
+        # Batches are reported on the Hash, the condition on its join
+        problems.append({
+            'kind': 'hash spill', 'node': node_label(node),
+            'condition': (parent or {}).get('Hash Cond', ''),
+            'detail': f"{node['Hash Batches']} batches",
+        })
+
+    missed_below = False
+    for child in node.get('Plans', ()):
+        missed_below |= check_node(child, problems, min_rows,
+                                   estimate_factor, node)
+    # Never executed nodes have no actual rows to compare
+    if not loops or max(actual, estimated) * loops < min_rows:
+        return missed_below
+    ratio = max(actual, 1) / max(estimated, 1)
+    if ratio < estimate_factor and 1 / ratio < estimate_factor:
+        return missed_below
+    if not missed_below:
+        problems.append({
+            'kind': 'row estimate', 'node': node_label(node),
+            'condition': node.get('Filter') or node.get('Index Cond')
+            or node.get('Hash Cond', ''),
+            'detail': f'{estimated} estimated, {actual} actual',
+        })
+    return True
+
+
+class Command(BaseCommand):
+    help = ('Runs EXPLAIN (ANALYZE, BUFFERS) on the event list queries of '
+            'representative filter combinations and reports sequential '
+            'scans, spills and row estimate misses')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', help='only combinations whose name contains this'
+        )
+        parser.add_argument('--search', default='jazz')
+        parser.add_argument('--min-rating', default='4')
+        parser.add_argument('--tag', help='default: the most used tag')
+        parser.add_argument('--organizer',
+                            help='default: the organizer of most events')
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='ignore nodes reading fewer rows (default: 1000)'
+        )
+        parser.add_argument(
+            '--estimate-factor', type=float, default=10,
+            help='flag row estimates off by this factor (default: 10)'
+        )
+        parser.add_argument(
+            '--statement-timeout', type=float, default=60,
+            help='seconds a query may run, 0 for no limit (default: 60)'
+        )
+        parser.add_argument('--json', action='store_true',
+                            help='print the report as JSON')
+
+    def handle(self, *args, **options):
+        values = self.placeholder_values(options)
+        results = []
+        for name, params in representative_combinations():
+            if options['only'] and options['only'] not in name:
+                continue
+            params = {key: value.format(**values)
+                      for key, value in params.items()}
+            result = {'name': name, 'params': params}
+            try:
+                result['queries'] = [
+                    self.explain(connection, sql, sql_params, options)
+                    for connection, sql, sql_params
+                    in list_queries(params, options['statement_timeout'])
+                ]
+            except OperationalError as e:
+                result['error'] = str(e).strip()
+            results.append(result)
+            if not options['json']:
+                # Plans of large tables take a while, report as they come
+                self.write_result(result)
+                self.stdout.flush()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.write_summary(results)
+
+    def placeholder_values(self, options):
+        tag = options['tag'] or Tag.objects.annotate(
+            event_count=Count('events')
+        ).filter(event_count__gt=0).order_by('-event_count').values_list(
+            'id', flat=True
+        ).first()
+        organizer = options['organizer'] or Event.objects.values(
+            'organizer'
+        ).annotate(event_count=Count('id')).order_by(
+            '-event_count'
+        ).values_list('organizer', flat=True).first()
+        if tag is None or organizer is None:
+            raise CommandError(
+                'No tagged events to explain, seed data first, e.g. with '
+                'python -m benchmarks.dataset'
+            )
+        today = timezone.now().date()
+        return {
+            'search': options['search'],
+            'min_rating': options['min_rating'],
+            'tag': tag,
+            'organizer': organizer,
+            'today': today.isoformat(),
+            'month': (today + timedelta(days=30)).isoformat(),
+        }
+
+    def explain(self, connection, sql, params, options):
+        with statement_timeout(connection, options['statement_timeout']), \
+                connection.cursor() as cursor:
+            cursor.execute(
+                f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}', params
+            )
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        return {
+            'label': 'count' if sql.startswith('SELECT COUNT') else 'page',
+            'execution_ms': plan['Execution Time'],
+            'problems': find_problems(plan, options['min_rows'],
+                                      options['estimate_factor']),
+            'plan': plan,
+        }
+
+    def write_result(self, result):
+        if 'error' in result:
+            self.stdout.write(f"{result['name']}: {result['error']}")
+            return
+        total = sum(query['execution_ms'] for query in result['queries'])
+        self.stdout.write(f"{result['name']}: {total:.1f}ms")
+        for query in result['queries']:
+            for problem in query['problems']:
+                self.stdout.write(
+                    f"  {query['label']}: {problem['kind']}, "
+                    f"{problem['node']}, {problem['detail']}"
+                    + (f"\n    {problem['condition']}"
+                       if problem['condition'] else '')
+                )
+
+    def write_summary(self, results):
+        by_condition = defaultdict(set)
+        for result in results:
+            for query in result.get('queries', ()):
+                for problem in query['problems']:
+                    key = (problem['kind'], problem['node'],
+                           problem['condition'])
+                    by_condition[key].add(result['name'])
+
+        failed = sum('error' in result for result in results)
+        self.stdout.write(
+            f'\nFindings of {len(results)} combinations'
+            + (f' ({failed} failed, see above)' if failed else '')
+            + ', most frequent first:'
+        )
+        if not by_condition:
+            self.stdout.write('  none')
+        for (kind, node, condition), names in sorted(
+                by_condition.items(), key=lambda item: -len(item[1])):
+            self.stdout.write(
+                f'  {len(names)}x {kind}, {node}'
+                + (f'\n    {condition}' if condition else '')
+            )
@@ -1,22 +1,39 @@
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.db.models.functions import Coalesce
 
 
 class EventManager(models.Manager):
     def with_annotations(self):
-        """Queryset with all annotations"""
+        """
+        Queryset with all annotations. They are subqueries rather than
+        aggregates over joins, so there is no GROUP BY and a query of
+        some columns only, like the ids of a page, can use the indexes
+        of the ordering.
+        """
+        reservations = self.model._meta.get_field(
+            'reservations'
+        ).related_model.objects.filter(
+            event=models.OuterRef('pk'), status='confirmed'
+        ).order_by().values('event')
+        ratings = self.model._meta.get_field(
+            'ratings'
+        ).related_model.objects.filter(
+            event=models.OuterRef('pk')
+        ).order_by().values('event')
         return self.get_queryset().select_related('organizer').annotate(
-            _confirmed_reservations_count=models.Count(
-                'reservations__id',
-                filter=models.Q(reservations__status='confirmed'),
-                distinct=True
-            ),
-            _available_seats_count=models.F('available_seats') - models.Count(
-                'reservations__id',
-                filter=models.Q(reservations__status='confirmed'),
-                distinct=True
-            ),
-            _average_rating=models.Avg('ratings__rating')
+            _confirmed_reservations_count=Coalesce(models.Subquery(
+                reservations.annotate(count=models.Count('id')).values(
+                    'count'
+                )
+            ), 0),
+            _available_seats_count=models.F('available_seats')
+            - models.F('_confirmed_reservations_count'),
+            _average_rating=models.Subquery(
+                ratings.annotate(average=models.Avg('rating')).values(
+                    'average'
+                )
+            )
         )
 
     def get_queryset(self):
@@ -57,6 +74,18 @@ class ReservationManager(models.Manager):
         except ObjectDoesNotExist:
             return None
 
+    def with_annotated_events(self):
+        """
+        Reservations with users and annotated events, so a nested event
+        serializer runs no queries per reservation.
+        """
+        event_model = self.model._meta.get_field('event').related_model
+        return super().get_queryset().select_related('user').prefetch_related(
+            models.Prefetch(
+                'event', queryset=event_model.objects.with_annotations()
+            )
+        )
+
 
 class RatingManager(models.Manager):
     def get_queryset(self):
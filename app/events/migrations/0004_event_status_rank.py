@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Adding the stored status_rank column rewrites events_event and holds
+    an exclusive lock on it until done, which blocks reads and writes of
+    events. On large tables run it in a maintenance window. The indexes
+    are added without locking in 0005.
+    """
+
+    dependencies = [
+        ('events', '0003_event_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='event',
+            options={'ordering': ['status_rank', 'start_time']},
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='status_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(status='upcoming', then=0), models.When(status='completed', then=1), models.When(status='cancelled', then=2), default=3), output_field=models.PositiveSmallIntegerField()),
+        ),
+    ]
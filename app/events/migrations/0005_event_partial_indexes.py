@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 18:45
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, which can't run in a transaction.
+    # A failed build leaves an invalid index to drop before retrying.
+    atomic = False
+
+    dependencies = [
+        ('events', '0004_event_status_rank'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='event',
+            index=models.Index(fields=['start_time'], name='event_start_time_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='event',
+            index=models.Index(fields=['status_rank', 'start_time'], name='event_status_rank_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='event',
+            index=models.Index(condition=models.Q(('status', 'upcoming')), fields=['start_time'], name='event_upcoming_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'confirmed')), fields=['event'], name='reservation_confirmed_idx'),
+        ),
+    ]
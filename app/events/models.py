@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import User
 from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -7,6 +9,8 @@ from django.utils import timezone
 from events.managers import EventManager, ReservationManager, RatingManager
 
 DELETION_GRACE_PERIOD = 3600
+# Upcoming events are completed this long after their start time
+COMPLETION_DELAY = timedelta(hours=2)
 
 
 class Tag(models.Model):
@@ -33,27 +37,39 @@ class Event(models.Model):
     organizer = models.ForeignKey(User, on_delete=models.CASCADE,
                                   related_name='organized_events')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField(Tag, related_name='events', blank=True)
     search_vector = SearchVectorField(null=True)
+    # Position of the status in the default ordering, kept by the
+    # database so the ordering can be read from an index
+    status_rank = models.GeneratedField(
+        expression=models.Case(
+            models.When(status='upcoming', then=0),
+            models.When(status='completed', then=1),
+            models.When(status='cancelled', then=2),
+            default=3,
+        ),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+    )
 
     objects = EventManager()
 
     class Meta:
-        ordering = [
-            models.Case(
-                models.When(status='upcoming', then=0),
-                models.When(status='completed', then=1),
-                models.When(status='cancelled', then=2),
-                default=3,
-                output_field=models.IntegerField(),
-            ),
-            'start_time'
-        ]
+        ordering = ['status_rank', 'start_time']
         indexes = [
             models.Index(fields=['status', 'start_time']),
             models.Index(fields=['location']),
             models.Index(fields=['organizer']),
             models.Index(fields=['created_at']),
+            # Default order of the event list
+            models.Index(fields=['start_time'], name='event_start_time_idx'),
+            models.Index(fields=['status_rank', 'start_time'],
+                         name='event_status_rank_idx'),
+            # Most status queries only look for upcoming events
+            models.Index(fields=['start_time'],
+                         condition=models.Q(status='upcoming'),
+                         name='event_upcoming_idx'),
         ]
 
     def __str__(self):
@@ -106,6 +122,10 @@ class Reservation(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['event', 'status']),
             models.Index(fields=['created_at']),
+            # Confirmed seats of an event are counted from this alone
+            models.Index(fields=['event'],
+                         condition=models.Q(status='confirmed'),
+                         name='reservation_confirmed_idx'),
         ]
         ordering = ['-created_at',]
 
@@ -1,15 +1,85 @@
 from django.contrib.auth.models import User
 from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from event_calendar.db_routers import ReplicaRouter
+from event_calendar.instrumentation import TimedSerializerMixin
+from events.cache import get_tags, user_profile_cache
 from events.models import Event, Reservation, Rating, Tag
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin,
+                     serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
+    def to_representation(self, instance):
+        # Invalidated by events.signals on user save
+        return dict(user_profile_cache.get_or_set(
+            instance.pk, lambda: self.represent(instance)
+        ))
+
+    def represent(self, instance):
+        """
+        Profiles are cached for every node, users read from the replica
+        are loaded again from the primary. Users of JWT requests come
+        with most fields deferred, they are loaded in one query rather
+        than one per field.
+        """
+        from_replica = instance._state.db not in (None,
+                                                  ReplicaRouter.primary)
+        deferred = instance.get_deferred_fields()
+        fields = [field for field in self.Meta.fields
+                  if field != 'id' and (from_replica or field in deferred)]
+        if fields:
+            instance.refresh_from_db(using=ReplicaRouter.primary,
+                                     fields=fields)
+        return super().to_representation(instance)
+
+
+class CachedTagField(serializers.PrimaryKeyRelatedField):
+    """Resolves tag ids from the tag cache instead of a query per id"""
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedTagListField(**list_kwargs)
+
+    def to_tag_id(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def to_internal_value(self, data):
+        tag_id = self.to_tag_id(data)
+        tag = get_tags([tag_id]).get(tag_id)
+        if tag is None:
+            self.fail('does_not_exist', pk_value=data)
+        return tag
+
+
+class CachedTagListField(serializers.ManyRelatedField):
+    """Resolves all tag ids with a single tag cache lookup"""
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        tag_ids = [self.child_relation.to_tag_id(item) for item in data]
+        tags = get_tags(tag_ids)
+        for tag_id, item in zip(tag_ids, data):
+            if tag_id not in tags:
+                self.child_relation.fail('does_not_exist', pk_value=item)
+        return [tags[tag_id] for tag_id in tag_ids]
+
 
 class UserLoginSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
@@ -27,13 +97,15 @@ class UserRegisterSerializer(serializers.Serializer):
         return value
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin,
+                    serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id', 'name']
 
 
-class RatingSerializer(serializers.ModelSerializer):
+class RatingSerializer(TimedSerializerMixin,
+                       serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     event = serializers.PrimaryKeyRelatedField(
         queryset=Event.objects.all(),
@@ -64,10 +136,11 @@ class RatingSerializer(serializers.ModelSerializer):
         return data
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(TimedSerializerMixin,
+                      serializers.ModelSerializer):
     organizer = UserSerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    tag_ids = serializers.PrimaryKeyRelatedField(
+    tag_ids = CachedTagField(
         queryset=Tag.objects.all(),
         many=True,
         write_only=True,
@@ -83,10 +156,11 @@ class EventSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'start_time', 'location',
             'available_seats', 'available_seats_count', 'status',
-            'organizer', 'created_at', 'tags', 'tag_ids', 'average_rating'
+            'organizer', 'created_at', 'updated_at', 'tags', 'tag_ids',
+            'average_rating'
         ]
         read_only_fields = [
-            'organizer', 'created_at',
+            'organizer', 'created_at', 'updated_at',
             'available_seats_count', 'average_rating'
         ]
 
@@ -112,7 +186,8 @@ class EventSerializer(serializers.ModelSerializer):
         return event
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     event = EventSerializer(read_only=True)
     event_id = serializers.PrimaryKeyRelatedField(
@@ -1,8 +1,17 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, \
+    post_save, pre_delete
+from django.dispatch import receiver, Signal
 from django.contrib.postgres.search import SearchVector
 
-from events.models import Event
+from events.cache import invalidate_events, invalidate_tags, \
+    user_profile_cache
+from events.models import Event, Rating, Reservation, Tag, COMPLETION_DELAY
+
+# Sent with event_ids after a batch of events is marked 'completed'
+events_completed = Signal()
 
 
 @receiver(post_save, sender=Event)
@@ -10,3 +19,79 @@ def update_search_vector(sender, instance, **kwargs):
     Event.objects.filter(pk=instance.pk).update(
         search_vector=SearchVector('name', 'description', 'location')
     )
+
+
+@receiver(post_save, sender=Event)
+def schedule_due_status_update(sender, instance, **kwargs):
+    """Make sure a status update runs when the event becomes due"""
+    if (not settings.EVENT_STATUS_SCHEDULE_ON_SAVE
+            or instance.status != 'upcoming'):
+        return
+
+    from events.tasks import schedule_status_update
+    due_at = instance.start_time + COMPLETION_DELAY
+    transaction.on_commit(lambda: schedule_status_update(due_at))
+
+
+@receiver(events_completed)
+def prompt_ratings(sender, event_ids, **kwargs):
+    from events.tasks import send_rating_prompts
+    send_rating_prompts.delay(event_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_caches(sender, instance, **kwargs):
+    """Profile changes apply to the next request"""
+    user_profile_cache.delete(instance.pk)
+    # Again after commit, a concurrent request may have cached the old row
+    transaction.on_commit(lambda: user_profile_cache.delete(instance.pk))
+
+    # Organizer is serialized with events, logins don't change it
+    if kwargs.get('update_fields') != frozenset(['last_login']):
+        invalidate_events(Event.objects.filter(
+            organizer_id=instance.pk
+        ).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cache(sender, instance, **kwargs):
+    invalidate_tags()
+    transaction.on_commit(invalidate_tags)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_tagged_events(sender, instance, **kwargs):
+    invalidate_events(instance.events.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event(sender, instance, **kwargs):
+    invalidate_events([instance.pk])
+
+
+@receiver(m2m_changed, sender=Event.tags.through)
+def invalidate_event_tags(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_events([instance.pk])
+    elif pk_set:
+        invalidate_events(pk_set)
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def invalidate_booked_event(sender, instance, **kwargs):
+    invalidate_events([instance.event_id])
+
+
+@receiver(events_completed)
+def invalidate_completed_events(sender, event_ids, **kwargs):
+    invalidate_events(event_ids)
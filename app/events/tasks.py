@@ -1,34 +1,128 @@
+from collections import defaultdict
 from datetime import timedelta
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 
-from events.models import Event, Reservation
-from notifications.models import Notification
+from events.models import Event, Reservation, COMPLETION_DELAY
+from events.signals import events_completed
+from notifications.models import Notification, NotificationPreference
+from notifications.stream import publish_notifications
 from notifications.tasks import send_notification_via_grpc
 
 
+NEXT_STATUS_UPDATE_KEY = 'events:next-status-update'
+
+
+def schedule_status_update(due_at):
+    """
+    Schedules update_event_statuses to run at due_at, unless a run
+    at or before that time is already scheduled. Runs are scheduled at
+    most EVENT_STATUS_MAX_ETA ahead, the run then schedules the next.
+    """
+    now = timezone.now()
+    due_at = min(max(due_at, now), now + settings.EVENT_STATUS_MAX_ETA)
+    scheduled_at = cache.get(NEXT_STATUS_UPDATE_KEY)
+    if scheduled_at is not None and now < scheduled_at <= due_at:
+        return scheduled_at
+
+    cache.set(NEXT_STATUS_UPDATE_KEY, due_at,
+              (due_at - now).total_seconds() + 60)
+    update_event_statuses.apply_async(eta=due_at)
+    return due_at
+
+
 @shared_task(queue='default')
 def update_event_statuses():
     """
     Update event statuses from 'upcoming' to 'completed'
     if 2 hours have passed since the event's start time.
+    Due events are processed in bounded batches, then the next run is
+    scheduled for when the next upcoming event becomes due.
     """
     try:
-        two_hours_ago = timezone.now() - timedelta(hours=2)
+        due_before = timezone.now() - COMPLETION_DELAY
+        updated_events_count = 0
 
-        events = Event.objects.filter(
-            status='upcoming',
-            start_time__lte=two_hours_ago
-        )
-        updated_events_count = events.update(status='completed')
+        while True:
+            with transaction.atomic():
+                event_ids = list(
+                    Event.objects.prefetch_related(None).filter(
+                        status='upcoming',
+                        start_time__lte=due_before
+                    ).order_by('start_time').select_for_update(
+                        skip_locked=True
+                    ).values_list('id', flat=True)[
+                        :settings.EVENT_STATUS_BATCH_SIZE
+                    ]
+                )
+                if not event_ids:
+                    break
+                Event.objects.filter(id__in=event_ids).update(
+                    status='completed', updated_at=timezone.now()
+                )
+            updated_events_count += len(event_ids)
+            events_completed.send(sender=Event, event_ids=event_ids)
+
+        next_start_time = Event.objects.filter(
+            status='upcoming'
+        ).order_by('start_time').values_list('start_time', flat=True).first()
+        if next_start_time is not None:
+            schedule_status_update(next_start_time + COMPLETION_DELAY)
 
         return f'Updated {updated_events_count} events to "completed" status'
     except Exception as e:
         return f'"Failed to update events to "completed" with: {e}"'
 
 
+def _send_notifications(notifications):
+    """Bulk create notifications and send them via gRPC"""
+    created_notifications = Notification.objects.bulk_create(notifications)
+    # bulk_create bypasses post_save, lists and counters are
+    # invalidated here instead
+    recipient_ids = {n.recipient_id for n in created_notifications}
+    Notification.objects.invalidate_lists(recipient_ids)
+    publish_notifications(created_notifications)
+
+    for notification in created_notifications:
+        send_notification_via_grpc.delay(notification.id)
+    return created_notifications
+
+
+@shared_task(queue='default', replica_reads=True)
+def send_rating_prompts(event_ids):
+    """Ask participants of just completed events to rate them"""
+    try:
+        reservations = Reservation.objects.filter(
+            event_id__in=event_ids,
+            status='confirmed'
+        )
+
+        event_content_type = ContentType.objects.get_for_model(Event)
+        notifications = _send_notifications([
+            Notification(
+                recipient_id=row.user_id,
+                notification_type='rating_prompt',
+                title=f'Rate event: {row.event.name}',
+                status='pending',
+                message=f'How was {row.event.name}? '
+                        f'Let others know by rating it.',
+                created_at=timezone.now(),
+                object_id=row.event_id,
+                content_type_id=event_content_type.id,
+            )
+            for row in reservations
+        ])
+
+        return f'Sent {len(notifications)} rating prompts'
+    except Exception as e:
+        return f'Failed to send rating prompts with: {e}'
+
+
 @shared_task(queue='high_priority')
 def send_booking_notification(reservation_id):
     """Send notification when a user books an event"""
@@ -83,9 +177,15 @@ def send_cancellation_notification(reservation_id):
                 f' cancellation notification with: {e}')
 
 
-@shared_task(queue='high_priority')
+@shared_task(queue='high_priority', replica_reads=True)
 def send_event_reminders():
-    """Send reminders to participants 1 hour before events"""
+    """
+    Send reminders to participants 1 hour before events.
+    Reminders of recipients with digests enabled are coalesced into
+    one notification per recipient, reminders following a sent one
+    within the digest window into a digest sent when it closes.
+    Events covered by a reminder of the window aren't reminded again.
+    """
     try:
         one_hour_from_now = timezone.now() + timedelta(hours=1)
         two_hours_from_now = timezone.now() + timedelta(hours=2)
@@ -96,26 +196,62 @@ def send_event_reminders():
             status='confirmed'
         )
 
+        reminders = defaultdict(list)
+        for row in events_to_remind:
+            reminders[row.user_id].append(row.event)
+
+        digest_recipients = set()
+        if 'reminder' in settings.NOTIFICATION_DIGEST_TYPES:
+            digest_recipients = (
+                NotificationPreference.objects.digest_recipients(reminders)
+            )
+
         event_content_type = ContentType.objects.get_for_model(Event)
+        digest_countdown = (
+            settings.NOTIFICATION_DIGEST_WINDOW.total_seconds()
+        )
+        digests, notified = Notification.objects.merge_into_digests(
+            notification_type='reminder',
+            content_type=event_content_type,
+            items={
+                user_id: [
+                    (event.id,
+                     f'Reminder: {event.name}',
+                     f'Your event {event.name} '
+                     f'is starting in about 1 hour.')
+                    for event in events
+                ]
+                for user_id, events in reminders.items()
+                if user_id in digest_recipients
+            }
+        )
+        publish_notifications(digests)
+        # The first reminder in a window goes out right away, later
+        # ones are coalesced and sent when the window closes
+        for digest in digests:
+            send_notification_via_grpc.apply_async(
+                (digest.id,),
+                countdown=digest_countdown
+                if digest.recipient_id in notified else 0
+            )
+
         notifications = [
             Notification(
-                recipient_id=row.user.id,
+                recipient_id=user_id,
                 notification_type='reminder',
-                title=f'Reminder: {row.event.name}',
+                title=f'Reminder: {event.name}',
                 status='pending',
-                message=f'Your event {row.event.name} '
+                message=f'Your event {event.name} '
                         f'is starting in about 1 hour.',
                 created_at=timezone.now(),
-                object_id=row.event.id,
+                object_id=event.id,
                 content_type_id=event_content_type.id,
             )
-            for row in events_to_remind
+            for user_id, events in reminders.items()
+            if user_id not in digest_recipients
+            for event in events
         ]
-
-        created_notifications = Notification.objects.bulk_create(notifications)
-
-        for notification in created_notifications:
-            send_notification_via_grpc.delay(notification.id)
+        _send_notifications(notifications)
 
         return f'Sent {len(events_to_remind)} event reminders'
     except Exception as e:
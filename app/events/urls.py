@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from events.async_views import event_detail, event_list, tag_list
 from events.views import EventViewSet, ReservationViewSet, TagViewSet
 
 router = DefaultRouter()
@@ -8,5 +9,9 @@ router.register(r'reservations', ReservationViewSet, basename='reservation')
 router.register(r'tags', TagViewSet, basename='tag')
 
 urlpatterns = [
+    # Async read endpoints, served by the ASGI app
+    path('async/events/', event_list, name='async-event-list'),
+    path('async/events/<int:pk>/', event_detail, name='async-event-detail'),
+    path('async/tags/', tag_list, name='async-tag-list'),
     path('', include(router.urls)),
 ]
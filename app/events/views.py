@@ -1,15 +1,25 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Avg
+from django.db.models import Avg, Count, F, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from event_calendar.conditional import conditional_get
+from event_calendar.db_routers import replica_reads
+from event_calendar.versions import get_existing_version, \
+    get_existing_versions, get_version
+from events.cache import ALL, EVENT_LIST_VERSION, EVENT_VERSION, \
+    TAG_LIST_VERSION, get_event_fragments, tag_cache
+from events.facets import facet_counts, parse_facets
 from events.filters import EventFilter
 from events.models import Event, Reservation, Rating, Tag
 from events.serializers import EventSerializer, ReservationSerializer, \
@@ -115,6 +125,8 @@ class EventViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description', 'location']
     ordering_fields = ['start_time', 'created_at', 'available_seats']
     queryset = Event.objects.with_annotations()
+    # Ids name version stamps, other values don't reach the views
+    lookup_value_regex = r'\d+'
 
     def get_queryset(self):
         queryset = self.queryset.select_related(
@@ -152,6 +164,70 @@ class EventViewSet(viewsets.ModelViewSet):
 
         return queryset.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        # Unknown ids are looked up rather than given a version
+        event_id = int(kwargs['pk'])
+        with replica_reads(False):
+            version = get_existing_version(
+                EVENT_VERSION, event_id,
+                lambda: Event.objects.filter(pk=event_id).exists()
+            )
+        if version is None:
+            raise NotFound()
+
+        retrieve_event = super().retrieve
+
+        def respond():
+            # A lagging replica would pair an old body with the ETag
+            with replica_reads(False):
+                return retrieve_event(request, *args, **kwargs)
+        return conditional_get(request, version, respond)
+
+    def list(self, request, *args, **kwargs):
+        def respond():
+            # A lagging replica would pair an old page with the ETag
+            with replica_reads(False):
+                return self.list_from_fragments(request)
+        return conditional_get(
+            request, get_version(EVENT_LIST_VERSION, ALL), respond
+        )
+
+    def list_from_fragments(self, request):
+        """
+        Only ids are selected for the page, events are assembled from
+        cached fragments and just the misses are serialized.
+        With ?facets=tags,location,status counts per facet value are
+        added to the page.
+        """
+        try:
+            facets = parse_facets(request.query_params.get('facets', ''))
+        except ValueError as e:
+            return Response({"detail": f"Unknown facets: {e}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        event_ids = queryset.values_list('pk', flat=True)
+        page = self.paginate_queryset(event_ids)
+        events = get_event_fragments(
+            list(page if page is not None else event_ids),
+            self.serialize_events
+        )
+        if page is None:
+            return Response(events)
+
+        response = self.get_paginated_response(events)
+        if facets:
+            response.data['facets'] = facet_counts(self, facets)
+        return response
+
+    def serialize_events(self, event_ids):
+        events = list(Event.objects.with_annotations().filter(
+            pk__in=event_ids
+        ))
+        serializer = self.get_serializer(events, many=True)
+        return {event.pk: data
+                for event, data in zip(events, serializer.data)}
+
     def perform_create(self, serializer):
         serializer.save(organizer=self.request.user)
 
@@ -179,11 +255,11 @@ class EventViewSet(viewsets.ModelViewSet):
                             status=status.HTTP_400_BAD_REQUEST)
 
         if new_status == 'cancelled' and event.status != 'cancelled':
-            reservations = Reservation.objects.filter(
+            reservation_ids = Reservation.objects.filter(
                 event=event, status='confirmed'
-            )
-            for r in reservations:
-                send_cancellation_notification.delay(r.id)
+            ).values_list('id', flat=True)
+            for reservation_id in reservation_ids:
+                send_cancellation_notification.delay(reservation_id)
 
         event.status = new_status
         event.save()
@@ -252,9 +328,9 @@ class EventViewSet(viewsets.ModelViewSet):
             with transaction.atomic():
                 reservation.status = 'cancelled'
                 reservation.save()
-                updated = Reservation.objects.select_related(
-                    'user', 'event'
-                ).get(id=reservation.id)
+                updated = Reservation.objects.with_annotated_events().get(
+                    id=reservation.id
+                )
                 return Response(ReservationSerializer(updated).data)
         except Exception as e:
             return Response({"detail": f"Failed to cancel: {e}"},
@@ -307,6 +383,64 @@ class EventViewSet(viewsets.ModelViewSet):
             return Response({"detail": f"Failed to rate event: {e}"},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """
+        Seats and status of many events in one query, e.g. ?ids=1,2,3.
+        ETag is built from event versions, so unchanged polls get 304
+        without touching the database.
+        """
+        try:
+            event_ids = sorted({
+                int(event_id)
+                for event_id in request.query_params.get('ids', '').split(',')
+                if event_id.strip()
+            })
+        except ValueError:
+            return Response({"detail": "ids must be comma-separated "
+                                       "integers."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not event_ids:
+            return Response({"detail": "ids are required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(event_ids) > settings.EVENT_AVAILABILITY_MAX_IDS:
+            return Response(
+                {"detail": f"At most {settings.EVENT_AVAILABILITY_MAX_IDS}"
+                           f" ids are allowed."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Unknown ids are looked up rather than given a version. Any
+        # change bumps one of the versions above the others
+        with replica_reads(False):
+            versions = get_existing_versions(
+                EVENT_VERSION, event_ids,
+                lambda ids: Event.objects.filter(
+                    pk__in=ids
+                ).values_list('pk', flat=True)
+            )
+
+        def respond():
+            # A lagging replica would pair old seats with the ETag
+            with replica_reads(False):
+                return Response(self.get_availability(event_ids))
+        return conditional_get(request, max(versions.values(), default=None),
+                               respond)
+
+    def get_availability(self, event_ids):
+        events = Event.objects.prefetch_related(None).filter(
+            pk__in=event_ids
+        ).annotate(
+            available_seats_count=F('available_seats') - Count(
+                'reservations', filter=Q(reservations__status='confirmed')
+            )
+        ).order_by().values_list('id', 'available_seats_count', 'status')
+        return {
+            event_id: {'available_seats_count': seats,
+                       'status': event_status}
+            for event_id, seats, event_status in events
+        }
+
     @action(detail=False, methods=['get'])
     def my_events(self, request):
         events = self.get_queryset().filter(
@@ -336,7 +470,9 @@ class ReservationViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        return Reservation.objects.with_annotated_events().filter(
+            user=self.request.user
+        )
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -345,3 +481,39 @@ class TagViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter]
     search_fields = ['name']
     queryset = Tag.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        page_number = request.query_params.get(
+            self.paginator.page_query_param, '1'
+        )
+        # Searches and pages like 'last' aren't cached
+        if request.query_params.get('search') or not page_number.isdigit():
+            return super().list(request, *args, **kwargs)
+
+        return conditional_get(
+            request, get_version(TAG_LIST_VERSION, ALL),
+            lambda: self.cached_page(request, int(page_number))
+        )
+
+    def cached_page(self, request, page_number):
+        """
+        Page of all tags, cached by page number and size only. Links
+        depend on the host and the other params, they are built for
+        each request.
+        """
+        page_size = self.paginator.get_page_size(request)
+
+        def load():
+            # Cached for every node, so not read from a lagging replica.
+            # Raises NotFound for pages out of range
+            with replica_reads(False):
+                data = super(TagViewSet, self).list(request).data
+            return {'count': data['count'], 'results': data['results']}
+
+        # Cleared by events.signals on any tag change
+        data = tag_cache.get_or_set(f'list:{page_number}:{page_size}', load)
+        self.paginator.request = request
+        self.paginator.page = Paginator(
+            range(data['count']), page_size
+        ).page(page_number)
+        return self.paginator.get_paginated_response(data['results'])
@@ -0,0 +1,388 @@
+"""
+Generates a large synthetic dataset for load testing.
+
+Rows are streamed into Postgres with COPY instead of being saved one at a
+time, so millions of rows take minutes rather than hours. Distributions
+follow what production data looks like:
+- event popularity is Zipfian, a few events take most reservations,
+  ratings and notifications;
+- start times cluster around a number of busy periods, mostly in the
+  evening;
+- tags belong to topics and an event's tags are mostly from one topic.
+
+All users share one precomputed password hash. Search vectors and id
+sequences are updated with set-based SQL after the rows are copied.
+
+Run from the app directory against a migrated database:
+    python -m fixtures.generate_load_data --events 1000000
+"""
+
+import argparse
+import math
+import random
+import time
+from array import array
+from datetime import timedelta
+
+from benchmarks.utils import setup_django
+
+PASSWORD = 'password123'
+CITIES = ('Berlin', 'Paris', 'London', 'Madrid', 'Rome', 'Vienna',
+          'Prague', 'Warsaw', 'Lisbon', 'Amsterdam', 'Oslo', 'Dublin',
+          'Munich', 'Milan', 'Zurich', 'Brussels', 'Krakow', 'Porto')
+TOPICS = ('music', 'tech', 'sports', 'art', 'food', 'science',
+          'business', 'film', 'travel', 'health')
+WORDS = {
+    'music': ('concert', 'jazz', 'festival', 'opera', 'dj set'),
+    'tech': ('meetup', 'hackathon', 'python', 'conference', 'workshop'),
+    'sports': ('marathon', 'match', 'tournament', 'yoga', 'cycling'),
+    'art': ('exhibition', 'gallery', 'sculpture', 'design', 'painting'),
+    'food': ('tasting', 'dinner', 'market', 'wine', 'cooking class'),
+    'science': ('lecture', 'seminar', 'astronomy', 'lab tour', 'talk'),
+    'business': ('networking', 'pitch night', 'summit', 'panel', 'expo'),
+    'film': ('screening', 'premiere', 'film festival', 'documentary',
+             'short films'),
+    'travel': ('walking tour', 'hike', 'city tour', 'boat trip', 'safari'),
+    'health': ('retreat', 'meditation', 'bootcamp', 'run club',
+               'nutrition talk'),
+}
+NOTIFICATION_TYPES = ('booking', 'cancellation', 'reminder', 'event_update',
+                      'rating_prompt')
+# Exponent of Zipf distributions, higher concentrates more on the top
+ZIPF_EXPONENT = 1.1
+# Busy periods start times cluster around, and their spread in days
+CLUSTERS = 24
+CLUSTER_SPREAD = 4
+# Share of start times outside of busy periods
+UNCLUSTERED_SHARE = 0.2
+# Share of events with a tag from a second topic
+CROSS_TOPIC_SHARE = 0.15
+CANCELLED_SHARE = 0.05
+CANCELLED_RESERVATION_SHARE = 0.1
+DAYS = 365
+
+
+def default_sizes(events):
+    """Row counts relative to the number of events"""
+    return {
+        'users': max(100, events // 10),
+        'tags': 50,
+        'events': events,
+        'reservations': events * 5,
+        'ratings': events,
+        'notifications': events * 2,
+    }
+
+
+class Zipf:
+    """
+    Samples ranks 0..n-1 with probability proportional to 1/(rank+1)^s,
+    using the inverse of the continuous power law, so no table of n
+    weights is kept.
+    """
+    def __init__(self, n, rng, exponent=ZIPF_EXPONENT):
+        self.n = n
+        self.rng = rng
+        self.exponent = exponent
+        self.scale = (n + 1) ** (1 - exponent) - 1
+
+    def __call__(self):
+        u = self.rng.random()
+        rank = (self.scale * u + 1) ** (1 / (1 - self.exponent)) - 1
+        return min(int(rank), self.n - 1)
+
+    def share(self, rank):
+        """Expected share of samples falling on rank"""
+        s = 1 - self.exponent
+        return ((rank + 2) ** s - (rank + 1) ** s) / self.scale
+
+
+class Permutation:
+    """
+    Bijection of 0..n-1, maps popularity ranks to ids so popular rows
+    are spread over the table rather than being the first ones.
+    """
+    def __init__(self, n, rng):
+        self.n = n
+        self.step = rng.randrange(1, n) if n > 1 else 1
+        while math.gcd(self.step, n) != 1:
+            self.step += 1
+        self.offset = rng.randrange(n)
+        self.inverse_step = pow(self.step, -1, n) if n > 1 else 1
+
+    def __call__(self, rank):
+        return (rank * self.step + self.offset) % self.n
+
+    def rank(self, index):
+        return (index - self.offset) * self.inverse_step % self.n
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Streams rows into table with COPY, returns the number of rows"""
+    count = 0
+    with cursor.copy(
+        f'COPY {table} ({", ".join(columns)}) FROM STDIN'
+    ) as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return count
+
+
+def next_id(cursor, table):
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}')
+    return cursor.fetchone()[0]
+
+
+def start_offset(rng, centers):
+    """Start time in minutes from today, clustered and mostly evening"""
+    if rng.random() < UNCLUSTERED_SHARE:
+        day = rng.uniform(-DAYS, DAYS)
+    else:
+        day = rng.gauss(rng.choice(centers), CLUSTER_SPREAD)
+        day = max(-DAYS, min(DAYS, day))
+    hour = max(8, min(23, round(rng.gauss(19, 2.5))))
+    return int(day) * 1440 + hour * 60 + rng.choice((0, 15, 30, 45))
+
+
+def generate(users, tags, events, reservations, ratings, notifications,
+             prefix='load_', seed=0):
+    """
+    Copies the given number of rows into the database, returns counts of
+    the rows actually created. Reservations and ratings can come out
+    slightly lower, an event gets at most one of each per user.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.contenttypes.models import ContentType
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from events.models import Event
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    password = make_password(PASSWORD)
+    event_type_id = ContentType.objects.get_for_model(Event).id
+    counts = {}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        first_user_id = next_id(cursor, 'auth_user')
+        first_tag_id = next_id(cursor, 'events_tag')
+        first_event_id = next_id(cursor, 'events_event')
+
+        counts['users'] = copy_rows(
+            cursor, 'auth_user',
+            ('id', 'username', 'email', 'password', 'first_name',
+             'last_name', 'is_superuser', 'is_staff', 'is_active',
+             'date_joined'),
+            ((first_user_id + i, f'{prefix}user_{i}',
+              f'{prefix}user_{i}@example.com', password, '', '',
+              False, False, True, now - timedelta(days=rng.randint(0, 730)))
+             for i in range(users))
+        )
+
+        # Tags are assigned to topics round robin
+        tag_topics = [TOPICS[i % len(TOPICS)] for i in range(tags)]
+        topic_tags = {topic: [] for topic in TOPICS}
+        for i, topic in enumerate(tag_topics):
+            topic_tags[topic].append(first_tag_id + i)
+        topic_tags = {topic: ids for topic, ids in topic_tags.items()
+                      if ids}
+        topics = list(topic_tags)
+        counts['tags'] = copy_rows(
+            cursor, 'events_tag', ('id', 'name'),
+            ((first_tag_id + i, f'{prefix}{topic}_{i}')
+             for i, topic in enumerate(tag_topics))
+        )
+
+        popularity = Zipf(events, rng)
+        event_order = Permutation(events, rng)
+        user_rank = Zipf(users, rng)
+        user_order = Permutation(users, rng)
+        topic_rank = Zipf(len(topics), rng)
+        city_rank = Zipf(len(CITIES), rng)
+        centers = [rng.uniform(-DAYS, DAYS) for _ in range(CLUSTERS)]
+
+        def pick_user():
+            return first_user_id + user_order(user_rank())
+
+        def pick_event():
+            return first_event_id + event_order(popularity())
+
+        def reservation_count(index):
+            expected = reservations * popularity.share(
+                event_order.rank(index)
+            )
+            # Random rounding keeps the expected total
+            count = int(expected + rng.random())
+            return min(count, users)
+
+        # Kept per event for the following passes
+        starts = array('i')
+        states = array('b')
+        event_topics = array('b')
+        booked = array('I')
+
+        def event_rows():
+            for i in range(events):
+                offset = start_offset(rng, centers)
+                start_time = today + timedelta(minutes=offset)
+                if rng.random() < CANCELLED_SHARE:
+                    status = 'cancelled'
+                elif start_time < now:
+                    status = 'completed'
+                else:
+                    status = 'upcoming'
+                topic_index = topic_rank()
+                topic = topics[topic_index]
+                starts.append(offset)
+                states.append(0 if status == 'upcoming' else
+                              1 if status == 'completed' else 2)
+                event_topics.append(topic_index)
+                booked.append(reservation_count(i))
+
+                words = rng.sample(WORDS[topic], 2)
+                city = CITIES[city_rank()]
+                created_at = min(now, start_time) - timedelta(
+                    days=rng.randint(1, 120)
+                )
+                seats = max(rng.randint(20, 500), math.ceil(booked[i] * 1.2))
+                yield (first_event_id + i,
+                       f'{words[0].title()} {city} {i}',
+                       f'A {words[0]} and {words[1]} in {city}.',
+                       start_time, city, seats, status, pick_user(),
+                       created_at, created_at)
+
+        counts['events'] = copy_rows(
+            cursor, 'events_event',
+            ('id', 'name', 'description', 'start_time', 'location',
+             'available_seats', 'status', 'organizer_id', 'created_at',
+             'updated_at'),
+            event_rows()
+        )
+
+        def event_tag_rows():
+            for i in range(events):
+                own_tags = topic_tags[topics[event_topics[i]]]
+                chosen = set(rng.sample(own_tags,
+                                        min(len(own_tags),
+                                            rng.randint(1, 3))))
+                if rng.random() < CROSS_TOPIC_SHARE:
+                    chosen.add(rng.choice(
+                        topic_tags[topics[topic_rank()]]
+                    ))
+                for tag_id in chosen:
+                    yield first_event_id + i, tag_id
+
+        counts['event_tags'] = copy_rows(
+            cursor, 'events_event_tags', ('event_id', 'tag_id'),
+            event_tag_rows()
+        )
+
+        # Completed events' confirmed reservations are rated at a rate
+        # that gives the requested number of ratings
+        past_reservations = sum(booked[i] for i in range(events)
+                                if states[i] == 1)
+        rating_rate = min(1, ratings / past_reservations) \
+            if past_reservations else 0
+        rated_users = array('i')
+        rated_events = array('i')
+
+        def reservation_rows():
+            for i in range(events):
+                if not booked[i]:
+                    continue
+                event_id = first_event_id + i
+                start_time = today + timedelta(minutes=starts[i])
+                for k in rng.sample(range(users), booked[i]):
+                    user_id = first_user_id + user_order(k)
+                    cancelled = rng.random() < CANCELLED_RESERVATION_SHARE
+                    if (states[i] == 1 and not cancelled
+                            and rng.random() < rating_rate):
+                        rated_users.append(user_id)
+                        rated_events.append(event_id)
+                    yield (user_id, event_id,
+                           'cancelled' if cancelled else 'confirmed',
+                           min(now, start_time) - timedelta(
+                               hours=rng.randint(1, 24 * 60)
+                           ))
+
+        counts['reservations'] = copy_rows(
+            cursor, 'events_reservation',
+            ('user_id', 'event_id', 'status', 'created_at'),
+            reservation_rows()
+        )
+
+        counts['ratings'] = copy_rows(
+            cursor, 'events_rating',
+            ('user_id', 'event_id', 'rating', 'comment', 'created_at'),
+            ((user_id, event_id, min(5, max(1, round(rng.gauss(4, 1)))),
+              '', now)
+             for user_id, event_id in zip(rated_users, rated_events))
+        )
+
+        def notification_rows():
+            for _ in range(notifications):
+                event_id = pick_event()
+                created_at = now - timedelta(minutes=rng.randint(0, 129600))
+                yield (pick_user(), rng.choice(NOTIFICATION_TYPES),
+                       'Event update', f'Event {event_id} was updated.',
+                       'sent', rng.random() < 0.7, created_at, created_at,
+                       event_type_id, event_id, '{}')
+
+        counts['notifications'] = copy_rows(
+            cursor, 'notifications_notification',
+            ('recipient_id', 'notification_type', 'title', 'message',
+             'status', 'is_read', 'created_at', 'sent_at',
+             'content_type_id', 'object_id', 'related_object_ids'),
+            notification_rows()
+        )
+
+        cursor.execute(
+            "UPDATE events_event SET search_vector = to_tsvector("
+            "concat_ws(' ', name, description, location)) "
+            "WHERE id >= %s",
+            [first_event_id]
+        )
+        # Ids were copied explicitly, sequences have to catch up
+        for table in ('auth_user', 'events_tag', 'events_event'):
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT MAX(id) FROM {table}))"
+            )
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--events', type=int, default=100000)
+    for name in ('users', 'tags', 'reservations', 'ratings',
+                 'notifications'):
+        parser.add_argument(f'--{name}', type=int,
+                            help='default is relative to --events')
+    parser.add_argument('--prefix', default='load_',
+                        help='prefix of generated user and tag names')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed, same seed gives same dataset')
+    args = parser.parse_args()
+
+    sizes = default_sizes(args.events)
+    for name in sizes:
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+
+    setup_django()
+    started = time.perf_counter()
+    counts = generate(**sizes, prefix=args.prefix, seed=args.seed)
+    print(', '.join(f'{count} {name}' for name, count in counts.items()),
+          f'generated in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,13 @@
 import asyncio
+import os
 from concurrent import futures
 
 import grpc
+from prometheus_client import start_http_server
 
 from grpc_server import notifications_pb2
+from grpc_server.metrics import MetricsInterceptor
+from grpc_server.tracing import TracingInterceptor, configure_tracing
 from grpc_server.notifications_pb2_grpc import (
     NotificationServiceServicer,
     add_NotificationServiceServicer_to_server
@@ -41,13 +45,21 @@ async def serve():
     """
     Start the gRPC server
     """
-    server = grpc.aio.server(futures.ThreadPoolExecutor(max_workers=10))
+    configure_tracing('grpc', os.getenv('TRACING_EXPORTER', ''))
+    server = grpc.aio.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        interceptors=[TracingInterceptor(), MetricsInterceptor()]
+    )
     add_NotificationServiceServicer_to_server(
         NotificationServicer(), server
     )
     server.add_insecure_port('[::]:50051')
     await server.start()
     print("gRPC server started on port 50051")
+    metrics_port = int(os.getenv('GRPC_METRICS_PORT', 9809))
+    if metrics_port:
+        start_http_server(metrics_port)
+        print(f"Metrics served on port {metrics_port}")
     try:
         await server.wait_for_termination()
     except KeyboardInterrupt:
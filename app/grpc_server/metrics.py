@@ -0,0 +1,43 @@
+"""
+Prometheus metrics of the gRPC server. The histogram's count by method
+and status code gives the throughput.
+"""
+import time
+
+import grpc
+from prometheus_client import Histogram
+
+RPC_LATENCY = Histogram(
+    'grpc_server_handling_seconds', 'Latency of RPCs handled by the server',
+    ['method', 'code']
+)
+
+
+class MetricsInterceptor(grpc.aio.ServerInterceptor):
+    """Observes the latency and status code of unary RPCs"""
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or handler.unary_unary is None:
+            return handler
+
+        method = handler_call_details.method
+        behavior = handler.unary_unary
+
+        async def observed(request, context):
+            started = time.perf_counter()
+            code = grpc.StatusCode.OK
+            try:
+                return await behavior(request, context)
+            except Exception:
+                code = context.code() or grpc.StatusCode.UNKNOWN
+                raise
+            finally:
+                RPC_LATENCY.labels(method, code.name).observe(
+                    time.perf_counter() - started
+                )
+
+        return grpc.unary_unary_rpc_method_handler(
+            observed,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer
+        )
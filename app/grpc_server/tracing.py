@@ -0,0 +1,72 @@
+"""
+OpenTelemetry setup shared by the Django processes and the gRPC server,
+which only ships this package. Spans are exported locally, so no
+collector is needed: TRACING_EXPORTER=console prints them, any other
+value is a file path they are appended to as JSON lines. Without it no
+tracer provider is set and spans are no-ops.
+
+The trace context travels in W3C traceparent headers, in Celery task
+headers and in gRPC metadata.
+"""
+import grpc
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, \
+    ConsoleSpanExporter
+from opentelemetry.trace import SpanKind
+
+tracer = trace.get_tracer(__name__)
+
+
+def configure_tracing(service_name, exporter):
+    """Sets the global tracer provider, returns False if tracing is off"""
+    if not exporter:
+        return False
+    if exporter == 'console':
+        span_exporter = ConsoleSpanExporter()
+    else:
+        span_exporter = ConsoleSpanExporter(
+            out=open(exporter, 'a', buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + '\n'
+        )
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': service_name})
+    )
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    return True
+
+
+def trace_metadata():
+    """Context of the current span as gRPC metadata"""
+    carrier = {}
+    propagate.inject(carrier)
+    return tuple(carrier.items())
+
+
+class TracingInterceptor(grpc.aio.ServerInterceptor):
+    """Runs unary RPCs in a span continuing the caller's trace"""
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or handler.unary_unary is None:
+            return handler
+
+        method = handler_call_details.method
+        parent = propagate.extract(
+            dict(handler_call_details.invocation_metadata or ())
+        )
+        behavior = handler.unary_unary
+
+        async def traced(request, context):
+            with tracer.start_as_current_span(
+                method, context=parent, kind=SpanKind.SERVER,
+                attributes={'rpc.system': 'grpc', 'rpc.method': method}
+            ):
+                return await behavior(request, context)
+
+        return grpc.unary_unary_rpc_method_handler(
+            traced,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer
+        )
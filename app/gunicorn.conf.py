@@ -0,0 +1,13 @@
+"""
+Gunicorn hooks of the web and asgi servers. Gunicorn loads this file
+from the working directory, the asgi container passes it with --config.
+"""
+from event_calendar import metrics
+
+
+def on_starting(server):
+    metrics.reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,19 @@
+from rest_framework.exceptions import NotAuthenticated
+
+from event_calendar.async_views import async_api_view, paginate, render
+from event_calendar.authentication import aget_user_id
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+
+
+@async_api_view
+async def notification_list(request):
+    """Async variant of GET /api/notifications/"""
+    user_id = await aget_user_id(request)
+    if user_id is None:
+        raise NotAuthenticated()
+
+    queryset = Notification.objects.filter(
+        recipient_id=user_id
+    ).select_related('recipient').order_by('-created_at')
+    return render(await paginate(request, queryset, NotificationSerializer))
@@ -1,5 +1,16 @@
 import os
+import time
+
 from celery import Celery
+from celery.signals import after_task_publish, before_task_publish, \
+    celeryd_init, task_failure, task_prerun, task_postrun, task_retry, \
+    worker_process_init, worker_process_shutdown, worker_ready
+from django.conf import settings
+from prometheus_client import start_http_server
+
+from event_calendar import metrics, tracing
+from event_calendar.db_routers import reset_replica_reads, \
+    set_replica_reads
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_calendar.settings')
@@ -13,6 +24,108 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+# Routing of the context the tasks were called from by task id
+_task_read_tokens = {}
+
+
+@task_prerun.connect
+def route_task_reads(task_id=None, task=None, **kwargs):
+    """Tasks declared with replica_reads=True read from the replica"""
+    _task_read_tokens[task_id] = set_replica_reads(
+        getattr(task, 'replica_reads', False)
+    )
+
+
+@task_postrun.connect
+def reset_task_reads(task_id=None, **kwargs):
+    # Eager tasks run in the caller's context, restore its routing
+    token = _task_read_tokens.pop(task_id, None)
+    if token is not None:
+        reset_replica_reads(token)
+
+
+# Start times of the tasks running in this process by task id
+_task_started = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.TASK_DURATION.labels(task.name, state).observe(
+            time.perf_counter() - started
+        )
+    metrics.record_pool_usage()
+
+
+@task_failure.connect
+def count_task_failure(sender=None, **kwargs):
+    metrics.TASK_FAILURES.labels(sender.name).inc()
+
+
+@task_retry.connect
+def count_task_retry(sender=None, **kwargs):
+    metrics.TASK_RETRIES.labels(sender.name).inc()
+
+
+@celeryd_init.connect
+def reset_metrics(**kwargs):
+    # Runs in the main process before the pool children are forked
+    metrics.reset_multiprocess_dir()
+
+
+@worker_ready.connect
+def serve_metrics(**kwargs):
+    if not settings.METRICS_WORKER_PORT:
+        return
+    registry = metrics.scrape_registry()
+    registry.register(metrics.QueueLengthCollector(
+        app, settings.METRICS_CELERY_QUEUES
+    ))
+    start_http_server(settings.METRICS_WORKER_PORT, registry=registry)
+
+
+@worker_process_shutdown.connect
+def remove_process_metrics(pid=None, **kwargs):
+    metrics.mark_process_dead(pid)
+
+
+@before_task_publish.connect
+def start_publish_span(sender=None, headers=None, **kwargs):
+    tracing.start_publish_span(sender, headers)
+
+
+@after_task_publish.connect
+def end_publish_span(headers=None, **kwargs):
+    tracing.end_publish_span(headers)
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    tracing.start_task_span(task, task_id)
+
+
+@task_failure.connect
+def record_task_exception(task_id=None, exception=None, **kwargs):
+    tracing.record_task_exception(task_id, exception)
+
+
+@task_postrun.connect
+def end_task_span(task_id=None, state=None, **kwargs):
+    tracing.end_task_span(task_id, state)
+
+
+@worker_process_init.connect
+def setup_worker_tracing(**kwargs):
+    # Each prefork child exports its own spans
+    tracing.setup_tracing('celery')
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
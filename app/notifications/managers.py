@@ -1,5 +1,19 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from event_calendar.versions import bump_versions, get_version
+
+# Version of a recipient's notifications, for conditional GET of the list
+NOTIFICATION_LIST_VERSION = 'notification-list'
+
+
+def unread_count_key(recipient_id, version):
+    return f'notifications:unread:{recipient_id}:{version}'
 
 
 class NotificationManager(models.Manager):
@@ -14,3 +28,172 @@ class NotificationManager(models.Manager):
             return self.get_queryset().get(*args, **kwargs)
         except ObjectDoesNotExist:
             return None
+
+    def unread_count(self, recipient_id):
+        """
+        Returns the recipient's unread notifications count from cache,
+        recounting it on the primary on a miss. Counts are cached per
+        list version, which every write bumps after commit, so a count
+        taken while a write was committing is never read after the bump.
+        """
+        key = unread_count_key(
+            recipient_id, get_version(NOTIFICATION_LIST_VERSION, recipient_id)
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().get_queryset().using(
+                router.db_for_write(self.model)
+            ).filter(recipient_id=recipient_id, is_read=False).count()
+            cache.set(key, count, settings.NOTIFICATION_UNREAD_COUNT_TIMEOUT)
+        return count
+
+    def invalidate_lists(self, recipient_ids):
+        """Bumps list versions of recipients after the transaction"""
+        recipient_ids = list(recipient_ids)
+        transaction.on_commit(
+            lambda: bump_versions(NOTIFICATION_LIST_VERSION, recipient_ids),
+            using=router.db_for_write(self.model)
+        )
+
+    def mark_as_read(self, recipient_id, ids=None):
+        """
+        Marks recipient's unread notifications as read in one query,
+        limited to ids if given. Returns number of updated notifications.
+        """
+        queryset = super().get_queryset().filter(
+            recipient_id=recipient_id, is_read=False
+        )
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        updated = queryset.update(is_read=True)
+        if updated:
+            self.invalidate_lists([recipient_id])
+        return updated
+
+    def delete_expired(self, notification_type, before, batch_size):
+        """
+        Deletes notifications of the given type created before the cutoff.
+        Works in batches, each in its own short transaction, and skips rows
+        locked by senders so no long locks are held.
+        Returns number of deleted notifications.
+        """
+        # self.db follows reads, which may go to the replica
+        using = router.db_for_write(self.model)
+        connection = connections[using]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        deleted = 0
+        while True:
+            with transaction.atomic(using=using):
+                rows = list(
+                    super().get_queryset().using(using).select_for_update(
+                        skip_locked=True
+                    ).filter(
+                        notification_type=notification_type,
+                        created_at__lt=before
+                    ).order_by('created_at').values_list(
+                        'id', 'recipient_id'
+                    )[:batch_size]
+                )
+                if not rows:
+                    break
+                # Raw delete skips per-row signals, lists and counters
+                # are invalidated for the whole batch instead
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'DELETE FROM {table} WHERE id = ANY(%s)',
+                        [[pk for pk, _ in rows]]
+                    )
+                self.invalidate_lists(
+                    {recipient_id for _, recipient_id in rows}
+                )
+            deleted += len(rows)
+        return deleted
+
+    @transaction.atomic
+    def merge_into_digests(self, notification_type, content_type, items):
+        """
+        Merges items into the open digests of their recipients, opening
+        new digests where there are none, with one query for the
+        notifications of the digest window and bulk writes.
+        items maps recipient ids to (object_id, title, message) tuples.
+        Items covered by a notification of the window are skipped.
+        Returns (created digests, ids of recipients sent a notification
+        of the type within the window) tuple.
+        """
+        since = timezone.now() - settings.NOTIFICATION_DIGEST_WINDOW
+        recent = list(super().get_queryset().select_for_update().filter(
+            recipient_id__in=items,
+            notification_type=notification_type,
+            created_at__gte=since
+        ).order_by('created_at'))
+
+        open_digests = {}
+        covered = defaultdict(set)
+        notified = set()
+        for notification in recent:
+            covered[notification.recipient_id].update(
+                notification.related_object_ids
+            )
+            if notification.status != 'pending':
+                notified.add(notification.recipient_id)
+            elif not notification.is_read:
+                # The latest pending, unread one is merged into
+                open_digests[notification.recipient_id] = notification
+
+        created, updated = [], []
+        for recipient_id, recipient_items in items.items():
+            recipient_items = [
+                item for item in recipient_items
+                if item[0] not in covered[recipient_id]
+            ]
+            if not recipient_items:
+                continue
+            digest = open_digests.get(recipient_id)
+            if digest is None:
+                digest = self.model(
+                    recipient_id=recipient_id,
+                    notification_type=notification_type,
+                    status='pending',
+                    message='',
+                    content_type=content_type,
+                    object_id=recipient_items[0][0],
+                )
+                created.append(digest)
+            else:
+                updated.append(digest)
+            self._merge(digest, recipient_items)
+
+        self.bulk_create(created)
+        self.bulk_update(updated, ['title', 'message', 'related_object_ids'])
+        # Bulk writes bypass post_save, lists are invalidated here and
+        # the caller publishes the created digests
+        self.invalidate_lists({digest.recipient_id
+                               for digest in created + updated})
+        return created, notified
+
+    def _merge(self, digest, items):
+        messages = [digest.message] if digest.message else []
+        title = digest.title
+        for object_id, item_title, message in items:
+            digest.related_object_ids.append(object_id)
+            messages.append(message)
+            title = item_title
+
+        digest.message = '\n'.join(messages)
+        if digest.is_digest:
+            digest.title = (f'{digest.get_notification_type_display()}: '
+                            f'{len(digest.related_object_ids)} events')
+        else:
+            digest.title = title
+
+
+class NotificationPreferenceManager(models.Manager):
+    def digest_recipients(self, user_ids):
+        """
+        Returns the subset of user_ids that receive digests.
+        Users without a preference row are opted in by default.
+        """
+        opted_out = self.get_queryset().filter(
+            user_id__in=user_ids, digest_enabled=False
+        ).values_list('user_id', flat=True)
+        return set(user_ids) - set(opted_out)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_retention_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('booking', 'Booking Confirmation'), ('cancellation', 'Event Cancellation'), ('reminder', 'Event Reminder'), ('event_update', 'Event Update'), ('rating_prompt', 'Rating Request')], max_length=20),
+        ),
+    ]
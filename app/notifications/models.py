@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
-from notifications.managers import NotificationManager
+from notifications.managers import NotificationManager, \
+    NotificationPreferenceManager
 
 
 class Notification(models.Model):
@@ -12,10 +14,12 @@ class Notification(models.Model):
         ('cancellation', 'Event Cancellation'),
         ('reminder', 'Event Reminder'),
         ('event_update', 'Event Update'),
+        ('rating_prompt', 'Rating Request'),
     )
 
     STATUS_CHOICES = (
         ('pending', 'Pending'),
+        ('sending', 'Sending'),
         ('sent', 'Sent'),
         ('failed', 'Failed'),
     )
@@ -36,6 +40,9 @@ class Notification(models.Model):
                                      null=True, blank=True)
     object_id = models.PositiveIntegerField(null=True, blank=True)
     content_object = GenericForeignKey('content_type', 'object_id')
+    # Ids of all objects a digest notification covers
+    related_object_ids = ArrayField(models.PositiveIntegerField(),
+                                    default=list, blank=True)
 
     objects = NotificationManager()
 
@@ -43,9 +50,32 @@ class Notification(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['recipient', 'status']),
-            models.Index(fields=['notification_type']),
+            # Serves recipient's inbox in default ordering
+            models.Index(fields=['recipient', '-created_at']),
+            # Serves retention purge per notification type
+            models.Index(fields=['notification_type', 'created_at']),
+            # Unread counter recount scans only unread rows
+            models.Index(fields=['recipient'],
+                         condition=models.Q(is_read=False),
+                         name='notification_unread_idx'),
         ]
 
     def __str__(self):
         return (f"Notification {self.pk} - {self.notification_type} "
                 f"- {self.status}")
+
+    @property
+    def is_digest(self):
+        return len(self.related_object_ids) > 1
+
+
+class NotificationPreference(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                related_name='notification_preference')
+    digest_enabled = models.BooleanField(default=True)
+
+    objects = NotificationPreferenceManager()
+
+    def __str__(self):
+        return (f"Notification preference {self.pk} - "
+                f"{self.user_id} - digest {self.digest_enabled}")
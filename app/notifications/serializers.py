@@ -1,15 +1,43 @@
 from rest_framework import serializers
-from notifications.models import Notification
+from event_calendar.instrumentation import TimedSerializerMixin
+from notifications.models import Notification, NotificationPreference
 from events.serializers import UserSerializer
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     recipient = UserSerializer(read_only=True)
 
     class Meta:
         model = Notification
         fields = [
             'id', 'recipient', 'notification_type', 'title',
-            'message', 'status', 'created_at', 'sent_at'
+            'message', 'status', 'is_read', 'created_at', 'sent_at',
+            'related_object_ids'
         ]
-        read_only_fields = ['recipient', 'status', 'created_at', 'sent_at']
+        read_only_fields = ['recipient', 'status', 'is_read', 'created_at',
+                            'sent_at', 'related_object_ids']
+
+
+class NotificationStreamSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'notification_type', 'title', 'message', 'status',
+            'is_read', 'created_at', 'related_object_ids'
+        ]
+
+
+class NotificationIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class NotificationPreferenceSerializer(TimedSerializerMixin,
+                                       serializers.ModelSerializer):
+    class Meta:
+        model = NotificationPreference
+        fields = ['digest_enabled']
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from notifications.models import Notification
+from notifications.stream import publish_notifications
+
+
+@receiver(post_save, sender=Notification)
+def publish_to_stream(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_notifications([instance]))
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_list(sender, instance, **kwargs):
+    # Unread counts are cached per list version as well
+    Notification.objects.invalidate_lists([instance.recipient_id])
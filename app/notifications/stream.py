@@ -0,0 +1,208 @@
+"""
+Server-Sent Events push channel for notifications.
+
+New notifications are published to Redis per recipient. Each ASGI process
+holds one pattern subscription and fans messages out to the streams
+connected to it, so idle clients cost a queue rather than a connection.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from redis import asyncio as aioredis
+
+from event_calendar.authentication import aget_user_id
+from notifications.models import Notification
+from notifications.serializers import NotificationStreamSerializer
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'notifications:stream:'
+REPLAY_LIMIT = 100
+QUEUE_SIZE = 100
+RECONNECT_DELAY = 1
+SUBSCRIBE_TIMEOUT = 5
+
+_publisher = None
+
+
+def _get_publisher():
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.REDIS_URL)
+    return _publisher
+
+
+def publish_notifications(notifications):
+    """
+    Publishes notifications to their recipients' streams.
+    Failures are logged, clients catch up on reconnect.
+    """
+    if not settings.NOTIFICATION_STREAM_ENABLED or not notifications:
+        return
+    try:
+        pipeline = _get_publisher().pipeline(transaction=False)
+        for notification in notifications:
+            payload = NotificationStreamSerializer(notification).data
+            pipeline.publish(f'{CHANNEL_PREFIX}{notification.recipient_id}',
+                             json.dumps(payload, default=str))
+        pipeline.execute()
+    except redis.RedisError as e:
+        logger.warning('Failed to publish notifications: %s', e)
+
+
+class NotificationBroker:
+    """
+    Fans out messages of a single Redis subscription to per-user queues
+    of the streams connected to this process.
+    """
+    def __init__(self):
+        self._queues = defaultdict(set)
+        self._listener = None
+        self._subscribed = None
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._queues[user_id].add(queue)
+        # Listener is restarted if it died or belongs to another event loop
+        loop = asyncio.get_running_loop()
+        if (self._listener is None or self._listener.done()
+                or self._listener.get_loop() is not loop):
+            self._subscribed = asyncio.Event()
+            self._listener = loop.create_task(self._listen())
+        return queue
+
+    async def wait_subscribed(self):
+        """
+        Waits until Redis confirmed the subscription, messages published
+        from then on reach the queues. Returns False on timeout.
+        """
+        try:
+            await asyncio.wait_for(self._subscribed.wait(),
+                                   SUBSCRIBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._queues.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._queues[user_id]
+
+    def dispatch(self, user_id, payload):
+        for queue in self._queues.get(user_id, ()):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Slow client, it replays missed notifications on reconnect
+                pass
+
+    async def _listen(self):
+        while self._queues:
+            try:
+                # Closing the client releases its pool on reconnect
+                async with aioredis.Redis.from_url(
+                    settings.REDIS_URL
+                ) as client, client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+                    async for message in pubsub.listen():
+                        # psubscribe returns before Redis confirms it
+                        if message['type'] == 'psubscribe':
+                            self._subscribed.set()
+                            continue
+                        if message['type'] != 'pmessage':
+                            continue
+                        channel = message['channel'].decode()
+                        user_id = int(channel[len(CHANNEL_PREFIX):])
+                        self.dispatch(user_id, message['data'].decode())
+                        if not self._queues:
+                            break
+            except (redis.RedisError, OSError) as e:
+                logger.warning('Notification stream subscription lost: %s', e)
+                self._subscribed.clear()
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+broker = NotificationBroker()
+
+
+def _format_event(notification_id, data):
+    return f'id: {notification_id}\nevent: notification\ndata: {data}\n\n'
+
+
+def _get_last_event_id(request):
+    last_event_id = (request.headers.get('Last-Event-ID')
+                     or request.GET.get('last_event_id'))
+    try:
+        return int(last_event_id)
+    except (TypeError, ValueError):
+        return None
+
+
+@sync_to_async
+def _get_missed(user_id, last_event_id):
+    notifications = Notification.objects.filter(
+        recipient_id=user_id, id__gt=last_event_id
+    ).order_by('id')[:REPLAY_LIMIT]
+    return NotificationStreamSerializer(notifications, many=True).data
+
+
+async def _event_stream(user_id, last_event_id):
+    queue = broker.subscribe(user_id)
+    try:
+        yield f'retry: {settings.NOTIFICATION_STREAM_RETRY * 1000}\n\n'
+
+        # Replay only once subscribed, so nothing created in between is
+        # lost. Duplicates of the replay in the queue are skipped below.
+        if not await broker.wait_subscribed():
+            logger.warning('Notification stream subscription not confirmed')
+        if last_event_id is not None:
+            for payload in await _get_missed(user_id, last_event_id):
+                last_event_id = payload['id']
+                yield _format_event(payload['id'],
+                                    json.dumps(payload, default=str))
+
+        while True:
+            try:
+                data = await asyncio.wait_for(
+                    queue.get(), settings.NOTIFICATION_STREAM_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+
+            notification_id = json.loads(data)['id']
+            if last_event_id is not None and notification_id <= last_event_id:
+                continue
+            yield _format_event(notification_id, data)
+    finally:
+        broker.unsubscribe(user_id, queue)
+
+
+@require_GET
+async def stream_notifications(request):
+    """
+    Streams the user's new notifications as Server-Sent Events.
+    Reconnecting clients get missed notifications after Last-Event-ID.
+    """
+    # EventSource can't set headers, the JWT may come as ?token=
+    user_id = await aget_user_id(request, allow_query_token=True)
+    if user_id is None:
+        return HttpResponse(status=401)
+
+    response = StreamingHttpResponse(
+        _event_stream(int(user_id), _get_last_event_id(request)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
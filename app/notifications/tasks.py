@@ -1,7 +1,12 @@
 import grpc
 from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from opentelemetry.trace import SpanKind
 
+from event_calendar.tracing import tracer
 from grpc_server import notifications_pb2, notifications_pb2_grpc
+from grpc_server.tracing import trace_metadata
 from notifications.models import Notification
 
 
@@ -10,16 +15,22 @@ def send_notification_via_grpc(notification_id):
     """
     Send notification via gRPC NotificationService
     """
-    notification = Notification.objects.get_or_none(id=notification_id)
+    # Claimed in its own short UPDATE, no transaction or row lock is held
+    # during the call. A digest being sent is no longer merged into.
+    claimed = Notification.objects.filter(
+        id=notification_id, status='pending'
+    ).update(status='sending')
+    notification = Notification.objects.filter(id=notification_id).first()
 
     if notification is None:
         return f'Notification {notification_id} not found'
 
-    if notification.status != 'pending':
+    if not claimed:
         return f'Notification {notification_id} is already processed'
 
     try:
-        with grpc.insecure_channel('grpc:50051') as channel:
+        target = settings.GRPC_NOTIFICATION_TARGET
+        with grpc.insecure_channel(target) as channel:
             stub = notifications_pb2_grpc.NotificationServiceStub(channel)
 
             request = notifications_pb2.NotificationRequest(
@@ -33,19 +44,46 @@ def send_notification_via_grpc(notification_id):
                 related_object_id=notification.object_id
             )
 
-            response = stub.SendNotification(request)
+            with tracer.start_as_current_span(
+                'grpc /grpc_server.NotificationService/SendNotification',
+                kind=SpanKind.CLIENT
+            ):
+                response = stub.SendNotification(
+                    request, metadata=trace_metadata()
+                )
 
             if response.success:
                 notification.status = 'sent'
-                notification.save()
+                notification.save(update_fields=['status'])
                 return f'Notification {notification_id} sent via gRPC'
             else:
                 notification.status = 'failed'
-                notification.save()
+                notification.save(update_fields=['status'])
                 return f'gRPC error: {response.message}'
 
     except Exception as e:
-        if notification:
-            notification.status = 'failed'
-            notification.save()
+        notification.status = 'failed'
+        notification.save(update_fields=['status'])
         return f'Exception while sending notification via gRPC: {str(e)}'
+
+
+@shared_task(queue='default')
+def purge_expired_notifications():
+    """
+    Delete notifications older than their type's retention period
+    """
+    try:
+        now = timezone.now()
+        deleted = 0
+        for notification_type, _ in Notification.TYPE_CHOICES:
+            retention = settings.NOTIFICATION_RETENTION.get(
+                notification_type, settings.NOTIFICATION_RETENTION_DEFAULT
+            )
+            deleted += Notification.objects.delete_expired(
+                notification_type,
+                before=now - retention,
+                batch_size=settings.NOTIFICATION_PURGE_BATCH_SIZE
+            )
+        return f'Purged {deleted} expired notifications'
+    except Exception as e:
+        return f'Failed to purge expired notifications with: {e}'
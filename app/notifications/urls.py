@@ -1,5 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from notifications.async_views import notification_list
+from notifications.stream import stream_notifications
 from notifications.views import NotificationViewSet
 
 router = DefaultRouter()
@@ -7,5 +9,9 @@ router.register(r'notifications', NotificationViewSet,
                 basename='notification')
 
 urlpatterns = [
+    path('notifications/stream/', stream_notifications,
+         name='notification-stream'),
+    path('async/notifications/', notification_list,
+         name='async-notification-list'),
     path('', include(router.urls)),
 ]
@@ -1,9 +1,15 @@
+from django.utils.cache import patch_vary_headers
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from notifications.models import Notification
-from notifications.serializers import NotificationSerializer
+from event_calendar.conditional import conditional_get
+from event_calendar.db_routers import replica_reads
+from event_calendar.versions import get_version
+from notifications.managers import NOTIFICATION_LIST_VERSION
+from notifications.models import Notification, NotificationPreference
+from notifications.serializers import NotificationSerializer, \
+    NotificationPreferenceSerializer, NotificationIdsSerializer
 
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
@@ -16,6 +22,19 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         ).order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
+        def respond():
+            # A lagging replica would pair an old page with the ETag
+            with replica_reads(False):
+                return self.list_notifications(request)
+        response = conditional_get(
+            request,
+            get_version(NOTIFICATION_LIST_VERSION, request.user.id),
+            respond, request.user.id
+        )
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
+
+    def list_notifications(self, request):
         queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -33,14 +52,42 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         notification = self.get_object()
-        notification.is_read = True
-        notification.save(update_fields=['is_read'])
+        Notification.objects.mark_as_read(request.user.id, [notification.id])
         return Response({'status': 'notification marked as read'})
 
+    @action(detail=False, methods=['post'], url_path='mark_as_read',
+            serializer_class=NotificationIdsSerializer)
+    def mark_many_as_read(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = Notification.objects.mark_as_read(
+            request.user.id, serializer.validated_data['ids']
+        )
+        return Response({'status': f'{updated} notifications marked as read'})
+
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
-        Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).update(is_read=True)
+        Notification.objects.mark_as_read(request.user.id)
         return Response({'status': 'all notifications marked as read'})
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({
+            'unread_count': Notification.objects.unread_count(request.user.id)
+        })
+
+    @action(detail=False, methods=['get', 'patch'],
+            serializer_class=NotificationPreferenceSerializer)
+    def preferences(self, request):
+        preference, _ = NotificationPreference.objects.get_or_create(
+            user=request.user
+        )
+        if request.method == 'GET':
+            return Response(self.get_serializer(preference).data)
+
+        serializer = self.get_serializer(
+            preference, data=request.data, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
@@ -0,0 +1,43 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from profiling.models import Profile
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'mode', 'duration_ms', 'user',
+                    'created_at', 'download')
+    list_filter = ('kind', 'mode')
+    search_fields = ('name',)
+    exclude = ('data',)
+    readonly_fields = ('kind', 'name', 'mode', 'user', 'duration_ms',
+                       'created_at', 'download')
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='profiling_profile_download'),
+        ] + super().get_urls()
+
+    @admin.display(description='Download')
+    def download(self, profile):
+        url = reverse('admin:profiling_profile_download', args=[profile.pk])
+        return format_html('<a href="{}">{}</a>', url, profile.filename)
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(Profile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            return HttpResponse(status=403)
+        response = HttpResponse(bytes(profile.data),
+                                content_type='application/octet-stream')
+        response['Content-Disposition'] = \
+            f'attachment; filename="{profile.filename}"'
+        return response
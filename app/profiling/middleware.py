@@ -0,0 +1,121 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, \
+    sync_to_async
+from django.conf import settings
+
+from event_calendar.authentication import get_raw_token, get_token_user
+from profiling.models import Profile
+from profiling.profilers import PROFILERS, is_profiling
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+
+
+def requested_mode(request):
+    """
+    Profiler asked for with the X-Profile header or ?profile=, either
+    'sample', 'cprofile' or any other value for the default sampler
+    """
+    flag = request.headers.get(PROFILE_HEADER) or \
+        request.GET.get(PROFILE_PARAM)
+    if not flag:
+        return None
+    return flag if flag in PROFILERS else 'sample'
+
+
+def get_staff_user(request):
+    """
+    Active staff user of the request's JWT or session, otherwise None.
+    Tokens go through the checks of CachedJWTAuthentication, so revoked
+    tokens don't profile.
+    """
+    raw_token = get_raw_token(request)
+    user = get_token_user(raw_token) if raw_token else request.user
+    if user is None or not (user.is_active and user.is_staff):
+        return None
+    return user
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests of staff users that ask for it with the X-Profile
+    header or the profile query param. The profile is saved for download
+    from the admin and its id returned in the X-Profile-Id header.
+    Other requests only pay for the flag lookup.
+
+    One request is profiled at a time per process, requests asking for
+    a profile while another one runs aren't profiled. The sampler records
+    the thread of the request, for async requests the event loop thread.
+    Work an async view hands to sync_to_async, e.g. ORM queries, shows up
+    there as the time spent awaiting it. cProfile records the same thread
+    before Python 3.12, since then it records every thread of the
+    process, including requests served concurrently.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        mode = self.get_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        profiler = PROFILERS[mode]()
+        started = time.perf_counter()
+        try:
+            profiled = profiler.start()
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        if profiled:
+            self.save(request, response, profiler,
+                      time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        # Checked before the thread hop, which only staff requests pay
+        mode = None
+        if requested_mode(request) and not is_profiling():
+            mode = await sync_to_async(self.get_mode)(request)
+        if mode is None:
+            return await self.get_response(request)
+
+        # The event loop thread is sampled, concurrent requests on the
+        # same loop show up in the profile as well
+        profiler = PROFILERS[mode]()
+        started = time.perf_counter()
+        try:
+            profiled = profiler.start()
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+        if profiled:
+            await sync_to_async(self.save)(request, response, profiler,
+                                           time.perf_counter() - started)
+        return response
+
+    def get_mode(self, request):
+        if not settings.PROFILING_ENABLED or is_profiling():
+            return None
+        mode = requested_mode(request)
+        if mode is None:
+            return None
+        request.profile_user = get_staff_user(request)
+        return mode if request.profile_user is not None else None
+
+    def save(self, request, response, profiler, duration):
+        profile = Profile.objects.create(
+            kind='request', mode=profiler.mode,
+            name=f'{request.method} {request.get_full_path()}'[:1000],
+            user=request.profile_user, duration_ms=duration * 1000,
+            data=profiler.result()
+        )
+        response['X-Profile-Id'] = str(profile.pk)
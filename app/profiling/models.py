@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from profiling.profilers import PROFILERS
+
+
+class Profile(models.Model):
+    KIND_CHOICES = (
+        ('request', 'Request'),
+        ('task', 'Celery task'),
+    )
+    MODE_CHOICES = (
+        ('sample', 'Sampled stacks'),
+        ('cprofile', 'cProfile'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Method and path with query of a request, or the task name
+    name = models.CharField(max_length=1000)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True,
+                             blank=True, related_name='profiles')
+    duration_ms = models.FloatField()
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Profile {self.pk} - {self.name}'
+
+    @property
+    def filename(self):
+        return f'profile-{self.pk}.{PROFILERS[self.mode].extension}'
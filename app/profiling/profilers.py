@@ -0,0 +1,122 @@
+"""
+Profilers for single requests and tasks.
+
+SamplingProfiler is statistical: a background thread records the stack
+of the profiled thread every PROFILE_SAMPLE_INTERVAL seconds, so the
+overhead doesn't depend on how many calls are made. Its result is in
+the collapsed stack format of flamegraph.pl and speedscope.
+CProfiler records every call with cProfile, its result is a pstats file
+for snakeviz or `python -m pstats`. It records the thread that starts it
+before Python 3.12 and every thread of the process since.
+"""
+import cProfile
+import marshal
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+# Only one profiler runs in a process at a time. Since Python 3.12
+# cProfile hooks into the process-wide sys.monitoring, so a second one
+# fails to start and each records the calls of every thread
+_lock = threading.Lock()
+
+
+def is_profiling():
+    return _lock.locked()
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f'{frame.f_globals.get("__name__", "?")}.{code.co_qualname}'
+
+
+class Profiler:
+    def __init__(self):
+        self.running = False
+
+    def start(self):
+        """
+        Starts profiling and returns True, or returns False without
+        profiling while another profiler runs in the process
+        """
+        if not _lock.acquire(blocking=False):
+            return False
+        self.running = True
+        try:
+            self.enable()
+        except BaseException:
+            self.stop()
+            raise
+        return True
+
+    def stop(self):
+        """Stops profiling, does nothing if start didn't profile"""
+        if not self.running:
+            return
+        self.running = False
+        try:
+            self.disable()
+        finally:
+            _lock.release()
+
+
+class SamplingProfiler(Profiler):
+    mode = 'sample'
+    extension = 'folded'
+
+    def __init__(self):
+        super().__init__()
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def enable(self):
+        self.thread_id = threading.get_ident()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def sample(self):
+        interval = settings.PROFILE_SAMPLE_INTERVAL
+        while not self.stopped.wait(interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def disable(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def result(self):
+        return ''.join(f'{stack} {count}\n'
+                       for stack, count in self.stacks.items()).encode()
+
+
+class CProfiler(Profiler):
+    mode = 'cprofile'
+    extension = 'prof'
+
+    def __init__(self):
+        super().__init__()
+        self.profile = cProfile.Profile()
+
+    def enable(self):
+        self.profile.enable()
+
+    def disable(self):
+        self.profile.disable()
+
+    def result(self):
+        self.profile.create_stats()
+        # The format pstats.Stats.dump_stats writes
+        return marshal.dumps(self.profile.stats)
+
+
+PROFILERS = {profiler.mode: profiler
+             for profiler in (SamplingProfiler, CProfiler)}
@@ -0,0 +1,36 @@
+import random
+import time
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+
+from profiling.models import Profile
+from profiling.profilers import PROFILERS, is_profiling
+
+# Profilers of the tasks running in this process by task id
+_task_profiles = {}
+
+
+@task_prerun.connect
+def start_task_profile(task_id=None, task=None, **kwargs):
+    """Profiles a share of the runs of the tasks in PROFILE_TASKS"""
+    rate = settings.PROFILE_TASKS.get(task.name, 0)
+    if not settings.PROFILING_ENABLED or is_profiling() or \
+            random.random() >= rate:
+        return
+    profiler = PROFILERS[settings.PROFILE_TASK_MODE]()
+    if profiler.start():
+        _task_profiles[task_id] = (profiler, time.perf_counter())
+
+
+@task_postrun.connect
+def save_task_profile(task_id=None, task=None, **kwargs):
+    profiler, started = _task_profiles.pop(task_id, (None, None))
+    if profiler is None:
+        return
+    profiler.stop()
+    Profile.objects.create(
+        kind='task', mode=profiler.mode, name=task.name,
+        duration_ms=(time.perf_counter() - started) * 1000,
+        data=profiler.result()
+    )
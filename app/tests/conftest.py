@@ -1,8 +1,11 @@
 import pytest
 from celery import current_app
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
+from event_calendar.cache import clear_local_caches
+
 
 @pytest.fixture
 def api_client():
@@ -38,3 +41,23 @@ def celery_eager():
     current_app.conf.task_always_eager = True
     yield
     current_app.conf.task_always_eager = False
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    yield
+    cache.clear()
+    clear_local_caches()
+
+
+@pytest.fixture(autouse=True)
+def disable_background_scheduling(settings):
+    # Eager Celery would run scheduled tasks right away, ignoring eta
+    settings.NOTIFICATION_STREAM_ENABLED = False
+    settings.EVENT_STATUS_SCHEDULE_ON_SAVE = False
+    settings.TIERED_CACHE_BROADCAST = False
@@ -0,0 +1,108 @@
+import pytest
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.factories import EventFactory, NotificationFactory, \
+    ReservationFactory, TagFactory, UserFactory
+
+
+@pytest.mark.django_db
+class TestAsyncEventViews:
+    def test_list_matches_sync_endpoint(self, api_client):
+        tag = TagFactory()
+        EventFactory.create_batch(3, location='Berlin', tags=[tag])
+        EventFactory.create_batch(2, location='Paris')
+        ReservationFactory(event=EventFactory(location='Berlin'))
+
+        params = {'location': 'berlin', 'ordering': 'start_time'}
+        response = api_client.get('/api/async/events/', params)
+        expected = api_client.get('/api/events/', params)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == expected.json()
+        assert response.json()['count'] == 4
+
+    def test_list_pagination(self, api_client):
+        EventFactory.create_batch(12)
+
+        response = api_client.get('/api/async/events/', {'page': 2})
+        data = response.json()
+
+        assert len(data['results']) == 2
+        assert data['next'] is None
+        assert data['previous'].endswith('/api/async/events/')
+
+        response = api_client.get('/api/async/events/', {'page': 3})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_invalid_filter(self, api_client):
+        response = api_client.get('/api/async/events/', {'tags': 0})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'tags' in response.json()
+
+    def test_detail(self, api_client):
+        event = EventFactory()
+        ReservationFactory(event=event)
+
+        response = api_client.get(f'/api/async/events/{event.id}/')
+        expected = api_client.get(f'/api/events/{event.id}/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == expected.json()
+        assert response.json()['available_seats_count'] == 9
+
+        response = api_client.get(f'/api/async/events/{event.id + 1}/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_read_only(self, api_client):
+        response = api_client.post('/api/async/events/', {})
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+@pytest.mark.django_db
+class TestAsyncTagAndNotificationViews:
+    def test_tag_search(self, api_client):
+        TagFactory(name='music')
+        TagFactory(name='sport')
+
+        response = api_client.get('/api/async/tags/', {'search': 'mus'})
+
+        assert [tag['name'] for tag in response.json()['results']] == \
+            ['music']
+
+    def test_notifications_require_authentication(self, api_client):
+        response = api_client.get('/api/async/notifications/')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_notifications_of_user(self, api_client):
+        user = UserFactory()
+        notifications = NotificationFactory.create_batch(2, recipient=user)
+        NotificationFactory()
+
+        response = api_client.get(
+            '/api/async/notifications/',
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+
+        data = response.json()
+        assert data['count'] == 2
+        assert {n['id'] for n in data['results']} == \
+            {n.id for n in notifications}
+        assert data['results'][0]['recipient']['id'] == user.id
+
+    def test_notifications_of_inactive_user(self, api_client):
+        user = UserFactory(is_active=False)
+        NotificationFactory(recipient=user)
+
+        response = api_client.get(
+            '/api/async/notifications/',
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_notifications_ignore_query_token(self, api_client):
+        user = UserFactory()
+
+        response = api_client.get('/api/async/notifications/',
+                                  {'token': str(AccessToken.for_user(user))})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
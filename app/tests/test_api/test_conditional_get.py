@@ -0,0 +1,129 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.utils.http import http_date
+from rest_framework import status
+
+from event_calendar.versions import version_key
+from events.cache import EVENT_VERSION
+
+from tests.factories import EventFactory, NotificationFactory, \
+    ReservationFactory, TagFactory, UserFactory
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_event_detail(self, api_client, django_assert_num_queries,
+                          django_capture_on_commit_callbacks):
+        event = EventFactory()
+        url = f'/api/events/{event.id}/'
+        etag = api_client.get(url)['ETag']
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+
+        with django_capture_on_commit_callbacks(execute=True):
+            event.name = 'Renamed'
+            event.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['name'] == 'Renamed'
+
+    def test_unknown_event_gets_no_version(self, api_client):
+        event = EventFactory()
+        cache.clear()
+
+        response = api_client.get(f'/api/events/{event.id + 1}/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert cache.get(version_key(EVENT_VERSION, event.id + 1)) is None
+
+        response = api_client.get('/api/events/abc/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        # Existing events get one on first read
+        assert 'ETag' in api_client.get(f'/api/events/{event.id}/')
+        assert cache.get(version_key(EVENT_VERSION, event.id)) is not None
+
+    def test_event_list(self, api_client, django_assert_num_queries,
+                        django_capture_on_commit_callbacks):
+        event = EventFactory()
+        etag = api_client.get('/api/events/')['ETag']
+
+        with django_assert_num_queries(0):
+            response = api_client.get('/api/events/',
+                                      HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        # Other filters have their own validators
+        response = api_client.get('/api/events/', {'status': 'upcoming'},
+                                  HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ReservationFactory(event=event)
+
+        response = api_client.get('/api/events/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_if_modified_since(self, api_client):
+        EventFactory()
+        response = api_client.get('/api/events/')
+        assert 'Last-Modified' in response
+
+        response = api_client.get(
+            '/api/events/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        response = api_client.get(
+            '/api/events/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() - 60)
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_tag_list(self, api_client, django_capture_on_commit_callbacks):
+        TagFactory()
+        etag = api_client.get('/api/tags/')['ETag']
+
+        response = api_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TagFactory()
+
+        response = api_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_notification_list(self, api_client, user,
+                               django_assert_max_num_queries,
+                               django_capture_on_commit_callbacks):
+        notification = NotificationFactory(recipient=user)
+        api_client.force_authenticate(user)
+        response = api_client.get('/api/notifications/')
+        etag = response['ETag']
+        assert 'Authorization' in response['Vary']
+
+        with django_assert_max_num_queries(0):
+            response = api_client.get('/api/notifications/',
+                                      HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        # Validators are per recipient
+        api_client.force_authenticate(UserFactory())
+        response = api_client.get('/api/notifications/',
+                                  HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        api_client.force_authenticate(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            api_client.post(
+                f'/api/notifications/{notification.id}/mark_as_read/'
+            )
+
+        response = api_client.get('/api/notifications/',
+                                  HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0]['is_read']
@@ -15,6 +15,17 @@ class TestEventAPI:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['count'] == 3
 
+    def test_list_ordered_by_start_time(self, api_client):
+        now = timezone.now()
+        upcoming = EventFactory(start_time=now + timedelta(days=2))
+        cancelled = EventFactory(status='cancelled',
+                                 start_time=now + timedelta(days=1))
+
+        response = api_client.get('/api/events/')
+
+        assert [event['id'] for event in response.data['results']] == \
+            [cancelled.id, upcoming.id]
+
     def test_create_event(self, authenticated_client, organizer):
         authenticated_client.force_authenticate(user=organizer)
         tag = TagFactory()
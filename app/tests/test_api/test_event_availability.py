@@ -0,0 +1,83 @@
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+
+from event_calendar.versions import version_key
+from events.cache import EVENT_VERSION
+from tests.factories import EventFactory, ReservationFactory
+
+
+@pytest.mark.django_db
+class TestEventAvailability:
+    def test_availability(self, api_client):
+        event = EventFactory(available_seats=5)
+        ReservationFactory(event=event)
+        ReservationFactory(event=event, status='cancelled')
+        other = EventFactory(available_seats=3, status='cancelled')
+
+        response = api_client.get(
+            '/api/events/availability/',
+            {'ids': f'{event.id},{other.id},{other.id + 1000}'}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            str(event.id): {'available_seats_count': 4,
+                            'status': 'upcoming'},
+            str(other.id): {'available_seats_count': 3,
+                            'status': 'cancelled'},
+        }
+
+    def test_single_query(self, api_client, django_assert_num_queries):
+        events = EventFactory.create_batch(5)
+        ids = ','.join(str(event.id) for event in events)
+        # Ids without a version are looked up once
+        with django_assert_num_queries(2):
+            api_client.get('/api/events/availability/', {'ids': ids})
+        with django_assert_num_queries(1):
+            api_client.get('/api/events/availability/', {'ids': ids})
+
+    def test_not_modified_until_booking(
+            self, api_client, django_assert_num_queries,
+            django_capture_on_commit_callbacks):
+        event = EventFactory(available_seats=5)
+        params = {'ids': str(event.id)}
+        etag = api_client.get('/api/events/availability/', params)['ETag']
+
+        with django_assert_num_queries(0):
+            response = api_client.get('/api/events/availability/', params,
+                                      HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ReservationFactory(event=event)
+
+        response = api_client.get('/api/events/availability/', params,
+                                  HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert response.json()[str(event.id)]['available_seats_count'] == 4
+
+    def test_unknown_ids_get_no_version(self, api_client):
+        event = EventFactory()
+        cache.clear()
+        unknown = event.id + 1000
+
+        response = api_client.get('/api/events/availability/',
+                                  {'ids': f'{event.id},{unknown}'})
+        assert response.status_code == status.HTTP_200_OK
+        assert cache.get(version_key(EVENT_VERSION, event.id)) is not None
+        assert cache.get(version_key(EVENT_VERSION, unknown)) is None
+
+    def test_only_unknown_ids(self, api_client):
+        response = api_client.get('/api/events/availability/', {'ids': '1'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {}
+        assert 'ETag' not in response
+
+    @pytest.mark.parametrize(
+        'ids', ['', '1,a', ','.join(map(str, range(1, 502)))]
+    )
+    def test_invalid_ids(self, api_client, ids):
+        response = api_client.get('/api/events/availability/', {'ids': ids})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
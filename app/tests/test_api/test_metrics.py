@@ -0,0 +1,156 @@
+import pytest
+from celery import Celery, shared_task
+from prometheus_client import REGISTRY
+
+from event_calendar.metrics import QueueLengthCollector
+from tests.factories import EventFactory
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@shared_task
+def succeeding_task():
+    return 'done'
+
+
+@shared_task
+def failing_task():
+    raise ValueError('failed')
+
+
+@shared_task(bind=True, max_retries=1)
+def retried_task(self):
+    if self.request.retries == 0:
+        raise self.retry(countdown=0)
+    return 'done'
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    def test_latency_by_view_and_action(self, api_client,
+                                        authenticated_client):
+        event = EventFactory()
+        labels = {'view': 'event-list', 'method': 'GET', 'status': '200'}
+        book_labels = {'view': 'event-book', 'method': 'POST',
+                       'status': '200'}
+        before = sample('http_request_duration_seconds_count', **labels)
+        book_before = sample('http_request_duration_seconds_count',
+                             **book_labels)
+
+        api_client.get('/api/events/')
+        authenticated_client.post(f'/api/events/{event.id}/book/')
+
+        assert sample('http_request_duration_seconds_count',
+                      **labels) == before + 1
+        assert sample('http_request_duration_seconds_count',
+                      **book_labels) == book_before + 1
+
+    def test_unmatched_path(self, api_client):
+        labels = {'view': 'unmatched', 'method': 'GET', 'status': '404'}
+        before = sample('http_request_duration_seconds_count', **labels)
+
+        api_client.get('/no/such/path/')
+
+        assert sample('http_request_duration_seconds_count',
+                      **labels) == before + 1
+
+    def test_async_view(self, api_client):
+        labels = {'view': 'async-event-list', 'method': 'GET',
+                  'status': '200'}
+        before = sample('http_request_duration_seconds_count', **labels)
+
+        api_client.get('/api/async/events/')
+
+        assert sample('http_request_duration_seconds_count',
+                      **labels) == before + 1
+
+    def test_db_pool_usage(self, api_client):
+        api_client.get('/api/events/')
+
+        # The test transaction holds a connection
+        assert REGISTRY.get_sample_value(
+            'db_pool_connections', {'database': 'default', 'state': 'busy'}
+        ) >= 1
+
+    def test_metrics_endpoint(self, api_client, settings):
+        settings.METRICS_TOKEN = 'scraper'
+        api_client.get('/api/events/')
+
+        response = api_client.get('/metrics',
+                                  HTTP_AUTHORIZATION='Bearer scraper')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert 'http_request_duration_seconds_bucket{' in body
+        assert 'view="event-list"' in body
+
+    @pytest.mark.parametrize('token, authorization', [
+        ('', ''),
+        ('', 'Bearer '),
+        ('scraper', ''),
+        ('scraper', 'Bearer other'),
+    ])
+    def test_metrics_endpoint_requires_token(self, api_client, settings,
+                                             token, authorization):
+        settings.METRICS_TOKEN = token
+        response = api_client.get('/metrics',
+                                  HTTP_AUTHORIZATION=authorization)
+        assert response.status_code == 403
+
+
+class TestTaskMetrics:
+    def test_duration(self):
+        name = succeeding_task.name
+        before = sample('celery_task_duration_seconds_count',
+                        task=name, state='SUCCESS')
+
+        succeeding_task.delay()
+
+        assert sample('celery_task_duration_seconds_count',
+                      task=name, state='SUCCESS') == before + 1
+
+    def test_failures(self):
+        name = failing_task.name
+        before = sample('celery_task_failures_total', task=name)
+
+        failing_task.delay()
+
+        assert sample('celery_task_failures_total', task=name) == before + 1
+        assert sample('celery_task_duration_seconds_count',
+                      task=name, state='FAILURE') >= 1
+
+    def test_retries(self):
+        name = retried_task.name
+        before = sample('celery_task_retries_total', task=name)
+
+        retried_task.delay()
+
+        assert sample('celery_task_retries_total', task=name) == before + 1
+
+
+class TestQueueLengthCollector:
+    def test_counts_waiting_messages(self):
+        app = Celery(broker='memory://', set_as_current=False)
+        with app.connection_for_write() as connection:
+            queue = connection.SimpleQueue('high_priority')
+            queue.put({'task': 'test'})
+            queue.put({'task': 'test'})
+
+            metric, = QueueLengthCollector(
+                app, ['high_priority', 'default']
+            ).collect()
+            queue.close()
+
+        lengths = {sample.labels['queue']: sample.value
+                   for sample in metric.samples}
+        assert lengths == {'high_priority': 2, 'default': 0}
+
+    def test_unreachable_broker(self):
+        app = Celery(broker='redis://127.0.0.1:1/0', set_as_current=False)
+
+        metric, = QueueLengthCollector(app, ['default']).collect()
+
+        assert metric.samples == []
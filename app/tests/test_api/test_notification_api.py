@@ -1,6 +1,12 @@
 import pytest
+from django.core.cache import cache
 from rest_framework import status
 
+from event_calendar.versions import get_version
+from notifications.managers import NOTIFICATION_LIST_VERSION, \
+    unread_count_key
+from notifications.models import Notification, NotificationPreference
+
 from tests.factories import NotificationFactory
 
 
@@ -32,3 +38,59 @@ class TestNotificationAPI:
         )
         assert response.status_code == status.HTTP_200_OK
         assert user.notifications.filter(is_read=False).count() == 0
+
+    def test_unread_count(self, authenticated_client, user,
+                          django_capture_on_commit_callbacks):
+        NotificationFactory.create_batch(3, recipient=user)
+        NotificationFactory(recipient=user, is_read=True)
+        response = authenticated_client.get('/api/notifications/unread_count/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['unread_count'] == 3
+
+        # Writes bump the list version the count is cached under
+        with django_capture_on_commit_callbacks(execute=True):
+            NotificationFactory(recipient=user)
+        authenticated_client.post(
+            '/api/notifications/mark_all_as_read/', user=user
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            NotificationFactory(recipient=user)
+        response = authenticated_client.get('/api/notifications/unread_count/')
+        assert response.data['unread_count'] == 1
+
+    def test_stale_unread_count_not_kept(self, user,
+                                         django_capture_on_commit_callbacks):
+        # A count taken by a read racing a write lands under the version
+        # from before the write
+        version = get_version(NOTIFICATION_LIST_VERSION, user.id)
+        cache.set(unread_count_key(user.id, version), 0)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            NotificationFactory(recipient=user)
+
+        assert Notification.objects.unread_count(user.id) == 1
+
+    def test_mark_many_as_read(self, authenticated_client, user):
+        notifications = NotificationFactory.create_batch(3, recipient=user)
+        other = NotificationFactory(is_read=False)
+        response = authenticated_client.post(
+            '/api/notifications/mark_as_read/',
+            {'ids': [notifications[0].id, notifications[1].id, other.id]},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert user.notifications.filter(is_read=False).count() == 1
+        other.refresh_from_db()
+        assert other.is_read is False
+
+    def test_update_preferences(self, authenticated_client, user):
+        response = authenticated_client.get('/api/notifications/preferences/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['digest_enabled'] is True
+
+        response = authenticated_client.patch(
+            '/api/notifications/preferences/', {'digest_enabled': False}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        preference = NotificationPreference.objects.get(user=user)
+        assert preference.digest_enabled is False
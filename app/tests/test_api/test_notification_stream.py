@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+import redis
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.stream import NotificationBroker, broker
+from tests.factories import NotificationFactory, UserFactory
+
+
+@pytest.mark.asyncio
+class TestNotificationBroker:
+    async def test_dispatch_to_recipient_queues(self, mocker):
+        mocker.patch.object(NotificationBroker, '_listen')
+        notification_broker = NotificationBroker()
+        queue = notification_broker.subscribe(1)
+        other_queue = notification_broker.subscribe(2)
+
+        notification_broker.dispatch(1, '{"id": 1}')
+
+        assert queue.get_nowait() == '{"id": 1}'
+        assert other_queue.empty()
+
+        notification_broker.unsubscribe(1, queue)
+        notification_broker.dispatch(1, '{"id": 2}')
+        assert queue.empty()
+
+    async def test_client_closed_on_reconnect(self, mocker):
+        notification_broker = NotificationBroker()
+        closed = []
+
+        class PubSub:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                pass
+
+            async def psubscribe(self, pattern):
+                # Nothing to wait for after this connection is lost
+                notification_broker._queues.clear()
+                raise redis.ConnectionError('lost')
+
+        class Client:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                closed.append(self)
+
+            def pubsub(self):
+                return PubSub()
+
+        mocker.patch('notifications.stream.RECONNECT_DELAY', 0)
+        mocker.patch('notifications.stream.aioredis.Redis.from_url',
+                     return_value=Client())
+        notification_broker.subscribe(1)
+        await asyncio.wait_for(notification_broker._listener, 1)
+
+        assert len(closed) == 1
+
+    async def test_wait_subscribed(self, mocker):
+        mocker.patch.object(NotificationBroker, '_listen')
+        notification_broker = NotificationBroker()
+        notification_broker.subscribe(1)
+
+        waiter = asyncio.ensure_future(notification_broker.wait_subscribed())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        # Set by the listener once Redis confirms the subscription
+        notification_broker._subscribed.set()
+        assert await waiter is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestNotificationStream:
+    async def test_unauthenticated(self, async_client):
+        response = await async_client.get('/api/notifications/stream/')
+        assert response.status_code == 401
+
+    @pytest.fixture
+    def subscribed(self, mocker):
+        async def confirm():
+            broker._subscribed.set()
+        mocker.patch.object(broker, '_listen', side_effect=confirm)
+
+    async def test_inactive_user(self, async_client, subscribed):
+        user = await sync_to_async(UserFactory)(is_active=False)
+        response = await async_client.get(
+            '/api/notifications/stream/',
+            headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        )
+        assert response.status_code == 401
+
+    async def test_token_query_param(self, async_client, subscribed):
+        user = await sync_to_async(UserFactory)()
+        response = await async_client.get(
+            '/api/notifications/stream/',
+            {'token': str(AccessToken.for_user(user))}
+        )
+        assert response.status_code == 200
+        await response.streaming_content.aclose()
+
+    async def test_replay_after_last_event_id(self, async_client,
+                                              subscribed):
+        user = await sync_to_async(UserFactory)()
+        first, second, third = await sync_to_async(
+            NotificationFactory.create_batch
+        )(3, recipient=user)
+
+        response = await async_client.get(
+            '/api/notifications/stream/',
+            headers={
+                'Authorization': f'Bearer {AccessToken.for_user(user)}',
+                'Last-Event-ID': str(first.id),
+            }
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+
+        content = response.streaming_content
+        chunks = [await anext(content) for _ in range(3)]
+        assert chunks[0].startswith(b'retry:')
+        assert chunks[1].startswith(f'id: {second.id}\n'.encode())
+        assert chunks[2].startswith(f'id: {third.id}\n'.encode())
+
+        # New notifications are pushed through the broker
+        broker.dispatch(user.id, f'{{"id": {third.id + 1}}}')
+        chunk = await asyncio.wait_for(anext(content), 1)
+        assert chunk.startswith(f'id: {third.id + 1}\n'.encode())
+        await content.aclose()
@@ -0,0 +1,192 @@
+import marshal
+import time
+
+import pytest
+from celery import shared_task
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from profiling.models import Profile
+from profiling.profilers import CProfiler, SamplingProfiler
+from tests.factories import EventFactory, TagFactory, UserFactory
+
+
+@shared_task
+def profiled_task():
+    time.sleep(0.02)
+
+
+def sleeping():
+    time.sleep(0.05)
+
+
+@pytest.fixture
+def staff():
+    return UserFactory(is_staff=True, is_superuser=True)
+
+
+def bearer(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+
+@pytest.mark.django_db
+class TestRequestProfiling:
+    def test_cprofile_of_filtered_list(self, api_client, staff):
+        tag = TagFactory()
+        EventFactory(tags=[tag])
+
+        response = api_client.get(
+            f'/api/events/?search=party&tags={tag.id}'
+            '&min_organizer_rating=1&profile=cprofile',
+            **bearer(staff)
+        )
+
+        assert response.status_code == 200
+        profile = Profile.objects.get(pk=response['X-Profile-Id'])
+        assert profile.kind == 'request'
+        assert profile.mode == 'cprofile'
+        assert profile.user == staff
+        assert profile.name.startswith('GET /api/events/?search=party')
+        stats = marshal.loads(bytes(profile.data))
+        assert 'get_queryset' in {name for _, _, name in stats}
+
+    def test_sampled_with_header(self, api_client, staff):
+        response = api_client.get('/api/events/', HTTP_X_PROFILE='1',
+                                  **bearer(staff))
+
+        profile = Profile.objects.get(pk=response['X-Profile-Id'])
+        assert profile.mode == 'sample'
+        assert profile.filename == f'profile-{profile.pk}.folded'
+
+    def test_async_view(self, api_client, staff):
+        response = api_client.get('/api/async/events/?profile=cprofile',
+                                  **bearer(staff))
+
+        assert response.status_code == 200
+        assert Profile.objects.filter(pk=response['X-Profile-Id']).exists()
+
+    def test_ignored_for_other_users(self, api_client, user):
+        response = api_client.get('/api/events/?profile=1', **bearer(user))
+
+        assert response.status_code == 200
+        assert 'X-Profile-Id' not in response
+        assert not Profile.objects.exists()
+
+    def test_ignored_for_inactive_staff(self, api_client):
+        staff = UserFactory(is_staff=True, is_active=False)
+
+        response = api_client.get('/api/events/?profile=1', **bearer(staff))
+
+        assert 'X-Profile-Id' not in response
+        assert not Profile.objects.exists()
+
+    def test_ignored_for_revoked_token(self, api_client, staff, mocker):
+        mocker.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+        token = AccessToken.for_user(staff)
+        token[api_settings.REVOKE_TOKEN_CLAIM] = \
+            get_md5_hash_password(staff.password)
+        staff.set_password('changed')
+        staff.save()
+
+        response = api_client.get('/api/events/?profile=1',
+                                  HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        assert 'X-Profile-Id' not in response
+        assert not Profile.objects.exists()
+
+    def test_one_profile_at_a_time(self, api_client, staff):
+        running = CProfiler()
+        assert running.start()
+        try:
+            response = api_client.get('/api/events/?profile=cprofile',
+                                      **bearer(staff))
+        finally:
+            running.stop()
+
+        assert response.status_code == 200
+        assert 'X-Profile-Id' not in response
+        assert not Profile.objects.exists()
+
+    def test_disabled(self, api_client, staff, settings):
+        settings.PROFILING_ENABLED = False
+
+        response = api_client.get('/api/events/?profile=1', **bearer(staff))
+
+        assert 'X-Profile-Id' not in response
+
+    def test_admin_download(self, client, staff):
+        profile = Profile.objects.create(
+            kind='request', mode='sample', name='GET /api/events/',
+            duration_ms=1, data=b'main;view 3\n'
+        )
+        client.force_login(staff)
+
+        response = client.get(
+            f'/admin/profiling/profile/{profile.pk}/download/'
+        )
+
+        assert response.status_code == 200
+        assert response.content == b'main;view 3\n'
+        assert response['Content-Disposition'] == \
+            f'attachment; filename="profile-{profile.pk}.folded"'
+
+
+class TestProfiler:
+    def test_second_profiler_not_started(self):
+        first, second = SamplingProfiler(), CProfiler()
+
+        assert first.start()
+        assert not second.start()
+        second.stop()
+        first.stop()
+
+        assert second.start()
+        second.stop()
+
+    def test_failed_start_releases(self, mocker):
+        profiler = CProfiler()
+        mocker.patch.object(profiler.profile, 'enable',
+                            side_effect=ValueError)
+
+        with pytest.raises(ValueError):
+            profiler.start()
+
+        other = CProfiler()
+        assert other.start()
+        other.stop()
+
+    def test_collapsed_stacks(self, settings):
+        settings.PROFILE_SAMPLE_INTERVAL = 0.001
+        profiler = SamplingProfiler()
+
+        profiler.start()
+        sleeping()
+        profiler.stop()
+
+        lines = profiler.result().decode().splitlines()
+        count = lines[0].rsplit(' ', 1)[1]
+        assert int(count) > 0
+        assert any(line.split(' ')[0].endswith(
+            'test_profiling.sleeping') for line in lines)
+
+
+@pytest.mark.django_db
+class TestTaskProfiling:
+    def test_sampled_tasks(self, settings):
+        settings.PROFILE_TASKS = {profiled_task.name: 1}
+        settings.PROFILE_TASK_MODE = 'cprofile'
+
+        profiled_task.delay()
+
+        profile = Profile.objects.get()
+        assert profile.kind == 'task'
+        assert profile.name == profiled_task.name
+        assert profile.duration_ms >= 20
+
+    def test_other_tasks_not_profiled(self, settings):
+        settings.PROFILE_TASKS = {}
+
+        profiled_task.delay()
+
+        assert not Profile.objects.exists()
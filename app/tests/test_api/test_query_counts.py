@@ -0,0 +1,241 @@
+"""
+Pins the number of SQL queries of every endpoint. Lists are requested
+at page sizes 1 and 50, detail endpoints and actions run against 1 and
+50 related rows, and the count has to be the same for both, so an N+1
+fails here before it shows up in production.
+
+Caches are cleared before each request, so counts are those of a cold
+request. Celery tasks are not counted, they run in workers.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event_calendar.cache import clear_local_caches
+from events.models import Event, Rating, Reservation, Tag
+from notifications.models import Notification, NotificationPreference
+
+SIZES = (1, 50)
+
+
+def count_queries(client, method, path, data=None):
+    cache.clear()
+    clear_local_caches()
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(path, data, format='json')
+    assert response.status_code < 400, response.content
+    return len(queries)
+
+
+def create_users(count, prefix='query_user'):
+    return User.objects.bulk_create(
+        User(username=f'{prefix}_{i}') for i in range(count)
+    )
+
+
+@pytest.fixture
+def jwt_client(api_client, user):
+    # Async views only authenticate with JWT
+    api_client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    return api_client
+
+
+@pytest.fixture(autouse=True)
+def no_notification_tasks():
+    with patch('events.views.send_booking_notification.delay'), \
+            patch('events.views.send_cancellation_notification.delay'):
+        yield
+
+
+@pytest.fixture
+def listing(user):
+    """50 of everything the list endpoints return for user"""
+    others = create_users(50)
+    tags = Tag.objects.bulk_create(Tag(name=f'tag{i}') for i in range(50))
+    for i, other in enumerate(others):
+        event = Event.objects.create(
+            name=f'Event {i}', description='Concert', location='Berlin',
+            start_time=timezone.now() + timedelta(days=i + 1),
+            available_seats=10, organizer=user
+        )
+        event.tags.set([tags[0], tags[i]])
+        Reservation.objects.create(user=user, event=event)
+        Reservation.objects.create(user=other, event=event)
+        Rating.objects.create(user=other, event=event, rating=4)
+        Notification.objects.create(
+            recipient=user, notification_type='booking',
+            title=f'Booked {i}', message='Booked'
+        )
+    return {'tag': tags[0].id,
+            'ids': ','.join(str(pk) for pk in
+                            Event.objects.values_list('pk', flat=True))}
+
+
+@pytest.mark.django_db
+class TestListQueryCounts:
+    @pytest.mark.parametrize('path, params, expected', [
+        ('/api/events/', {}, 8),
+        ('/api/events/', {'tags': '{tag}'}, 9),
+        ('/api/events/', {'location': 'berlin', 'status': 'upcoming'}, 8),
+        ('/api/events/', {'min_available_seats': 1}, 8),
+        ('/api/events/', {'search': 'concert'}, 8),
+        ('/api/events/', {'ordering': '-start_time'}, 8),
+        ('/api/events/', {'facets': 'tags,location,status'}, 9),
+        ('/api/reservations/', {}, 8),
+        ('/api/notifications/', {}, 3),
+        ('/api/tags/', {}, 3),
+        ('/api/async/events/', {}, 6),
+        ('/api/async/tags/', {}, 2),
+        ('/api/async/notifications/', {}, 3),
+    ])
+    def test_paginated(self, jwt_client, listing, path, params, expected):
+        params = {name: str(value).format(**listing)
+                  for name, value in params.items()}
+        counts = {
+            size: count_queries(jwt_client, 'get', path,
+                                {**params, 'page_size': size})
+            for size in SIZES
+        }
+        assert counts == dict.fromkeys(SIZES, expected)
+
+    def test_page_size(self, jwt_client, listing):
+        response = jwt_client.get('/api/events/', {'page_size': 50})
+        assert len(response.data['results']) == 50
+
+    @pytest.mark.parametrize('path, expected', [
+        ('/api/events/my_events/', 6),
+        ('/api/events/organized/', 6),
+        ('/api/events/availability/?ids={ids}', 3),
+    ])
+    def test_unpaginated(self, jwt_client, user, path, expected):
+        others = create_users(49)
+        event = Event.objects.create(
+            name='Event', description='Concert', location='Berlin',
+            start_time=timezone.now() + timedelta(days=1),
+            available_seats=10, organizer=user
+        )
+        Reservation.objects.create(user=user, event=event)
+        counts = {1: count_queries(
+            jwt_client, 'get', path.format(ids=event.id)
+        )}
+
+        events = Event.objects.bulk_create(Event(
+            name=f'Event {i}', description='Concert', location='Berlin',
+            start_time=timezone.now() + timedelta(days=1),
+            available_seats=10, organizer=user
+        ) for i in range(49))
+        Reservation.objects.bulk_create(
+            Reservation(user=user, event=event) for event in events
+        )
+        Reservation.objects.bulk_create(
+            Reservation(user=other, event=event)
+            for other, event in zip(others, events)
+        )
+        ids = ','.join(str(event.id) for event in [event, *events])
+        counts[50] = count_queries(jwt_client, 'get', path.format(ids=ids))
+
+        assert counts == dict.fromkeys(SIZES, expected)
+
+
+def create_world(user, size):
+    """
+    Events of user and of another organizer with size reservations,
+    ratings and tags each, and size notifications of user
+    """
+    others = create_users(size, f'world{size}')
+    organizer = others[0]
+    tags = Tag.objects.bulk_create(
+        Tag(name=f'world{size}_{i}') for i in range(size)
+    )
+
+    def create_event(organizer, **fields):
+        event = Event.objects.create(**{
+            'name': 'Event', 'description': 'Concert', 'location': 'Berlin',
+            'start_time': timezone.now() + timedelta(days=1),
+            'available_seats': 100, 'organizer': organizer, **fields
+        })
+        event.tags.set(tags)
+        Reservation.objects.bulk_create(
+            Reservation(user=other, event=event) for other in others
+        )
+        Rating.objects.bulk_create(
+            Rating(user=other, event=event, rating=3) for other in others
+        )
+        return event
+
+    event = create_event(user)
+    other_event = create_event(organizer)
+    completed = create_event(organizer, status='completed',
+                             start_time=timezone.now() - timedelta(days=1))
+    reservation = Reservation.objects.create(user=user, event=event)
+    Reservation.objects.create(user=user, event=completed)
+    notifications = Notification.objects.bulk_create(Notification(
+        recipient=user, notification_type='booking',
+        title=f'Booked {i}', message='Booked'
+    ) for i in range(size))
+    NotificationPreference.objects.get_or_create(user=user)
+    return {
+        'event': event.id, 'other_event': other_event.id,
+        'completed': completed.id, 'reservation': reservation.id,
+        'tag': tags[0].id, 'tag_ids': [tag.id for tag in tags],
+        'notification': notifications[0].id,
+        'notification_ids': [n.id for n in notifications],
+    }
+
+
+@pytest.mark.django_db
+class TestActionQueryCounts:
+    @pytest.mark.parametrize('method, path, data, expected', [
+        ('get', '/api/events/{event}/', None, 7),
+        ('get', '/api/async/events/{event}/', None, 5),
+        ('post', '/api/events/', lambda world: {
+            'name': 'New', 'description': 'New', 'location': 'Berlin',
+            'start_time': timezone.now() + timedelta(days=1),
+            'available_seats': 10, 'tag_ids': world['tag_ids'],
+        }, 11),
+        ('patch', '/api/events/{event}/', lambda world: {
+            'name': 'Renamed', 'tag_ids': world['tag_ids'],
+        }, 11),
+        ('delete', '/api/events/{event}/', None, 17),
+        ('post', '/api/events/{event}/change_status/',
+         {'status': 'cancelled'}, 9),
+        ('post', '/api/events/{other_event}/book/', None, 13),
+        ('post', '/api/events/{event}/cancel_reservation/', None, 17),
+        ('post', '/api/events/{completed}/rate/', {'rating': 4}, 22),
+        ('get', '/api/reservations/{reservation}/', None, 7),
+        ('post', '/api/reservations/', lambda world: {
+            'event_id': world['other_event'],
+        }, 13),
+        ('patch', '/api/reservations/{reservation}/',
+         {'status': 'cancelled'}, 8),
+        ('delete', '/api/reservations/{reservation}/', None, 8),
+        ('get', '/api/tags/{tag}/', None, 2),
+        ('get', '/api/notifications/{notification}/', None, 2),
+        ('post', '/api/notifications/{notification}/mark_as_read/', None, 3),
+        ('post', '/api/notifications/mark_as_read/', lambda world: {
+            'ids': world['notification_ids'],
+        }, 2),
+        ('post', '/api/notifications/mark_all_as_read/', None, 2),
+        ('get', '/api/notifications/unread_count/', None, 2),
+        ('get', '/api/notifications/preferences/', None, 2),
+        ('patch', '/api/notifications/preferences/',
+         {'digest_enabled': True}, 3),
+    ])
+    def test_action(self, jwt_client, user, method, path, data, expected):
+        counts = {}
+        for size in SIZES:
+            world = create_world(user, size)
+            counts[size] = count_queries(
+                jwt_client, method, path.format(**world),
+                data(world) if callable(data) else data
+            )
+        assert counts == dict.fromkeys(SIZES, expected)
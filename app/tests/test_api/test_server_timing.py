@@ -0,0 +1,98 @@
+import json
+import logging
+
+import pytest
+
+from event_calendar.instrumentation import current_metrics
+from tests.factories import EventFactory, TagFactory
+
+LOGGER = 'event_calendar.server_timing'
+
+
+def timings(response):
+    """Server-Timing header as {metric: {param: value}}"""
+    result = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        result[name] = dict(param.split('=', 1) for param in params)
+    return result
+
+
+@pytest.fixture
+def caplog(caplog):
+    # The logger doesn't propagate to the root logger caplog listens on
+    logger = logging.getLogger(LOGGER)
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+    def test_unsampled_request_has_no_metrics(self, api_client, settings):
+        settings.SERVER_TIMING_SAMPLE_RATE = 0
+
+        response = api_client.get('/api/events/')
+
+        assert 'Server-Timing' not in response
+        assert current_metrics() is None
+
+    def test_sampled_request(self, api_client, settings, caplog):
+        settings.SERVER_TIMING_SAMPLE_RATE = 1
+        EventFactory.create_batch(2, tags=[TagFactory()])
+
+        with caplog.at_level(logging.INFO, LOGGER):
+            response = api_client.get('/api/events/')
+
+        metrics = timings(response)
+        assert int(metrics['db']['desc'].strip('"').split()[0]) > 0
+        assert float(metrics['db']['dur']) > 0
+        assert float(metrics['serializer']['dur']) > 0
+        assert 'budget' not in metrics
+
+        record, = caplog.records
+        assert record.levelno == logging.INFO
+        data = json.loads(record.getMessage())
+        assert data['path'] == '/api/events/'
+        assert data['status'] == 200
+        assert data['queries'] > 0
+        assert data['over_budget'] is False
+        assert current_metrics() is None
+
+    def test_counts_tiered_cache_hits_and_misses(self, api_client, settings,
+                                                 caplog):
+        settings.SERVER_TIMING_SAMPLE_RATE = 1
+        EventFactory.create_batch(2)
+
+        with caplog.at_level(logging.INFO, LOGGER):
+            api_client.get('/api/events/')
+            api_client.get('/api/events/?ordering=created_at')
+
+        first, second = [json.loads(record.getMessage())
+                         for record in caplog.records]
+        assert first['cache_misses'] > 0
+        assert second['cache_hits'] >= 2
+        # All events come from cached fragments
+        assert second['serializer_ms'] == 0
+
+    def test_flags_requests_over_query_budget(self, api_client, settings,
+                                              caplog):
+        settings.SERVER_TIMING_SAMPLE_RATE = 1
+        settings.SERVER_TIMING_QUERY_BUDGET = 0
+
+        with caplog.at_level(logging.INFO, LOGGER):
+            response = api_client.get('/api/events/')
+
+        assert 'budget' in timings(response)
+        record, = caplog.records
+        assert record.levelno == logging.WARNING
+        assert record.server_timing['over_budget'] is True
+
+    def test_async_view(self, api_client, settings):
+        settings.SERVER_TIMING_SAMPLE_RATE = 1
+        EventFactory()
+
+        response = api_client.get('/api/async/events/')
+
+        metrics = timings(response)
+        assert int(metrics['db']['desc'].strip('"').split()[0]) > 0
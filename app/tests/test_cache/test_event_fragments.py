@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from event_calendar.db_routers import ReplicaRouter, replica_reads
+from event_calendar.versions import bump_versions
+from events.cache import EVENT_VERSION, get_event_fragments
+from events.models import Event
+from events.tasks import update_event_statuses
+from events.views import EventViewSet
+from tests.factories import EventFactory, RatingFactory, \
+    ReservationFactory, TagFactory
+
+
+@pytest.mark.django_db
+class TestEventFragments:
+    @pytest.fixture
+    def serialize_spy(self, mocker):
+        return mocker.spy(EventViewSet, 'serialize_events')
+
+    def test_list_serializes_only_misses(self, api_client, serialize_spy):
+        first, second = EventFactory.create_batch(2)
+        api_client.get('/api/events/')
+        assert sorted(serialize_spy.call_args.args[1]) == \
+            [first.id, second.id]
+
+        serialize_spy.reset_mock()
+        response = api_client.get('/api/events/')
+        assert not serialize_spy.called
+        assert [e['id'] for e in response.data['results']] == \
+            [first.id, second.id]
+
+        third = EventFactory()
+        api_client.get('/api/events/')
+        assert serialize_spy.call_args.args[1] == [third.id]
+
+    def test_keeps_filter_order(self, api_client):
+        tag = TagFactory()
+        now = timezone.now()
+        events = [EventFactory(start_time=now + timedelta(days=days),
+                               tags=[tag]) for days in (1, 3, 2)]
+        EventFactory()
+        api_client.get('/api/events/')
+
+        response = api_client.get(
+            '/api/events/', {'tags': tag.id, 'ordering': '-start_time'}
+        )
+        assert [e['id'] for e in response.data['results']] == \
+            [events[1].id, events[2].id, events[0].id]
+
+    def test_invalidated_by_booking_and_rating(
+            self, api_client, django_capture_on_commit_callbacks):
+        event = EventFactory(available_seats=5)
+        api_client.get('/api/events/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ReservationFactory(event=event)
+            RatingFactory(event=event, rating=4)
+
+        result = api_client.get('/api/events/').data['results'][0]
+        assert result['available_seats_count'] == 4
+        assert result['average_rating'] == 4
+
+    def test_invalidated_by_tags_and_organizer(
+            self, api_client, django_capture_on_commit_callbacks):
+        tag = TagFactory(name='music')
+        event = EventFactory(tags=[tag])
+        api_client.get('/api/events/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            tag.name = 'jazz'
+            tag.save()
+            event.tags.add(TagFactory(name='live'))
+            event.organizer.first_name = 'Ann'
+            event.organizer.save()
+
+        result = api_client.get('/api/events/').data['results'][0]
+        assert sorted(t['name'] for t in result['tags']) == ['jazz', 'live']
+        assert result['organizer']['first_name'] == 'Ann'
+
+    def test_invalidated_by_status_update(
+            self, api_client, django_capture_on_commit_callbacks):
+        EventFactory(start_time=timezone.now() - timedelta(hours=3))
+        api_client.get('/api/events/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            update_event_statuses()
+
+        result = api_client.get('/api/events/').data['results'][0]
+        assert result['status'] == 'completed'
+
+
+class TestGetEventFragments:
+    def test_misses_read_from_primary(self, settings):
+        settings.DB_REPLICA_ENABLED = True
+
+        def serialize(event_ids):
+            assert ReplicaRouter().db_for_read(Event) == 'default'
+            return {event_id: {'id': event_id} for event_id in event_ids}
+
+        with replica_reads():
+            assert get_event_fragments([1], serialize) == [{'id': 1}]
+
+    def test_changed_during_read_not_cached(self):
+        calls = []
+
+        def serialize(event_ids):
+            calls.append(event_ids)
+            if len(calls) == 1:
+                # Changed after the version was read
+                bump_versions(EVENT_VERSION, event_ids)
+            return {event_id: {'id': event_id} for event_id in event_ids}
+
+        for _ in range(3):
+            assert get_event_fragments([1], serialize) == [{'id': 1}]
+        assert calls == [[1], [1]]
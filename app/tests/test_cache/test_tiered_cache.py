@@ -0,0 +1,123 @@
+import pytest
+from django.core.cache import cache
+
+from event_calendar.cache import TieredCache, apply_invalidation
+from events.serializers import EventSerializer
+from tests.factories import TagFactory
+
+
+@pytest.fixture
+def tiered_cache():
+    return TieredCache('test', timeout=60, local_timeout=30, local_size=2)
+
+
+class TestTieredCache:
+    def test_local_then_shared(self, tiered_cache):
+        tiered_cache.set('a', 1)
+        assert tiered_cache.get('a') == 1
+
+        tiered_cache.clear_local()
+        assert tiered_cache.get('a') == 1
+        assert tiered_cache.get('missing') is None
+
+        stats = tiered_cache.stats()
+        assert stats['local_hits'] == 1
+        assert stats['shared_hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_local_lru_eviction(self, tiered_cache):
+        tiered_cache.set('a', 1)
+        tiered_cache.set('b', 2)
+        tiered_cache.get('a')
+        tiered_cache.set('c', 3)
+
+        # Generation entry takes a slot, least recently used keys go
+        assert tiered_cache.stats()['local_size'] == 2
+        cache.clear()
+        assert tiered_cache.get('b') is None
+        assert tiered_cache.get('c') == 3
+
+    def test_local_ttl(self, tiered_cache, mocker):
+        tiered_cache.set('a', 1)
+        cache.clear()
+
+        monotonic = mocker.patch('event_calendar.cache.time.monotonic')
+        monotonic.return_value = 10 ** 9
+        assert tiered_cache.get('a') is None
+
+    def test_delete_and_clear(self, tiered_cache):
+        tiered_cache.set_many({'a': 1, 'b': 2})
+        tiered_cache.delete('a')
+        assert tiered_cache.get_many(['a', 'b']) == {'b': 2}
+
+        tiered_cache.clear()
+        assert tiered_cache.get('b') is None
+
+    def test_get_or_set_skips_none(self, tiered_cache):
+        assert tiered_cache.get_or_set('a', lambda: None) is None
+        assert tiered_cache.get_or_set('a', lambda: 1) == 1
+        assert tiered_cache.get_or_set('a', lambda: 2) == 1
+
+    def test_broadcast_invalidation(self, tiered_cache):
+        tiered_cache.set('a', 1)
+        cache.clear()
+
+        # As received from another process
+        apply_invalidation({'namespace': 'test', 'keys': ['a']})
+        assert tiered_cache.get('a') is None
+
+
+@pytest.mark.django_db
+class TestTagCache:
+    def test_tag_list_cached_until_tag_changes(
+            self, api_client, django_assert_num_queries,
+            django_capture_on_commit_callbacks):
+        TagFactory(name='music')
+        assert api_client.get('/api/tags/').data['count'] == 1
+
+        with django_assert_num_queries(0):
+            assert api_client.get('/api/tags/').data['count'] == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TagFactory(name='sport')
+        assert api_client.get('/api/tags/').data['count'] == 2
+
+    def test_tag_list_cached_by_page(self, api_client,
+                                     django_assert_num_queries):
+        TagFactory.create_batch(12)
+        params = {'page': 2, 'page_size': 5}
+        api_client.get('/api/tags/', {**params, 'other': 1},
+                       HTTP_HOST='localhost')
+
+        # Links are built for the request, not taken from the cache
+        with django_assert_num_queries(0):
+            response = api_client.get('/api/tags/', params,
+                                      HTTP_HOST='web')
+        assert len(response.data['results']) == 5
+        assert response.data['next'] == \
+            'http://web/api/tags/?page=3&page_size=5'
+
+        # Searches query the tags
+        with django_assert_num_queries(2):
+            api_client.get('/api/tags/', {**params, 'search': 'tag'})
+
+    def test_event_tag_ids_resolved_from_cache(
+            self, authenticated_client, django_assert_num_queries):
+        tags = TagFactory.create_batch(3)
+        tag_ids = [tag.id for tag in tags]
+        data = {'name': 'Event', 'description': 'Description',
+                'start_time': '2100-01-01T10:00:00Z', 'location': 'City',
+                'available_seats': 10, 'tag_ids': tag_ids}
+
+        response = authenticated_client.post('/api/events/', data)
+        assert response.status_code == 201
+        assert sorted(t['id'] for t in response.data['tags']) == tag_ids
+
+        with django_assert_num_queries(0):
+            serializer = EventSerializer(data=data)
+            assert serializer.is_valid(), serializer.errors
+
+        data['tag_ids'] = [max(tag_ids) + 1]
+        serializer = EventSerializer(data=data)
+        assert not serializer.is_valid()
+        assert 'tag_ids' in serializer.errors
@@ -0,0 +1,103 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from events.management.commands.explain_event_filters import \
+    find_problems, representative_combinations
+from tests.factories import EventFactory, RatingFactory, TagFactory
+
+
+@pytest.fixture
+def events():
+    tag = TagFactory()
+    events = EventFactory.create_batch(3, tags=[tag], name='Jazz night')
+    RatingFactory(event=events[0], rating=5)
+    return events
+
+
+def explain(*args):
+    out = StringIO()
+    call_command('explain_event_filters', *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+class TestExplainEventFilters:
+    def test_report(self, events):
+        report = explain('--min-rows', '0')
+
+        assert 'search+min_organizer_rating+tags+ordering=created_at: ' \
+            in report
+        # Tables this small are always scanned
+        assert 'seq scan, Seq Scan on events_event' in report
+        assert 'Findings of 30 combinations' in report
+
+    def test_json(self, events):
+        results = json.loads(explain('--only', 'tags', '--json'))
+
+        assert {result['name'] for result in results} >= {
+            'tags', 'search+tags', 'tags+ordering=available_seats'
+        }
+        tags = next(r for r in results if r['name'] == 'tags')
+        assert tags['params'] == {'tags': str(events[0].tags.get().id)}
+        assert [query['label'] for query in tags['queries']] == \
+            ['count', 'page']
+        assert tags['queries'][1]['plan']['Plan']['Actual Rows'] == 3
+
+    def test_without_data(self):
+        with pytest.raises(CommandError):
+            explain()
+
+
+def test_combinations_are_unique():
+    names = [name for name, _ in representative_combinations()]
+    assert len(names) == len(set(names))
+
+
+def test_spills_and_estimate_misses():
+    plan = {'Plan': {
+        'Node Type': 'Sort', 'Sort Key': ['start_time'],
+        'Sort Space Type': 'Disk', 'Sort Space Used': 2048,
+        'Plan Rows': 10, 'Actual Rows': 50000, 'Actual Loops': 1,
+        'Plans': [{
+            'Node Type': 'Hash Join', 'Hash Cond': '(a.id = b.id)',
+            'Plan Rows': 50000, 'Actual Rows': 50000, 'Actual Loops': 1,
+            'Plans': [{
+                'Node Type': 'Index Scan', 'Relation Name': 'events_event',
+                'Plan Rows': 50000, 'Actual Rows': 50000, 'Actual Loops': 1,
+            }, {
+                'Node Type': 'Hash', 'Hash Batches': 4,
+                'Original Hash Batches': 1,
+                'Plan Rows': 50000, 'Actual Rows': 50000, 'Actual Loops': 1,
+                'Plans': [{
+                    'Node Type': 'Index Scan',
+                    'Relation Name': 'events_reservation',
+                    'Plan Rows': 50000, 'Actual Rows': 50000,
+                    'Actual Loops': 1,
+                }],
+            }],
+        }, {
+            'Node Type': 'Nested Loop',
+            'Plan Rows': 20, 'Actual Rows': 2000, 'Actual Loops': 1,
+            'Plans': [{
+                'Node Type': 'Index Scan', 'Relation Name': 'events_event',
+                'Index Cond': '(id = 1)',
+                'Plan Rows': 2, 'Actual Rows': 200, 'Actual Loops': 10,
+            }],
+        }, {
+            'Node Type': 'Seq Scan', 'Relation Name': 'events_tag',
+            'Plan Rows': 10, 'Actual Rows': 10, 'Actual Loops': 1,
+        }],
+    }}
+
+    problems = find_problems(plan, min_rows=1000, estimate_factor=10)
+
+    # Estimates of the nodes above the index scan are off because of it
+    assert [(p['kind'], p['node']) for p in problems] == [
+        ('sort spill', 'Sort'),
+        ('hash spill', 'Hash'),
+        ('row estimate', 'Index Scan on events_event'),
+    ]
+    assert problems[1]['condition'] == '(a.id = b.id)'
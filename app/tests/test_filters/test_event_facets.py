@@ -0,0 +1,66 @@
+import pytest
+from rest_framework import status
+
+from tests.factories import EventFactory, ReservationFactory, TagFactory
+
+
+@pytest.mark.django_db
+class TestEventFacets:
+    @pytest.fixture
+    def events(self):
+        music, sport = TagFactory(name='music'), TagFactory(name='sport')
+        return [
+            EventFactory(location='Berlin', tags=[music, sport]),
+            EventFactory(location='Berlin', tags=[music]),
+            EventFactory(location='Paris', tags=[music],
+                         status='cancelled'),
+            EventFactory(location='Paris'),
+        ], music, sport
+
+    def test_facet_counts(self, api_client, events):
+        events, music, sport = events
+        # Reservations must not multiply the counts
+        ReservationFactory.create_batch(3, event=events[0])
+
+        response = api_client.get(
+            '/api/events/', {'facets': 'tags,location,status'}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 4
+        assert response.data['facets'] == {
+            'tags': [{'value': music.id, 'count': 3},
+                     {'value': sport.id, 'count': 1}],
+            'location': [{'value': 'Berlin', 'count': 2},
+                         {'value': 'Paris', 'count': 2}],
+            'status': [{'value': 'upcoming', 'count': 3},
+                       {'value': 'cancelled', 'count': 1}],
+        }
+
+    def test_facet_ignores_own_filter(self, api_client, events):
+        events, music, sport = events
+
+        response = api_client.get('/api/events/', {
+            'facets': 'location,status', 'location': 'Berlin'
+        })
+
+        assert response.data['count'] == 2
+        # Location counts are over all events, status over Berlin only
+        assert response.data['facets']['location'] == [
+            {'value': 'Berlin', 'count': 2}, {'value': 'Paris', 'count': 2}
+        ]
+        assert response.data['facets']['status'] == [
+            {'value': 'upcoming', 'count': 2}
+        ]
+
+    def test_facets_in_one_query(self, api_client, events,
+                                 django_assert_num_queries):
+        api_client.get('/api/events/')
+        # Page count and ids, then facets; fragments are cached
+        with django_assert_num_queries(3):
+            api_client.get('/api/events/',
+                           {'facets': 'tags,location,status'})
+
+    def test_unknown_facet(self, api_client):
+        response = api_client.get('/api/events/', {'facets': 'organizer'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
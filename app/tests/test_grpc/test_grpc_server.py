@@ -1,10 +1,15 @@
 from unittest.mock import AsyncMock
 
+import grpc
 import pytest
 from grpc.aio import ServicerContext
+from prometheus_client import REGISTRY
 
 from grpc_server import notifications_pb2
 from grpc_server.grpc_server_main import NotificationServicer
+from grpc_server.metrics import MetricsInterceptor
+from grpc_server.notifications_pb2_grpc import NotificationServiceStub, \
+    add_NotificationServiceServicer_to_server
 
 
 @pytest.mark.asyncio
@@ -43,3 +48,37 @@ class TestGrpcServer:
 
         assert response.success is False
         assert "Test error" in response.message
+
+
+@pytest.mark.asyncio
+class TestGrpcMetrics:
+    async def test_rpc_latency(self):
+        method = '/grpc_server.NotificationService/SendNotification'
+        labels = {'method': method, 'code': 'OK'}
+        before = REGISTRY.get_sample_value(
+            'grpc_server_handling_seconds_count', labels
+        ) or 0
+
+        server = grpc.aio.server(interceptors=[MetricsInterceptor()])
+        add_NotificationServiceServicer_to_server(
+            NotificationServicer(), server
+        )
+        port = server.add_insecure_port('127.0.0.1:0')
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(
+                    f'127.0.0.1:{port}') as channel:
+                stub = NotificationServiceStub(channel)
+                response = await stub.SendNotification(
+                    notifications_pb2.NotificationRequest(
+                        recipient_id=1, notification_type='booking',
+                        title='Test', message='Test message'
+                    )
+                )
+        finally:
+            await server.stop(None)
+
+        assert response.success is True
+        assert REGISTRY.get_sample_value(
+            'grpc_server_handling_seconds_count', labels
+        ) == before + 1
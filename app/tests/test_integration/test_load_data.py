@@ -0,0 +1,47 @@
+import pytest
+from django.contrib.auth.models import User
+
+from events.models import Event, Rating, Reservation, Tag
+from fixtures.generate_load_data import generate
+from notifications.models import Notification
+from tests.factories import EventFactory
+
+
+@pytest.mark.django_db
+class TestLoadData:
+    def test_generates_consistent_rows(self, authenticated_client):
+        counts = generate(users=50, tags=10, events=200, reservations=600,
+                          ratings=100, notifications=300)
+
+        assert User.objects.filter(
+            username__startswith='load_'
+        ).count() == counts['users'] == 50
+        assert Tag.objects.count() == counts['tags'] == 10
+        assert Event.objects.count() == counts['events'] == 200
+        assert Reservation.objects.count() == counts['reservations'] > 0
+        assert Rating.objects.count() == counts['ratings'] > 0
+        assert Notification.objects.count() == counts['notifications']
+        assert not Event.objects.filter(search_vector__isnull=True).exists()
+        # Only completed events are rated
+        assert not Rating.objects.exclude(event__status='completed').exists()
+
+        user = User.objects.get(username='load_user_0')
+        assert user.check_password('password123')
+
+        event = Event.objects.first()
+        response = authenticated_client.get(
+            f'/api/events/?search={event.location}'
+        )
+        assert response.data['count'] == Event.objects.filter(
+            location=event.location
+        ).count()
+
+    def test_sequences_continue_after_copied_ids(self):
+        generate(users=5, tags=2, events=5, reservations=5, ratings=1,
+                 notifications=5)
+
+        event = EventFactory()
+
+        assert event.pk > Event.objects.exclude(
+            pk=event.pk
+        ).order_by('-pk').first().pk
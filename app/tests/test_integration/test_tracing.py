@@ -0,0 +1,142 @@
+import grpc
+import pytest
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import \
+    InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+from event_calendar.tracing import tracer
+from grpc_server import notifications_pb2
+from grpc_server.grpc_server_main import NotificationServicer
+from grpc_server.notifications_pb2_grpc import NotificationServiceStub, \
+    add_NotificationServiceServicer_to_server
+from grpc_server.tracing import TracingInterceptor, trace_metadata
+from tests.factories import EventFactory
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans():
+    # The global provider can only be set once per process
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(_exporter))
+        trace.set_tracer_provider(provider)
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def by_name(finished):
+    return {span.name: span for span in finished}
+
+
+@pytest.mark.django_db
+class TestBookingTrace:
+    def test_request_tasks_and_grpc_call_share_a_trace(
+            self, spans, authenticated_client, mocker):
+        mocker.patch('grpc.insecure_channel')
+        stub = mocker.patch(
+            'grpc_server.notifications_pb2_grpc.NotificationServiceStub'
+        )
+        stub.return_value.SendNotification.return_value = \
+            notifications_pb2.NotificationResponse(success=True)
+        event = EventFactory()
+
+        response = authenticated_client.post(
+            f'/api/events/{event.id}/book/',
+            HTTP_TRACEPARENT='00-0af7651916cd43dd8448eb211c80319c-'
+                             'b7ad6b7169203331-01'
+        )
+        assert response.status_code == 200
+
+        finished = by_name(spans.get_finished_spans())
+        request = finished['POST event-book']
+        booking = finished['celery.run events.tasks.send_booking_notification']
+        sending = finished[
+            'celery.run notifications.tasks.send_notification_via_grpc'
+        ]
+        call = finished[
+            'grpc /grpc_server.NotificationService/SendNotification'
+        ]
+
+        trace_id = 0x0af7651916cd43dd8448eb211c80319c
+        assert {span.context.trace_id for span in finished.values()} == \
+            {trace_id}
+        assert request.parent.span_id == 0xb7ad6b7169203331
+        assert request.kind == SpanKind.SERVER
+        assert request.attributes['http.response.status_code'] == 200
+        assert booking.parent.span_id == request.context.span_id
+        assert sending.parent.span_id == booking.context.span_id
+        assert call.parent.span_id == sending.context.span_id
+        assert booking.attributes['celery.state'] == 'SUCCESS'
+
+        _, kwargs = stub.return_value.SendNotification.call_args
+        traceparent = dict(kwargs['metadata'])['traceparent']
+        assert traceparent.split('-')[1:3] == [
+            f'{trace_id:032x}', f'{call.context.span_id:016x}'
+        ]
+
+
+app = Celery('tracing', broker='memory://', backend='cache+memory://',
+             set_as_current=False)
+
+
+@app.task
+def traced_task():
+    return trace.get_current_span().get_span_context().trace_id
+
+
+class TestTaskTrace:
+    def test_context_travels_in_task_headers(self, spans):
+        with start_worker(app, pool='solo', perform_ping_check=False):
+            with tracer.start_as_current_span('caller') as caller:
+                result = traced_task.delay()
+            trace_id = result.get(timeout=10)
+
+        finished = by_name(spans.get_finished_spans())
+        name = traced_task.name
+        publish = finished[f'celery.publish {name}']
+        queued = finished[f'celery.queue {name}']
+        run = finished[f'celery.run {name}']
+
+        assert trace_id == caller.get_span_context().trace_id
+        assert publish.parent.span_id == caller.get_span_context().span_id
+        assert publish.kind == SpanKind.PRODUCER
+        assert queued.parent.span_id == publish.context.span_id
+        assert run.parent.span_id == publish.context.span_id
+        assert queued.end_time <= run.start_time
+
+
+@pytest.mark.asyncio
+class TestGrpcTrace:
+    async def test_server_span_continues_client_trace(self, spans):
+        server = grpc.aio.server(interceptors=[TracingInterceptor()])
+        add_NotificationServiceServicer_to_server(
+            NotificationServicer(), server
+        )
+        port = server.add_insecure_port('127.0.0.1:0')
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(
+                    f'127.0.0.1:{port}') as channel:
+                with tracer.start_as_current_span('client') as client:
+                    await NotificationServiceStub(channel).SendNotification(
+                        notifications_pb2.NotificationRequest(
+                            recipient_id=1, title='Test'
+                        ),
+                        metadata=trace_metadata()
+                    )
+        finally:
+            await server.stop(None)
+
+        finished = by_name(spans.get_finished_spans())
+        served = finished['/grpc_server.NotificationService/SendNotification']
+        assert served.kind == SpanKind.SERVER
+        assert served.context.trace_id == client.get_span_context().trace_id
+        assert served.parent.span_id == client.get_span_context().span_id
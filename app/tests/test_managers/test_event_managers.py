@@ -1,7 +1,8 @@
 import pytest
 
 from events.models import Event, Reservation
-from tests.factories import EventFactory, ReservationFactory
+from tests.factories import EventFactory, RatingFactory, \
+    ReservationFactory
 
 
 @pytest.mark.django_db
@@ -29,6 +30,32 @@ class TestEventManager:
         annotated_event = Event.objects.with_annotations().get(pk=event.pk)
         assert annotated_event._confirmed_reservations_count == 2
 
+    def test_annotations_without_reservations_or_ratings(self):
+        event = EventFactory(available_seats=10)
+
+        annotated_event = Event.objects.with_annotations().get(pk=event.pk)
+
+        assert annotated_event._confirmed_reservations_count == 0
+        assert annotated_event._available_seats_count == 10
+        assert annotated_event._average_rating is None
+
+    def test_average_rating_annotation(self):
+        event = EventFactory()
+        RatingFactory(event=event, rating=4)
+        RatingFactory(event=event, rating=5)
+
+        annotated_event = Event.objects.with_annotations().get(pk=event.pk)
+
+        assert annotated_event._average_rating == 4.5
+
+    def test_ids_of_annotated_events_are_not_grouped(self):
+        query = str(Event.objects.with_annotations().values_list(
+            'pk', flat=True
+        ).query)
+
+        assert 'GROUP BY' not in query
+        assert 'events_reservation' not in query
+
     def test_get_or_none(self):
         event = EventFactory()
         result = Event.objects.get_or_none(pk=event.pk)
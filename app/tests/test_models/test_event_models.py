@@ -3,6 +3,7 @@ from datetime import timedelta
 import pytest
 from django.utils import timezone
 
+from events.models import Event
 from tests.factories import EventFactory, TagFactory, ReservationFactory
 
 
@@ -33,6 +34,26 @@ class TestEventModel:
         assert event.tags.count() == 2
         assert tag1.events.count() == 1
 
+    def test_status_rank_follows_status(self):
+        event = EventFactory()
+        Event.objects.filter(pk=event.pk).update(status='cancelled')
+
+        event.refresh_from_db()
+        assert event.status_rank == 2
+
+    def test_default_ordering(self):
+        now = timezone.now()
+        cancelled = EventFactory(status='cancelled',
+                                 start_time=now + timedelta(days=1))
+        later = EventFactory(start_time=now + timedelta(days=3))
+        sooner = EventFactory(start_time=now + timedelta(days=2))
+        completed = EventFactory(status='completed',
+                                 start_time=now - timedelta(days=1))
+
+        assert list(Event.objects.all()) == [
+            sooner, later, completed, cancelled
+        ]
+
 
 @pytest.mark.django_db
 class TestReservationModel:
@@ -0,0 +1,157 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event_calendar.db_routers import ReplicaRouter, replica_reads
+from event_calendar.versions import bump_versions
+from events.cache import ALL, EVENT_LIST_VERSION, get_tags
+from events.models import Event
+from events.serializers import UserSerializer
+from events.tasks import send_event_reminders, update_event_statuses
+from notifications.celery_main import reset_task_reads, route_task_reads
+from notifications.managers import NOTIFICATION_LIST_VERSION
+from notifications.models import Notification
+from tests.factories import EventFactory, NotificationFactory, \
+    ReservationFactory, TagFactory
+
+
+class TestReplicaRouter:
+    def test_reads_follow_context(self, settings):
+        settings.DB_REPLICA_ENABLED = True
+        router = ReplicaRouter()
+        assert router.db_for_read(Event) == 'default'
+        with replica_reads():
+            assert router.db_for_read(Event) == 'replica'
+            assert router.db_for_write(Event) == 'default'
+
+    def test_replica_disabled(self, settings):
+        settings.DB_REPLICA_ENABLED = False
+        with replica_reads():
+            assert ReplicaRouter().db_for_read(Event) == 'default'
+
+    def test_task_declarations(self):
+        assert send_event_reminders.replica_reads is True
+        assert getattr(update_event_statuses, 'replica_reads', False) is False
+
+    def test_task_restores_caller_routing(self, settings):
+        settings.DB_REPLICA_ENABLED = True
+        router = ReplicaRouter()
+        with replica_reads():
+            route_task_reads(task_id='1', task=update_event_statuses)
+            assert router.db_for_read(Event) == 'default'
+            reset_task_reads(task_id='1')
+            assert router.db_for_read(Event) == 'replica'
+
+
+# Primary and replica are separate test databases here, so rows written
+# to the primary are only visible to reads routed to it. Tests run outside
+# a wrapping transaction, which would keep reads on the primary.
+@pytest.mark.django_db(databases=['default', 'replica'], transaction=True)
+class TestReplicaRouting:
+    @pytest.fixture(autouse=True)
+    def enable_replica(self, settings):
+        settings.DB_REPLICA_ENABLED = True
+
+    def test_safe_reads_use_replica(self, authenticated_client, user):
+        ReservationFactory(user=user)
+        response = authenticated_client.get('/api/events/my_events/')
+        assert response.status_code == 200
+        assert response.data == []
+
+    def test_reads_in_transaction_use_primary(self):
+        event = EventFactory()
+        with replica_reads(), transaction.atomic():
+            assert Event.objects.filter(pk=event.pk).exists()
+
+    def test_purge_deletes_on_primary(self):
+        notification = NotificationFactory()
+        with replica_reads():
+            deleted = Notification.objects.delete_expired(
+                notification.notification_type,
+                timezone.now() + timedelta(days=1), 100
+            )
+        assert deleted == 1
+        assert not Notification.objects.filter(pk=notification.pk).exists()
+
+    def test_pinned_to_primary_after_write(self, authenticated_client):
+        event = EventFactory(available_seats=5)
+        response = authenticated_client.post(f'/api/events/{event.id}/book/')
+        assert response.status_code == 200
+
+        response = authenticated_client.get('/api/events/my_events/')
+        assert response.status_code == 200
+        assert response.data[0]['available_seats_count'] == 4
+
+    def test_pinned_by_user_after_write(self, api_client, user):
+        event = EventFactory(available_seats=5)
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        response = api_client.post(f'/api/events/{event.id}/book/')
+        assert response.status_code == 200
+
+        # Token clients are pinned by user id even without the cookie
+        api_client.cookies.clear()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = api_client.get('/api/events/my_events/')
+        assert len(response.data) == 1
+        assert not replica.captured_queries
+        assert any('"events_event"' in query['sql']
+                   for query in primary.captured_queries)
+
+    def test_event_detail_reads_primary(self, api_client):
+        # The body must be as new as the version in its ETag
+        event = EventFactory()
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = api_client.get(f'/api/events/{event.id}/')
+        assert response.status_code == 200
+        assert not replica.captured_queries
+
+    def test_lists_read_primary(self, authenticated_client, user):
+        # The replica lags behind writes whose version bumps are visible
+        etag = authenticated_client.get('/api/events/')['ETag']
+        EventFactory()
+        NotificationFactory(recipient=user)
+        bump_versions(EVENT_LIST_VERSION, [ALL])
+        bump_versions(NOTIFICATION_LIST_VERSION, [user.id])
+
+        response = authenticated_client.get('/api/events/',
+                                            HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert response.data['count'] == 1
+
+        response = authenticated_client.get('/api/notifications/')
+        assert response.data['count'] == 1
+        response = authenticated_client.get(
+            '/api/notifications/unread_count/'
+        )
+        assert response.data['unread_count'] == 1
+
+    def test_shared_caches_filled_from_primary(self, api_client, user):
+        tag = TagFactory()
+        with replica_reads():
+            assert get_tags([tag.id]) == {tag.id: tag}
+            response = api_client.get('/api/tags/')
+        assert response.data['count'] == 1
+
+        # Users read from the replica are loaded again from the primary
+        user.email = 'stale@example.com'
+        user._state.db = 'replica'
+        assert UserSerializer(user).data['email'] == 'test@example.com'
+
+    @pytest.mark.asyncio
+    async def test_async_reads_use_replica(self, async_client):
+        event = await sync_to_async(EventFactory)()
+        response = await async_client.get(f'/api/async/events/{event.id}/')
+        assert response.status_code == 404
+
+        async_client.cookies['primary_pin'] = '1'
+        response = await async_client.get(f'/api/async/events/{event.id}/')
+        assert response.status_code == 200
@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event_calendar.authentication import auth_user_cache
+from event_calendar.cache import clear_local_caches
+
+
+def user_queries(queries):
+    return [query for query in queries.captured_queries
+            if 'FROM "auth_user"' in query['sql']]
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    @pytest.fixture
+    def token_client(self, api_client, user):
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        return api_client
+
+    def test_user_loaded_once(self, token_client):
+        with CaptureQueriesContext(connection) as queries:
+            assert token_client.get('/api/notifications/').status_code == 200
+        assert len(user_queries(queries)) == 1
+
+        with CaptureQueriesContext(connection) as queries:
+            assert token_client.get('/api/notifications/').status_code == 200
+        assert not user_queries(queries)
+
+        # Other processes find the user in the shared cache
+        clear_local_caches()
+        with CaptureQueriesContext(connection) as queries:
+            assert token_client.get('/api/notifications/').status_code == 200
+        assert not user_queries(queries)
+
+    def test_deactivation_invalidates(self, token_client, user,
+                                      django_capture_on_commit_callbacks):
+        token_client.get('/api/notifications/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save()
+
+        response = token_client.get('/api/notifications/')
+        assert response.status_code == 403
+
+    def test_user_update_invalidates(self, token_client, user,
+                                     django_capture_on_commit_callbacks):
+        token_client.get('/api/notifications/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.email = 'changed@example.com'
+            user.save()
+
+        response = token_client.get('/api/notifications/')
+        assert response.wsgi_request.user.email == 'changed@example.com'
+
+    def test_deleted_user(self, token_client, user):
+        token_client.get('/api/notifications/')
+        user.delete()
+
+        response = token_client.get('/api/notifications/')
+        assert response.status_code == 403
+
+    def test_password_hash_not_cached(self, token_client, user):
+        token_client.get('/api/notifications/')
+
+        fields = auth_user_cache.get(user.pk)
+        assert fields.keys() == {'id', 'password', 'is_active', 'is_staff'}
+        assert fields['password'] != user.password
+        assert user.password not in fields['password']
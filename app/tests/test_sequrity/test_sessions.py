@@ -0,0 +1,45 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.mark.django_db
+class TestApiSessions:
+    def test_jwt_request_skips_session(self, client, user):
+        client.force_login(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                '/api/notifications/',
+                HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+            )
+
+        assert response.status_code == 200
+        assert response.wsgi_request.session.session_key is None
+        assert settings.SESSION_COOKIE_NAME not in response.cookies
+        assert not any('django_session' in query['sql']
+                       for query in queries.captured_queries)
+
+    def test_session_request_uses_session(self, client, user):
+        client.force_login(user)
+
+        response = client.get('/api/notifications/')
+
+        assert response.status_code == 200
+        assert response.wsgi_request.user == user
+        # Unmodified sessions are not saved again
+        assert settings.SESSION_COOKIE_NAME not in response.cookies
+
+    def test_skip_can_be_disabled(self, client, user, settings):
+        settings.API_JWT_SKIP_SESSION = False
+        client.force_login(user)
+
+        response = client.get(
+            '/api/notifications/',
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+
+        assert response.status_code == 200
+        assert response.wsgi_request.session.session_key is not None
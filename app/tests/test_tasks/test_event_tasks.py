@@ -3,8 +3,10 @@ from datetime import timedelta
 import pytest
 from django.utils import timezone
 
-from events.tasks import update_event_statuses, send_booking_notification
-from tests.factories import EventFactory, ReservationFactory
+from events.tasks import update_event_statuses, send_booking_notification, \
+    send_event_reminders
+from notifications.models import Notification, NotificationPreference
+from tests.factories import EventFactory, ReservationFactory, UserFactory
 
 
 @pytest.mark.django_db(transaction=True)
@@ -29,6 +31,71 @@ class TestEventTasks:
         assert old_event.status == 'completed'
         assert new_event.status == 'upcoming'
 
+    def test_update_event_statuses_schedules_next_run(self, mocker,
+                                                      settings):
+        settings.EVENT_STATUS_MAX_ETA = timedelta(days=7)
+        mock_apply = mocker.patch(
+            'events.tasks.update_event_statuses.apply_async'
+        )
+        next_event = EventFactory(
+            status='upcoming',
+            start_time=timezone.now() + timedelta(hours=1)
+        )
+        EventFactory(
+            status='upcoming',
+            start_time=timezone.now() + timedelta(days=1)
+        )
+
+        update_event_statuses()
+
+        mock_apply.assert_called_once_with(
+            eta=next_event.start_time + timedelta(hours=2)
+        )
+
+    def test_update_event_statuses_prompts_ratings(self, mocker):
+        mocker.patch('events.tasks.send_notification_via_grpc')
+        event = EventFactory(
+            status='upcoming',
+            start_time=timezone.now() - timedelta(hours=3)
+        )
+        reservation = ReservationFactory(event=event, status='confirmed')
+        ReservationFactory(event=event, status='cancelled')
+
+        update_event_statuses()
+
+        prompts = Notification.objects.filter(
+            notification_type='rating_prompt'
+        )
+        assert [n.recipient_id for n in prompts] == [reservation.user_id]
+
+    def test_event_save_schedules_status_update(self, mocker, settings):
+        settings.EVENT_STATUS_SCHEDULE_ON_SAVE = True
+        settings.EVENT_STATUS_MAX_ETA = timedelta(days=7)
+        mock_apply = mocker.patch(
+            'events.tasks.update_event_statuses.apply_async'
+        )
+        event = EventFactory(start_time=timezone.now() + timedelta(days=1))
+        due_at = event.start_time + timedelta(hours=2)
+        mock_apply.assert_called_once_with(eta=due_at)
+
+        # A later event doesn't replace the earlier scheduled run
+        EventFactory(start_time=timezone.now() + timedelta(days=2))
+        mock_apply.assert_called_once_with(eta=due_at)
+
+    def test_status_update_scheduled_at_most_max_eta_ahead(self, mocker,
+                                                           settings):
+        settings.EVENT_STATUS_SCHEDULE_ON_SAVE = True
+        mock_apply = mocker.patch(
+            'events.tasks.update_event_statuses.apply_async'
+        )
+        before = timezone.now()
+        EventFactory(start_time=before + timedelta(days=3))
+        after = timezone.now()
+
+        _, kwargs = mock_apply.call_args
+        assert before + settings.EVENT_STATUS_MAX_ETA <= kwargs['eta'] \
+            <= after + settings.EVENT_STATUS_MAX_ETA
+
     def test_send_booking_notification(self, mocker):
         reservation = ReservationFactory()
         reservation.save()
@@ -38,3 +105,108 @@ class TestEventTasks:
 
         result = send_booking_notification.delay(reservation.id).get()
         assert "Booking notification created" in result
+
+    def test_send_event_reminders_digest(self, mocker):
+        mock_send = mocker.patch('events.tasks.send_notification_via_grpc')
+        user = UserFactory()
+        for _ in range(3):
+            ReservationFactory(
+                user=user,
+                event=EventFactory(
+                    start_time=timezone.now() + timedelta(minutes=90)
+                )
+            )
+
+        result = send_event_reminders()
+        assert 'Sent 3 event reminders' in result
+
+        notification = Notification.objects.get(recipient=user)
+        assert notification.is_digest
+        assert len(notification.related_object_ids) == 3
+        mock_send.apply_async.assert_called_once()
+
+    def test_first_reminder_sent_right_away(self, mocker, settings):
+        mock_send = mocker.patch('events.tasks.send_notification_via_grpc')
+        user = UserFactory()
+        start_time = timezone.now() + timedelta(minutes=90)
+        ReservationFactory(user=user, event__start_time=start_time)
+
+        send_event_reminders()
+
+        _, kwargs = mock_send.apply_async.call_args
+        assert kwargs['countdown'] == 0
+
+        # A later reminder in the window waits for others to join it
+        Notification.objects.filter(recipient=user).update(status='sent')
+        ReservationFactory(user=user, event__start_time=start_time)
+
+        send_event_reminders()
+
+        _, kwargs = mock_send.apply_async.call_args
+        assert kwargs['countdown'] == \
+            settings.NOTIFICATION_DIGEST_WINDOW.total_seconds()
+
+    def test_reminded_events_skipped_in_window(self, mocker):
+        mock_send = mocker.patch('events.tasks.send_notification_via_grpc')
+        user = UserFactory()
+        start_time = timezone.now() + timedelta(minutes=90)
+        ReservationFactory.create_batch(2, user=user,
+                                        event__start_time=start_time)
+        send_event_reminders()
+        Notification.objects.filter(recipient=user).update(status='sent')
+
+        # The next run still finds the events within the 1-2h range
+        send_event_reminders()
+
+        assert Notification.objects.filter(recipient=user).count() == 1
+        mock_send.apply_async.assert_called_once()
+
+    def test_reminders_batched(self, mocker, django_assert_num_queries):
+        mocker.patch('events.tasks.send_notification_via_grpc')
+        start_time = timezone.now() + timedelta(minutes=90)
+        for user in UserFactory.create_batch(5):
+            ReservationFactory.create_batch(2, user=user,
+                                            event__start_time=start_time)
+        send_event_reminders()
+        Notification.objects.update(status='sent')
+        for user in UserFactory.create_batch(5):
+            ReservationFactory(user=user, event__start_time=start_time)
+
+        # Reservations and tags of their events, preferences, then the
+        # window's notifications and one insert in a transaction
+        with django_assert_num_queries(7):
+            send_event_reminders()
+        assert Notification.objects.count() == 10
+
+    def test_read_digest_not_merged_into(self, mocker):
+        mocker.patch('events.tasks.send_notification_via_grpc')
+        user = UserFactory()
+        start_time = timezone.now() + timedelta(minutes=90)
+        first = ReservationFactory(user=user, event__start_time=start_time)
+        send_event_reminders()
+        Notification.objects.filter(recipient=user).update(is_read=True)
+
+        second = ReservationFactory(user=user, event__start_time=start_time)
+        send_event_reminders()
+
+        read, unread = Notification.objects.filter(
+            recipient=user
+        ).order_by('id')
+        assert read.related_object_ids == [first.event_id]
+        assert second.event_id in unread.related_object_ids
+        assert not unread.is_read
+
+    def test_send_event_reminders_digest_opt_out(self, mocker):
+        mock_send = mocker.patch('events.tasks.send_notification_via_grpc')
+        user = UserFactory()
+        NotificationPreference.objects.create(user=user, digest_enabled=False)
+        ReservationFactory.create_batch(
+            2,
+            user=user,
+            event__start_time=timezone.now() + timedelta(minutes=90)
+        )
+
+        send_event_reminders()
+
+        assert Notification.objects.filter(recipient=user).count() == 2
+        assert mock_send.delay.call_count == 2
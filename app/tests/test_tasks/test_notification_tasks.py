@@ -1,10 +1,13 @@
 import time
+from datetime import timedelta
 from unittest.mock import patch
 
 import pytest
+from django.utils import timezone
 
 from notifications.models import Notification
-from notifications.tasks import send_notification_via_grpc
+from notifications.tasks import send_notification_via_grpc, \
+    purge_expired_notifications
 from tests.factories import NotificationFactory
 
 
@@ -35,6 +38,48 @@ class TestNotificationTasks:
         notification.refresh_from_db()
         assert notification.status == 'sent'
 
+    def test_send_notification_uses_configured_target(
+            self, mocker, settings):
+        settings.GRPC_NOTIFICATION_TARGET = '127.0.0.1:50151'
+        notification = NotificationFactory(status='pending')
+        channel = mocker.patch('grpc.insecure_channel')
+        mocker.patch(
+            'grpc_server.notifications_pb2_grpc.NotificationServiceStub'
+        )
+
+        send_notification_via_grpc.delay(notification.id)
+
+        channel.assert_called_once_with('127.0.0.1:50151')
+
+    def test_notification_claimed_during_call(self, mocker):
+        notification = NotificationFactory(status='pending')
+        mocker.patch('grpc.insecure_channel')
+        stub = mocker.patch(
+            'grpc_server.notifications_pb2_grpc.NotificationServiceStub'
+        )
+        statuses = []
+
+        def send(request, metadata):
+            statuses.append(Notification.objects.get(
+                id=notification.id
+            ).status)
+            # Read meanwhile, which the result must not overwrite
+            Notification.objects.filter(id=notification.id).update(
+                is_read=True
+            )
+            return mocker.Mock(success=True)
+
+        stub.return_value.SendNotification.side_effect = send
+
+        send_notification_via_grpc.delay(notification.id)
+        result = send_notification_via_grpc.delay(notification.id).get()
+
+        assert statuses == ['sending']
+        assert 'already processed' in result
+        notification.refresh_from_db()
+        assert notification.status == 'sent'
+        assert notification.is_read
+
     @patch('grpc.insecure_channel')
     def test_send_notification_failure_task(self, mock_channel):
         notification = NotificationFactory(status='pending')
@@ -62,3 +107,24 @@ class TestNotificationTasks:
         assert "Exception while sending" in task_result
         notification.refresh_from_db()
         assert notification.status == 'failed'
+
+    def test_purge_expired_notifications(self, settings):
+        settings.NOTIFICATION_RETENTION = {'reminder': timedelta(days=30)}
+        settings.NOTIFICATION_RETENTION_DEFAULT = timedelta(days=365)
+        settings.NOTIFICATION_PURGE_BATCH_SIZE = 2
+
+        expired = NotificationFactory.create_batch(
+            3, notification_type='reminder'
+        )
+        kept_reminder = NotificationFactory(notification_type='reminder')
+        kept_booking = NotificationFactory(notification_type='booking')
+        Notification.objects.filter(
+            id__in=[n.id for n in expired] + [kept_booking.id]
+        ).update(created_at=timezone.now() - timedelta(days=60))
+
+        result = purge_expired_notifications()
+
+        assert 'Purged 3 expired notifications' in result
+        assert set(Notification.objects.values_list('id', flat=True)) == {
+            kept_reminder.id, kept_booking.id
+        }